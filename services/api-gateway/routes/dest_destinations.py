@@ -2,13 +2,17 @@
 
 from fastapi import APIRouter, HTTPException, Query
 from services.data_pipeline.best_destinations_loader import load_best_destinations
+from .responses import frame_response
 
 router = APIRouter()
 
 @router.get("/best_destinations")
-def get_best_destinations(sDate: str = Query(..., description="YYYYMMDD 형식")):
+def get_best_destinations(
+    sDate: str = Query(..., description="YYYYMMDD 형식"),
+    format: str = Query("json", pattern="^(json|columnar)$"),
+):
     try:
         df = load_best_destinations(sDate)
-        return df.to_dict(orient="records")
+        return frame_response(df, format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,15 @@
+# routes/responses.py
+
+from fastapi.responses import ORJSONResponse, Response
+
+
+def frame_response(df, format: str = "json") -> Response:
+    """
+    DataFrame 을 바로 직렬화 (records dict 변환 + FastAPI 기본 인코더 생략)
+    - json: pandas C 인코더로 레코드 배열
+    - columnar: {"columns": [...], "data": {열: [...]}} (키 반복 없음)
+    """
+    if format == "columnar":
+        return ORJSONResponse({"columns": [str(c) for c in df.columns], "data": df.to_dict(orient="list")})
+    body = df.to_json(orient="records", force_ascii=False, date_format="iso")
+    return Response(content=body, media_type="application/json")
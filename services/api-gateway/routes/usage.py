@@ -1,12 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from services.data_pipeline.usage_loader import load_usage_from_api
+from .responses import frame_response
 
 router = APIRouter()
 
 @router.get("/usage")
-def get_usage(date: str):
+def get_usage(date: str, format: str = Query("json", pattern="^(json|columnar)$")):
     try:
         df = load_usage_from_api(date)
-        return df.to_dict(orient="records")
+        return frame_response(df, format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,6 @@
+"""
+benchmarks/
+서빙 코드 마이크로벤치마크 & ASGI 부하 테스트 모음
+
+    python -m benchmarks --suite all --compare benchmarks/results/baseline.json
+"""
@@ -0,0 +1,65 @@
+"""
+python -m benchmarks [--suite micro|load|fleet|all] [--compare BASELINE.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from .report import compare_results, format_table, load_results, save_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="서빙 벤치마크 실행")
+    parser.add_argument("--suite", choices=["micro", "load", "fleet", "all"], default="all")
+    parser.add_argument("--quick", action="store_true", help="반복 횟수를 줄여 빠르게 실행")
+    parser.add_argument("--requests", type=int, default=200, help="부하 테스트 엔드포인트별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--upstream-latency", type=float, default=0.02, help="스텁 업스트림 지연(초)")
+    parser.add_argument("--replay", action="store_true",
+                        help="함수 스텁 대신 UPSTREAM_MODE=replay 녹화 응답으로 부하 테스트")
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON 경로 (기본: benchmarks/results/<시각>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="회귀로 판단할 증가율")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        os.environ["UPSTREAM_MODE"] = "replay"
+
+    results = {}
+    if args.suite in ("micro", "all"):
+        from .micro import run_micro
+        results.update(run_micro(quick=args.quick))
+    if args.suite in ("load", "all"):
+        from .load import run_load
+        results.update(run_load(
+            total=args.requests // (4 if args.quick else 1),
+            concurrency=args.concurrency,
+            upstream_latency=args.upstream_latency,
+            use_stubs=not args.replay,
+        ))
+    if args.suite in ("fleet", "all"):
+        from .fleet_sim import format_fleet_sim, run_fleet_sim
+        simulated = run_fleet_sim(quick=args.quick)
+        print(format_fleet_sim(simulated) + "\n")
+        results.update(simulated)
+
+    print(format_table({k: v for k, v in results.items() if "p50_us" in v}))
+    path = save_results(results, args.out)
+    print(f"\n결과 저장: {path}")
+
+    if args.compare:
+        regressions = compare_results(results, load_results(args.compare), args.threshold)
+        if regressions:
+            print("\n⚠️ 성능 회귀 감지:")
+            print(json.dumps(regressions, ensure_ascii=False, indent=2))
+            return 1
+        print("\n회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+benchmarks/fleet_sim.py
+차량 운행 시뮬레이터 — 단독 배차 vs 합승 배차(core/pooling.py)의 운행 효율 비교
+
+같은 시드로 만든 호출 흐름과 차량을 두 모드로 돌려
+- 운행 1건당 차량 운행 분(빈차 이동 + 승객 운행) = vehicle_minutes_per_ride
+- 픽업 대기, 탑승 시간, 미배차 건수
+를 비교한다. 배차 단위는 배치 엔진과 같은 window 이고, 각 묶음(또는 단독 요청)은
+조건에 맞는 빈 차량 중 픽업까지 가장 가까운 차량이 맡는다. 이동시간은 배차 ETA 모델을 그대로 쓴다.
+"""
+from __future__ import annotations
+
+import random
+import statistics
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+DENSITY_WEIGHT = {"high": 3, "medium": 2, "low": 1}
+
+
+@dataclass
+class Vehicle:
+    driver_id: str
+    location: str
+    wheelchair_capable: bool
+    free_at: float = 0.0
+
+
+def make_calls(rng: random.Random, locations: Dict[str, Dict], minutes: int, per_minute: float) -> List[Dict[str, Any]]:
+    names = list(locations)
+    weights = [DENSITY_WEIGHT[locations[n]["density"]] for n in names]
+    calls, t = [], 0.0
+    while True:
+        t += rng.expovariate(per_minute)
+        if t >= minutes:
+            return calls
+        calls.append({
+            "request_id": f"sim-{len(calls)}",
+            "arrival": t,
+            "pickup_location": rng.choices(names, weights)[0],
+            "destination": rng.choices(names, weights)[0],
+            "wheelchair": rng.random() < 0.15,
+            "medical_appointment": rng.random() < 0.05,
+            "weather": "맑음",
+        })
+
+
+def simulate(
+    algorithm,
+    locations: Dict[str, Dict],
+    calls: List[Dict[str, Any]],
+    fleet: List[Vehicle],
+    pooling: bool,
+    window: float = 2.0,
+    max_wait: float = 30.0,
+) -> Dict[str, Any]:
+    from serving.core.pooling import STOP_MINUTES
+
+    def leg(a: str, b: str) -> float:
+        return STOP_MINUTES if a == b else algorithm.estimate_real_travel_time(a, b, "맑음")
+
+    pending: List[Dict[str, Any]] = []
+    queue = sorted(calls, key=lambda c: c["arrival"])
+    vehicle_minutes, waits, rides = 0.0, [], []
+    served = pooled = dropped = 0
+    now = 0.0
+    while queue or pending:
+        now += window
+        while queue and queue[0]["arrival"] <= now:
+            pending.append(queue.pop(0))
+        expired = [c for c in pending if now - c["arrival"] > max_wait]
+        dropped += len(expired)
+        pending = [c for c in pending if now - c["arrival"] <= max_wait]
+        if not pending:
+            continue
+
+        # 묶음(units): [(요청 목록, 정차 [(request_id, 픽업 여부, 지역, 경과 분)], 운행 분)]
+        units = []
+        grouped = set()
+        if pooling:
+            for pool in algorithm.plan_pools(pending):
+                stops = [(s.request_id, s.action == "pickup", s.location, s.offset_minutes) for s in pool.stops]
+                units.append((pool.requests, stops, pool.duration))
+                grouped.update(r["request_id"] for r in pool.requests)
+        for c in pending:
+            if c["request_id"] not in grouped:
+                duration = leg(c["pickup_location"], c["destination"])
+                stops = [(c["request_id"], True, c["pickup_location"], 0.0),
+                         (c["request_id"], False, c["destination"], duration)]
+                units.append(([c], stops, duration))
+        units.sort(key=lambda u: min(r["arrival"] for r in u[0]))
+
+        assigned = set()
+        for members, stops, duration in units:
+            need_wheelchair = any(r["wheelchair"] for r in members)
+            idle = [v for v in fleet if v.free_at <= now and (v.wheelchair_capable or not need_wheelchair)]
+            if not idle:
+                continue
+            first = stops[0][2]
+            vehicle = min(idle, key=lambda v: leg(v.location, first) if v.location != first else 0.0)
+            deadhead = 0.0 if vehicle.location == first else leg(vehicle.location, first)
+            vehicle.free_at = now + deadhead + duration
+            vehicle.location = stops[-1][2]
+            vehicle_minutes += deadhead + duration
+
+            pickup_at = {rid: t for rid, pickup, _, t in stops if pickup}
+            dropoff_at = {rid: t for rid, pickup, _, t in stops if not pickup}
+            for r in members:
+                waits.append(now - r["arrival"] + deadhead + pickup_at[r["request_id"]])
+                rides.append(dropoff_at[r["request_id"]] - pickup_at[r["request_id"]])
+                assigned.add(r["request_id"])
+            served += len(members)
+            pooled += len(members) if len(members) > 1 else 0
+        pending = [c for c in pending if c["request_id"] not in assigned]
+
+    return {
+        "n": served,
+        "served": served,
+        "unserved": dropped,
+        "pooled_share": round(pooled / served, 3) if served else 0.0,
+        "vehicle_minutes": round(vehicle_minutes, 1),
+        "vehicle_minutes_per_ride": round(vehicle_minutes / served, 2) if served else None,
+        "mean_wait_minutes": round(statistics.fmean(waits), 2) if waits else None,
+        "mean_ride_minutes": round(statistics.fmean(rides), 2) if rides else None,
+    }
+
+
+def run_fleet_sim(quick: bool = False, seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    from serving.dispatch import LOCATION_DATA, dispatch_algorithm
+
+    minutes = 120 if quick else 480
+    rng = random.Random(seed)
+    calls = make_calls(rng, LOCATION_DATA, minutes, per_minute=3.0)
+    names = list(LOCATION_DATA)
+    fleet_spec = [(f"sim-driver-{i}", rng.choice(names), rng.random() < 0.3) for i in range(60)]
+
+    results = {}
+    for mode, pooling in (("solo", False), ("pooled", True)):
+        fleet = [Vehicle(d, loc, wc) for d, loc, wc in fleet_spec]
+        results[f"fleet_sim[{mode}]"] = simulate(dispatch_algorithm, LOCATION_DATA, calls, fleet, pooling)
+    return results
+
+
+def format_fleet_sim(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'simulation':<24} {'served':>7} {'unserved':>9} {'pooled':>7} {'veh-min/ride':>13} "
+             f"{'wait':>7} {'ride':>7}"]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<24} {r['served']:>7} {r['unserved']:>9} {r['pooled_share']:>7.1%} "
+            f"{r['vehicle_minutes_per_ride'] or 0:>13.2f} {r['mean_wait_minutes'] or 0:>7.1f} "
+            f"{r['mean_ride_minutes'] or 0:>7.1f}"
+        )
+    solo, pooled = results.get("fleet_sim[solo]"), results.get("fleet_sim[pooled]")
+    if solo and pooled and solo["vehicle_minutes_per_ride"] and pooled["vehicle_minutes_per_ride"]:
+        change = pooled["vehicle_minutes_per_ride"] / solo["vehicle_minutes_per_ride"] - 1
+        lines.append(f"합승 모드 운행 1건당 차량 운행 분 변화: {change:+.1%}")
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+"""
+benchmarks/load.py
+ASGI 레벨 부하 테스트 (네트워크/서버 프로세스 없이 앱을 직접 호출)
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .report import summarize
+from .stubs import STUB_DISTRICTS, upstream_stubs
+
+
+def _dispatch_payload(rng: random.Random, idx: int) -> Dict[str, Any]:
+    return {
+        "request_id": f"load-{idx}",
+        "request_time": datetime.now(timezone.utc).isoformat(),
+        "call_request": {
+            "user_id": f"user-{idx}",
+            "pickup_location": rng.choice(STUB_DISTRICTS),
+            "destination": rng.choice(STUB_DISTRICTS),
+            "wheelchair": rng.random() < 0.5,
+        },
+        "available_drivers": [
+            {
+                "driver_id": f"driver-{i}",
+                "current_location": rng.choice(STUB_DISTRICTS),
+                "wheelchair_capable": rng.random() < 0.7,
+            }
+            for i in range(50)
+        ],
+        "weather": "맑음",
+    }
+
+
+# (이름, 메서드, 경로, 요청 본문 생성기)
+ENDPOINTS: List[Tuple[str, str, str, Optional[Callable[[random.Random, int], Any]]]] = [
+    ("POST /smart_dispatch/", "POST", "/smart_dispatch/", _dispatch_payload),
+    ("GET /mock/realtime", "GET", "/mock/realtime", None),
+    ("GET /v2/usage", "GET", "/v2/usage", None),
+    ("POST /ai/chat", "POST", "/ai/chat",
+     lambda rng, i: {"session_id": f"s-{i % 8}", "prompt": "강남에서 종로까지 얼마나 걸려요?"}),
+]
+
+
+async def _drive(client, method: str, path: str, body_fn, total: int, concurrency: int) -> Dict[str, Any]:
+    rng = random.Random(7)
+    samples: List[int] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for idx in counter:
+            body = body_fn(rng, idx) if body_fn else None
+            t0 = time.perf_counter_ns()
+            try:
+                resp = await client.request(method, path, json=body)
+                if resp.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            samples.append(time.perf_counter_ns() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(samples)
+    stats.update({
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+    })
+    return stats
+
+
+async def _run(total: int, concurrency: int, upstream_latency: float, use_stubs: bool) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from serving.api import app
+
+    results: Dict[str, Dict[str, Any]] = {}
+    # use_stubs=False 이면 UPSTREAM_MODE=replay 트랜스포트(녹화 응답)를 그대로 사용한다
+    stubs = upstream_stubs(latency=upstream_latency) if use_stubs else contextlib.nullcontext()
+    with stubs:
+        await app.router.startup()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for name, method, path, body_fn in ENDPOINTS:
+                    results[f"load {name}[c={concurrency}]"] = await _drive(
+                        client, method, path, body_fn, total, concurrency,
+                    )
+        finally:
+            await app.router.shutdown()
+    return results
+
+
+def run_load(
+    total: int = 200,
+    concurrency: int = 16,
+    upstream_latency: float = 0.02,
+    use_stubs: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    return asyncio.run(_run(total, concurrency, upstream_latency, use_stubs))
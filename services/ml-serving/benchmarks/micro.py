@@ -0,0 +1,152 @@
+"""
+benchmarks/micro.py
+핵심 함수 단위 마이크로벤치마크
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .report import summarize
+from .stubs import STUB_DISTRICTS, upstream_stubs
+
+FIXTURE_DIR = Path(__file__).resolve().parents[1]
+SEOUL_FIXTURES = [FIXTURE_DIR / "debug_response.html"]
+
+
+def bench(
+    fn: Callable[..., Any],
+    *,
+    setup: Optional[Callable[[], tuple]] = None,
+    repeat: int = 200,
+    warmup: int = 5,
+) -> Dict[str, float]:
+    """
+    fn(*setup()) 을 repeat 회 실행해 소요 시간 통계를 반환한다.
+    setup 은 측정 구간에서 제외된다.
+    """
+    for _ in range(warmup):
+        fn(*(setup() if setup else ()))
+    samples = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        t0 = time.perf_counter_ns()
+        fn(*args)
+        samples.append(time.perf_counter_ns() - t0)
+    return summarize(samples)
+
+
+def bench_async(coro_fn: Callable[..., Any], *, setup=None, repeat: int = 200, warmup: int = 5):
+    loop = asyncio.new_event_loop()
+    try:
+        return bench(
+            lambda *a: loop.run_until_complete(coro_fn(*a)),
+            setup=setup, repeat=repeat, warmup=warmup,
+        )
+    finally:
+        loop.close()
+
+
+# ────────────────────────────────────────────────
+# 입력 생성
+# ────────────────────────────────────────────────
+def make_request(rng: random.Random, idx: int = 0, wheelchair: Optional[bool] = None) -> Dict[str, Any]:
+    return {
+        "request_id": f"bench-{idx}",
+        "request_time": datetime.now(timezone.utc) - timedelta(minutes=rng.randint(0, 20)),
+        "user_id": f"user-{idx}",
+        "pickup_location": rng.choice(STUB_DISTRICTS),
+        "destination": rng.choice(STUB_DISTRICTS),
+        "wheelchair": rng.random() < 0.5 if wheelchair is None else wheelchair,
+        "destination_type": rng.choice(["general", "hospital", "pharmacy"]),
+        "medical_appointment": False,
+        "weather": rng.choice(["맑음", "흐림", "비", "눈"]),
+    }
+
+
+def make_drivers(rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "driver_id": f"driver-{i}",
+            "current_location": rng.choice(STUB_DISTRICTS),
+            "wheelchair_capable": rng.random() < 0.7,
+            "specialty_areas": [],
+        }
+        for i in range(n)
+    ]
+
+
+# ────────────────────────────────────────────────
+# 벤치마크 케이스
+# ────────────────────────────────────────────────
+def run_micro(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    from serving.core.ml_model import predict_waiting_time_from_request
+    from serving.core.seoul_api import _parse_table
+    from serving.dispatch import dispatch_algorithm
+    from serving.routers.mock import compute_priority_scores, generate_personas
+
+    rng = random.Random(42)
+    repeat = 20 if quick else 200
+    results: Dict[str, Dict[str, float]] = {}
+
+    with upstream_stubs():
+        # 1) 실시간 콜 우선순위 점수
+        for n in (200, 2000):
+            personas = generate_personas(n)
+            results[f"compute_priority_scores[n={n}]"] = bench(
+                compute_priority_scores,
+                setup=lambda p=personas: (copy.deepcopy(p),),
+                repeat=max(repeat // 4, 5),
+            )
+
+        # 2) 이동시간 추정
+        results["estimate_real_travel_time"] = bench(
+            lambda: dispatch_algorithm.estimate_real_travel_time("강남", "종로", "비"),
+            repeat=repeat * 10,
+        )
+
+        # 3) 대기시간 예측 (XGBoost 단건)
+        model, le_loc, le_weather = dispatch_algorithm.wait_model, dispatch_algorithm.le_loc, dispatch_algorithm.le_weather
+        results["predict_waiting_time_from_request"] = bench(
+            lambda: predict_waiting_time_from_request(
+                model, le_loc, le_weather,
+                {"pickup_location": "강남", "weather": "비", "wheelchair": True,
+                 "num_vehicles": 10, "num_users": 20},
+                default_hour=9,
+            ),
+            repeat=repeat,
+        )
+
+        # 4) 동적 배차 (운전자 수별)
+        for n in (10, 100, 1000):
+            drivers = make_drivers(rng, n)
+            results[f"dynamic_dispatch[drivers={n}]"] = bench_async(
+                dispatch_algorithm.dynamic_dispatch,
+                setup=lambda d=drivers: (make_request(rng), copy.deepcopy(d)),
+                repeat=max(repeat // (10 if n >= 1000 else 4), 3),
+                warmup=1,
+            )
+
+        # 5) 일괄 최적화 (요청 수별)
+        for n in (100, 1000):
+            reqs = [make_request(rng, i) for i in range(n)]
+            driver_ids = [d["driver_id"] for d in make_drivers(rng, n * 2)]
+            results[f"global_optimization[requests={n}]"] = bench(
+                lambda r=reqs, d=driver_ids: dispatch_algorithm.global_optimization(r, d),
+                repeat=repeat,
+            )
+
+        # 6) 서울시 응답 표 파싱 (녹화된 응답)
+        for fixture in SEOUL_FIXTURES:
+            if fixture.exists():
+                content = fixture.read_bytes()
+                results[f"seoul_api._parse_table[{fixture.name}]"] = bench(
+                    _parse_table, setup=lambda c=content: (c,), repeat=max(repeat // 4, 5),
+                )
+
+    return results
@@ -0,0 +1,118 @@
+"""
+benchmarks/report.py
+벤치마크 결과 JSON 저장 및 기준 결과와의 회귀 비교
+"""
+from __future__ import annotations
+
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# 비교 대상 지표 (값이 클수록 나쁜 지표만)
+COMPARED_METRICS = ("p50_us", "p95_us", "mean_us", "vehicle_minutes_per_ride")
+
+
+def summarize(samples_ns: Sequence[int]) -> Dict[str, float]:
+    """나노초 샘플 → 마이크로초 단위 통계"""
+    if not samples_ns:
+        return {"n": 0}
+    us = sorted(s / 1000 for s in samples_ns)
+
+    def pct(p: float) -> float:
+        idx = min(len(us) - 1, max(0, math.ceil(p / 100 * len(us)) - 1))
+        return round(us[idx], 3)
+
+    return {
+        "n": len(us),
+        "mean_us": round(statistics.fmean(us), 3),
+        "min_us": round(us[0], 3),
+        "p50_us": pct(50),
+        "p95_us": pct(95),
+        "p99_us": pct(99),
+        "max_us": round(us[-1], 3),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=Path(__file__).resolve().parent,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def save_results(results: Dict[str, Dict[str, Any]], path: Optional[Path] = None) -> Path:
+    """결과를 메타데이터와 함께 JSON 으로 저장하고 경로를 반환"""
+    if path is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "unix_time": time.time(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))["results"]
+
+
+def compare_results(
+    current: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = 0.15,
+) -> List[Dict[str, Any]]:
+    """
+    기준 대비 threshold(비율) 이상 느려진 항목 목록을 반환한다.
+    """
+    regressions = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in COMPARED_METRICS:
+            b, c = base.get(metric), cur.get(metric)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            if change > threshold:
+                regressions.append({
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": b,
+                    "current": c,
+                    "change": round(change, 3),
+                })
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<48} {'n':>6} {'p50(us)':>12} {'p95(us)':>12} {'rps':>10}"]
+    for name, r in results.items():
+        rps = r.get("throughput_rps")
+        lines.append(
+            f"{name:<48} {r.get('n', 0):>6} {r.get('p50_us', 0):>12.1f} "
+            f"{r.get('p95_us', 0):>12.1f} {'' if rps is None else f'{rps:>10.1f}'}"
+        )
+    return "\n".join(lines)
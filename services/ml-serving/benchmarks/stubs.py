@@ -0,0 +1,130 @@
+"""
+benchmarks/stubs.py
+Tmap / 서울시 / Gemini 업스트림을 로컬 스텁으로 대체한다.
+
+라우터들은 `from ..core.x import f` 로 함수를 직접 바인딩하므로
+정의 모듈뿐 아니라 바인딩한 모듈의 이름까지 모두 교체한다.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# seoul_api / tmap_api / gemini_service 는 호출 시점에 환경 변수를 요구한다
+for _key in ("CALLTAXI_USAGE_KEY", "CALLTAXI_DEST_KEY", "TMAP_API_KEY", "GEMINI_API_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+
+STUB_DISTRICTS = ["강남", "종로", "노원", "송파", "영등포", "성동", "강서", "마포", "서초", "중구"]
+
+
+# ────────────────────────────────────────────────
+# 스텁 데이터
+# ────────────────────────────────────────────────
+def stub_usage_frame(date: str = "20250131"):
+    """fetch_daily_usage_data 와 같은 컬럼을 가진 일 통계 표"""
+    import pandas as pd
+    from serving.core.seoul_api import EXPECTED_USAGE_COLS
+
+    rng = random.Random(date)
+    rows = [
+        [date, rng.randint(400, 600), rng.randint(3000, 4500), rng.randint(2800, 4200),
+         round(rng.uniform(20, 60), 1), rng.randint(2000, 4000), round(rng.uniform(5, 12), 1)]
+        for _ in range(24)
+    ]
+    return pd.DataFrame(rows, columns=EXPECTED_USAGE_COLS)
+
+
+def stub_location_frame(date: str = "20250131"):
+    """estimate_usage_stats 가 쓰는 출발지별 운행/콜 표"""
+    import pandas as pd
+
+    rng = random.Random(date)
+    rows = [
+        [f"서울특별시 {gu if gu.endswith('구') else gu + '구'}", rng.randint(5, 40), rng.randint(10, 80)]
+        for gu in STUB_DISTRICTS
+    ]
+    return pd.DataFrame(rows, columns=["출발지", "운행건수", "콜수"])
+
+
+# ────────────────────────────────────────────────
+# 스텁 함수
+# ────────────────────────────────────────────────
+def make_stubs(latency: float = 0.0) -> Dict[str, Callable]:
+    """
+    latency(초) 만큼 대기 후 고정 응답을 돌려주는 스텁 함수 묶음
+    """
+    async def _sleep():
+        if latency:
+            await asyncio.sleep(latency)
+
+    async def fetch_daily_usage_data(date: str):
+        await _sleep()
+        return stub_usage_frame(date)
+
+    def fetch_daily_usage_data_sync(date: str):
+        return stub_location_frame(date)
+
+    async def get_tmap_travel_time(start_lng, start_lat, end_lng, end_lat) -> int:
+        await _sleep()
+        return 600 + int(abs(end_lng - start_lng) * 1e4 + abs(end_lat - start_lat) * 1e4)
+
+    async def ask_gemini_model(prompt: str) -> str:
+        await _sleep()
+        return "23.5"
+
+    return {
+        "fetch_daily_usage_data": fetch_daily_usage_data,
+        "fetch_daily_usage_data_sync": fetch_daily_usage_data_sync,
+        "get_tmap_travel_time": get_tmap_travel_time,
+        "ask_gemini_model": ask_gemini_model,
+    }
+
+
+PATCH_TARGETS: Dict[str, List[str]] = {
+    "fetch_daily_usage_data": [
+        "serving.core.seoul_api",
+        "serving.routers.usage",
+        "serving.dispatch",
+        "serving.analysis",
+    ],
+    "fetch_daily_usage_data_sync": ["serving.core.public_api"],
+    "get_tmap_travel_time": [
+        "serving.core.tmap_api",
+        "serving.routers.usage",
+        "serving.routers.ai_chat",
+        "serving.routers.destinations",
+    ],
+    "ask_gemini_model": [
+        "serving.core.gemini_service",
+        "serving.routers.usage",
+        "serving.routers.ai_chat",
+    ],
+}
+
+
+@contextmanager
+def upstream_stubs(latency: float = 0.0) -> Iterator[None]:
+    """
+    with upstream_stubs(latency=0.05):
+        ...  # 이 블록 안에서는 외부 API 호출이 로컬 스텁으로 대체된다
+    """
+    import serving.api  # noqa: F401  (라우터 모듈을 먼저 로드해 둔다)
+
+    stubs = make_stubs(latency)
+    originals: List[Tuple[object, str, object]] = []
+    for name, modules in PATCH_TARGETS.items():
+        for mod_name in modules:
+            module = sys.modules.get(mod_name)
+            if module is None or not hasattr(module, name):
+                continue
+            originals.append((module, name, getattr(module, name)))
+            setattr(module, name, stubs[name])
+    try:
+        yield
+    finally:
+        for module, name, original in reversed(originals):
+            setattr(module, name, original)
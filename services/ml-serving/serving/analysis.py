@@ -1,43 +1,49 @@
-from datetime import datetime
-import pandas as pd
+from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
-from .api import fetch_daily_usage_data
-from .utils import get_public_transit_alternatives
+from .core.seoul_api import fetch_usage_location_table
+from .core.usage_cube import usage_cube
+from .core.transit_service import taxi_estimate, transit_service
+from .core import execution
 
-async def analyze_dispatch_times(location: str, date: str = None) -> Dict:
+async def analyze_dispatch_times(location: str, date: str = None, days: int = 1) -> Dict:
     """
     특정 지역의 콜택시 배차 시간과 대중교통 시간을 비교 분석
+    date 부터 거슬러 days 일을 합산 (집계 큐브 슬라이스 + 합산)
     """
     if not date:
         date = datetime.now().strftime("%Y%m%d")
-    
-    # 1. 콜택시 데이터 가져오기
-    df = await fetch_daily_usage_data(date)
-    location_data = df[df["출발지"].str.contains(location)]
-    
-    # 2. 기본 통계 계산
-    stats = {
-        "평균_대기시간": float(location_data["평균대기시간"].mean()),
-        "최소_대기시간": float(location_data["평균대기시간"].min()),
-        "최대_대기시간": float(location_data["평균대기시간"].max()),
-        "총_호출건수": int(location_data["접수건"].sum()),
-        "성공_배차건수": int(location_data["탑승건"].sum())
-    }
-    
-    # 3. 시간대별 분석
-    hourly_stats = location_data.groupby("시간대").agg({
-        "평균대기시간": "mean",
-        "접수건": "sum",
-        "탑승건": "sum"
-    }).to_dict()
-    
+    dates = [
+        (datetime.strptime(date, "%Y%m%d") - timedelta(days=i)).strftime("%Y%m%d")
+        for i in range(max(days, 1))
+    ]
+
+    # 1. 큐브에 없는 날짜만 받아서 적재
+    for d in dates:
+        await ensure_ingested(d)
+
+    # 2~3. 통계/시간대별 집계
+    stats, hourly_stats = usage_cube.location_summary(location, dates)
+
     return {
         "위치": location,
         "날짜": date,
+        "기간_일수": len(dates),
         "기본통계": stats,
         "시간대별통계": hourly_stats
     }
 
+async def ensure_ingested(date: str):
+    """date 가 큐브에 없으면 사용량 표를 받아 해당 날짜 면만 계산해 추가"""
+    if date in usage_cube:
+        return
+    await ingest_usage_date(date)
+
+async def ingest_usage_date(date: str) -> Dict:
+    """데이터 적재 시점 호출: date 면을 (다시) 계산해 큐브에 반영"""
+    table = await fetch_usage_location_table(date)
+    await execution.run("analysis.aggregate", usage_cube.ingest, date, table)
+    return usage_cube.stats()
+
 async def compare_with_public_transit(
     start_location: str,
     end_location: str,
@@ -47,24 +53,21 @@ async def compare_with_public_transit(
     """
     콜택시와 대중교통 소요시간 비교
     """
-    # 1. 콜택시 평균 대기 + 이동시간
+    # 1. 콜택시 평균 대기 (집계 큐브)
     taxi_analysis = await analyze_dispatch_times(start_location)
-    avg_wait_time = taxi_analysis["기본통계"]["평균_대기시간"]
-    
-    # 2. 대중교통 경로 조회
-    transit_info = await get_public_transit_alternatives(
-        start_lat=start_coords[0],
-        start_lng=start_coords[1],
-        end_lat=end_coords[0],
-        end_lng=end_coords[1]
-    )
-    
+    avg_wait_time = taxi_analysis["기본통계"]["평균_대기시간"] or 0
+
+    # 2. 대중교통 경로 조회 (격자·시간대 캐시)
+    transit_info = await transit_service.route(start_coords, end_coords)
+    taxi = taxi_estimate(start_coords, end_coords)
+
     return {
         "출발지": start_location,
         "도착지": end_location,
         "콜택시_예상시간": {
             "대기시간": avg_wait_time,
-            "총소요시간": avg_wait_time + (transit_info.get("예상소요시간", 0) if transit_info else 0)
+            "이동시간": taxi["이동시간"],
+            "총소요시간": round(avg_wait_time + taxi["이동시간"], 1)
         },
         "대중교통_정보": transit_info
-    }
\ No newline at end of file
+    }
@@ -1,10 +1,22 @@
+import asyncio
+import logging
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
+from serving.core.cache import init_cache
+from serving.core import execution, startup as startup_budget
+from serving.core.ml_model import get_model_assets
+from serving.core.scheduler import WARMUP_ENABLED, scheduler
 
 # 라우터 import (serving/routers/ 폴더에 있는 라우터들)
-from serving.routers import usage, mock, ai_chat
+from serving.routers import usage, mock, ai_chat, destinations, system, health, transit
+from serving import dispatch
+from serving.warmup import register_jobs
+
+logger = logging.getLogger(__name__)
 
 # ---------------------------
 # FastAPI 앱 생성
@@ -33,13 +45,56 @@ app.add_middleware(
 # ---------------------------
 @app.on_event("startup")
 async def startup():
-    FastAPICache.init(InMemoryBackend())
+    # 워커 간 공유 캐시 (serving/core/cache.py)
+    init_cache()
+
+    # 모델 적재는 import 가 아니라 여기서 (MODEL_PRELOAD, serving/core/startup.py)
+    #   background: 포트를 먼저 열고 적재 — 끝날 때까지 /readyz 는 503
+    #   eager     : 적재가 끝난 뒤 요청 수신
+    #   lazy      : 첫 예측 요청에서 적재 (/readyz 는 바로 ready)
+    mode = startup_budget.MODEL_PRELOAD
+    if mode == "lazy":
+        startup_budget.readiness.register("model", required=False)
+    else:
+        task = asyncio.get_running_loop().run_in_executor(None, get_model_assets)
+        if mode == "eager":
+            await task
+        else:
+            task.add_done_callback(
+                lambda f: f.exception() and logger.error("모델 백그라운드 적재 실패: %s", f.exception())
+            )
+
+    # 워밍업 + 주기 갱신 (serving/warmup.py, 상태는 /system/refresh)
+    if WARMUP_ENABLED:
+        register_jobs(scheduler, app).start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await scheduler.stop()
+    execution.shutdown(wait=False)
 
 # ---------------------------
 # 라우터 등록
 # ---------------------------
+# 헬스체크 (런처 워밍업 / 오케스트레이터 liveness)
+app.include_router(health.router)
+
 # 실제 서울시 데이터 기반 API
 app.include_router(usage.router, prefix="/v2")        # 통계용 API
+app.include_router(destinations.router, prefix="/v2") # 인기 목적지 + ETA
 
 # 더미(Mock) 데이터용 API (동적 랜덤 생성)
 app.include_router(mock.router, prefix="/mock")
+
+# 스마트 배차 API
+app.include_router(dispatch.router)
+
+# 콜택시 vs 대중교통 비교 API
+app.include_router(transit.router, prefix="/transit")
+
+# 운영용 API (캐시 통계/무효화 등)
+app.include_router(system.router, prefix="/system")
+
+startup_budget.timings["import serving.api"] = time.perf_counter() - _import_started
+
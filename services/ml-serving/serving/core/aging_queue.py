@@ -0,0 +1,173 @@
+# serving/core/aging_queue.py
+"""
+대기 요청용 aging 우선순위 큐
+
+긴급도는 대기 시간에 따라 지수적으로 증가한다.
+
+    urgency(t) = M · (10 · e^{(t − t0)/τ} + A)
+               = M·A + e^{ln(10·M) − t0/τ + t/τ}
+
+    t0 : 요청 시각, τ : 15분, A : 휠체어/진료 가산점, M : 목적지·날씨 등 배수
+
+가산항 base = M·A 가 같은 요청끼리는 offset = ln(10·M) − t0/τ 의 대소가
+시간이 흘러도 바뀌지 않는다. 따라서 base 별로 offset max-heap 을 두고,
+매 틱마다 모든 점수를 다시 계산하는 대신 힙의 머리들만 현재 시각으로 비교한다.
+base 의 종류는 (가산점 × 배수 조합) 수십 개 이하로 작다.
+
+  push / cancel / pop_most_urgent : O(log n + G)   (G = base 그룹 수)
+  pop_above(threshold)            : O(G + k log n) (k = 꺼낸 요청 수)
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+AGING_TAU_MINUTES = 15.0
+BASE_WEIGHT = 10.0
+
+Timestamp = Union[float, datetime]
+
+
+def _to_epoch(t: Optional[Timestamp]) -> float:
+    if t is None:
+        return time.time()
+    if isinstance(t, datetime):
+        return t.timestamp()
+    return float(t)
+
+
+class AgingPriorityQueue:
+    def __init__(self, tau_minutes: float = AGING_TAU_MINUTES, weight: float = BASE_WEIGHT):
+        self.tau = tau_minutes * 60.0  # 초 단위
+        self.weight = weight
+        # 부동소수 정밀도를 위해 큐 생성 시각을 기준으로 상대 시간 사용
+        self.epoch = time.time()
+        self._groups: Dict[float, List[list]] = {}
+        self._entries: Dict[Hashable, list] = {}
+        self._seq = itertools.count()
+        self._removed = 0
+
+    # ── 내부 ─────────────────────────────────────────────────
+    def _offset(self, request_time: float, multiplier: float) -> float:
+        return math.log(self.weight * multiplier) - (request_time - self.epoch) / self.tau
+
+    def _value(self, base: float, offset: float, now: float) -> float:
+        return base + math.exp(offset + (now - self.epoch) / self.tau)
+
+    def _head(self, base: float) -> Optional[list]:
+        heap = self._groups[base]
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+            self._removed -= 1
+        if not heap:
+            del self._groups[base]
+            return None
+        return heap[0]
+
+    def _heads(self) -> Iterator[Tuple[float, list]]:
+        for base in list(self._groups):
+            head = self._head(base)
+            if head is not None:
+                yield base, head
+
+    def _take(self, base: float) -> Tuple[Hashable, Any]:
+        entry = heapq.heappop(self._groups[base])
+        item_id = entry[2]
+        del self._entries[item_id]
+        if not self._groups[base]:
+            del self._groups[base]
+        return item_id, entry[3]
+
+    # ── 공개 API ─────────────────────────────────────────────
+    def push(
+        self,
+        item_id: Hashable,
+        request_time: Timestamp,
+        multiplier: float = 1.0,
+        additive: float = 0.0,
+        payload: Any = None,
+    ):
+        """같은 item_id 가 있으면 교체"""
+        if item_id in self._entries:
+            self.cancel(item_id)
+        multiplier = max(multiplier, 1e-12)
+        base = round(multiplier * additive, 9)
+        offset = self._offset(_to_epoch(request_time), multiplier)
+        # [−offset, 순번, id, payload, base]  (heapq 는 min-heap)
+        entry = [-offset, next(self._seq), item_id, payload, base]
+        heapq.heappush(self._groups.setdefault(base, []), entry)
+        self._entries[item_id] = entry
+
+    def cancel(self, item_id: Hashable) -> bool:
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return False
+        entry[2] = None  # 지연 삭제
+        self._removed += 1
+        if self._removed > 64 and self._removed > len(self._entries):
+            self._compact()
+        return True
+
+    def urgency(self, item_id: Hashable, now: Optional[Timestamp] = None) -> Optional[float]:
+        entry = self._entries.get(item_id)
+        if entry is None:
+            return None
+        return self._value(entry[4], -entry[0], _to_epoch(now))
+
+    def peek_most_urgent(self, now: Optional[Timestamp] = None) -> Optional[Tuple[Hashable, float, Any]]:
+        t = _to_epoch(now)
+        best = None
+        for base, head in self._heads():
+            value = self._value(base, -head[0], t)
+            if best is None or value > best[1]:
+                best = (head[2], value, head[3])
+        return best
+
+    def pop_most_urgent(self, now: Optional[Timestamp] = None) -> Optional[Tuple[Hashable, float, Any]]:
+        best = self.peek_most_urgent(now)
+        if best is None:
+            return None
+        entry = self._entries[best[0]]
+        self._take(entry[4])
+        return best
+
+    def pop_above(self, threshold: float, now: Optional[Timestamp] = None) -> List[Tuple[Hashable, float, Any]]:
+        """현재 긴급도가 threshold 를 넘는 요청을 모두 꺼낸다 (긴급도 내림차순)"""
+        t = _to_epoch(now)
+        out = []
+        for base in list(self._groups):
+            while True:
+                head = self._head(base)
+                if head is None:
+                    break
+                value = self._value(base, -head[0], t)
+                if value <= threshold:
+                    break
+                item_id, payload = self._take(base)
+                out.append((item_id, value, payload))
+        out.sort(key=lambda x: -x[1])
+        return out
+
+    def _compact(self):
+        for base in list(self._groups):
+            heap = [e for e in self._groups[base] if e[2] is not None]
+            if heap:
+                heapq.heapify(heap)
+                self._groups[base] = heap
+            else:
+                del self._groups[base]
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._entries
+
+    @property
+    def group_count(self) -> int:
+        return len(self._groups)
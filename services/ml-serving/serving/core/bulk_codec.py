@@ -0,0 +1,226 @@
+"""
+대량 배차 요청용 열 단위 입력 형식
+
+/batch_optimize/ 는 List[DispatchRequest] 를 받아 요청마다 들어 있는 available_drivers 를
+pydantic 이 요청 수만큼 반복 검증한다. 대량 API 는 차량 표 하나 + 요청 표 하나를 받는다.
+
+    {
+      "weather": "맑음",
+      "drivers":  {"columns": [...], "data": {"driver_id": [...], "current_location": [...], ...}},
+      "requests": {"columns": [...], "data": {"request_id": [...], "pickup_location": [...], ...}}
+    }
+
+- Content-Type: application/json (orjson 이 있으면 사용) 또는 application/msgpack (msgpack 설치 시)
+- "data" 는 열 → 값 목록. 각 표는 {"data": ...} 없이 열 dict 만 보내도 된다.
+- 검증은 행 단위 객체를 만들지 않고 열 단위(pandas/numpy)로 한 번에 하고,
+  오류는 열별로 모아 422 로 돌려준다 (행 번호는 앞쪽 몇 개만).
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:  # 선택 의존성: 없으면 application/msgpack 은 415
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+MAX_ERROR_ROWS = 5
+
+
+@dataclass(frozen=True)
+class Column:
+    kind: str              # str / bool / float / datetime
+    required: bool = True
+    default: Any = None
+    lo: Optional[float] = None
+    hi: Optional[float] = None
+
+
+DRIVER_COLUMNS: Dict[str, Column] = {
+    "driver_id": Column("str"),
+    "current_location": Column("str", required=False),
+    "wheelchair_capable": Column("bool", required=False, default=False),
+    "status": Column("str", required=False, default="available"),
+    "lat": Column("float", required=False, lo=-90, hi=90),
+    "lon": Column("float", required=False, lo=-180, hi=180),
+}
+
+REQUEST_COLUMNS: Dict[str, Column] = {
+    "request_id": Column("str"),
+    "user_id": Column("str"),
+    "pickup_location": Column("str"),
+    "destination": Column("str"),
+    "request_time": Column("datetime"),
+    "wheelchair": Column("bool", required=False, default=False),
+    "destination_type": Column("str", required=False, default="general"),
+    "medical_appointment": Column("bool", required=False, default=False),
+    "pickup_lat": Column("float", required=False, lo=-90, hi=90),
+    "pickup_lon": Column("float", required=False, lo=-180, hi=180),
+}
+
+
+class BulkPayloadError(HTTPException):
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(status_code=422, detail=errors)
+
+
+def decode_body(body: bytes, content_type: Optional[str]) -> Dict[str, Any]:
+    content_type = (content_type or "application/json").split(";")[0].strip().lower()
+    try:
+        if content_type in MSGPACK_TYPES:
+            if msgpack is None:
+                raise HTTPException(status_code=415, detail="msgpack 이 설치되지 않았습니다")
+            payload = msgpack.unpackb(body, raw=False)
+        elif content_type == "application/json":
+            payload = orjson.loads(body) if orjson is not None else json.loads(body)
+        else:
+            raise HTTPException(status_code=415, detail=f"지원하지 않는 Content-Type: {content_type}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"본문 디코딩 실패: {e}")
+    if not isinstance(payload, dict):
+        raise BulkPayloadError([{"loc": ["body"], "msg": "객체여야 합니다"}])
+    return payload
+
+
+def _rows(mask: np.ndarray) -> List[int]:
+    return np.flatnonzero(mask)[:MAX_ERROR_ROWS].tolist()
+
+
+def _as_frame(name: str, table: Any, errors: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    data = table.get("data", table) if isinstance(table, dict) else None
+    if not isinstance(data, dict):
+        errors.append({"loc": [name], "msg": "열 이름 → 값 목록 형태여야 합니다"})
+        return None
+    lengths = {col: len(values) for col, values in data.items() if isinstance(values, list)}
+    if len(lengths) != len(data):
+        errors.append({"loc": [name], "msg": "모든 열은 목록이어야 합니다"})
+        return None
+    if len(set(lengths.values())) > 1:
+        errors.append({"loc": [name], "msg": f"열 길이가 다릅니다: {lengths}"})
+        return None
+    return pd.DataFrame(data)
+
+
+def validate_table(name: str, table: Any, schema: Dict[str, Column], key: str,
+                   errors: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """열 단위 검증 + 타입 변환, 문제는 errors 에 누적"""
+    df = _as_frame(name, table, errors)
+    if df is None:
+        return None
+    before = len(errors)
+    out = {}
+    n = len(df)
+    for col, spec in schema.items():
+        if col not in df.columns:
+            if spec.required:
+                errors.append({"loc": [name, col], "msg": "필수 열이 없습니다"})
+            else:
+                out[col] = np.full(n, np.nan if spec.kind == "float" else spec.default, dtype=object)
+            continue
+        raw = df[col]
+        missing = raw.isna().to_numpy()
+        if spec.required and missing.any():
+            errors.append({"loc": [name, col], "msg": "빈 값", "rows": _rows(missing)})
+            continue
+
+        if spec.kind == "str":
+            values = raw.where(~missing, spec.default)
+            values = values.map(lambda v: v if v is None or isinstance(v, str) else str(v))
+        elif spec.kind == "bool":
+            filled = raw.where(~missing, spec.default if spec.default is not None else False)
+            bad = ~filled.isin([True, False, 0, 1])
+            if bad.any():
+                errors.append({"loc": [name, col], "msg": "true/false 또는 0/1", "rows": _rows(bad.to_numpy())})
+                continue
+            values = filled.astype(bool)
+        elif spec.kind == "float":
+            values = pd.to_numeric(raw, errors="coerce")
+            bad = values.isna().to_numpy() & ~missing
+            if spec.lo is not None:
+                bad |= (values < spec.lo).to_numpy() | (values > spec.hi).to_numpy()
+            if bad.any():
+                errors.append({"loc": [name, col], "msg": f"숫자 범위 [{spec.lo}, {spec.hi}]", "rows": _rows(bad)})
+                continue
+        else:  # datetime
+            values = pd.to_datetime(raw, errors="coerce")
+            bad = values.isna().to_numpy() & ~missing
+            if bad.any():
+                errors.append({"loc": [name, col], "msg": "ISO 8601 시각", "rows": _rows(bad)})
+                continue
+            if getattr(values.dt, "tz", None) is not None:
+                values = values.dt.tz_convert(None)
+        out[col] = values.to_numpy() if isinstance(values, pd.Series) else values
+
+    if len(errors) > before:
+        return None
+    frame = pd.DataFrame(out)
+    duplicated = frame[key].duplicated().to_numpy()
+    if duplicated.any():
+        errors.append({"loc": [name, key], "msg": "중복 ID", "rows": _rows(duplicated)})
+        return None
+    return frame
+
+
+def parse_bulk_payload(payload: Dict[str, Any], known_locations) -> Tuple[pd.DataFrame, pd.DataFrame, str]:
+    """
+    (drivers, requests, weather) — 위치는 known_locations(지역명) 이거나 좌표가 있어야 한다
+    """
+    errors: List[Dict[str, Any]] = []
+    drivers = validate_table("drivers", payload.get("drivers"), DRIVER_COLUMNS, "driver_id", errors)
+    requests = validate_table("requests", payload.get("requests"), REQUEST_COLUMNS, "request_id", errors)
+    weather = payload.get("weather", "맑음")
+    if not isinstance(weather, str):
+        errors.append({"loc": ["weather"], "msg": "문자열이어야 합니다"})
+
+    known = list(known_locations)
+    if drivers is not None:
+        located = drivers["current_location"].isin(known) | (drivers["lat"].notna() & drivers["lon"].notna())
+        if not located.all():
+            errors.append({"loc": ["drivers", "current_location"], "msg": "알 수 없는 지역이고 좌표도 없습니다",
+                           "rows": _rows(~located.to_numpy())})
+    if requests is not None:
+        # 이동시간 보정과 목적지 밀도 점수에 지역명이 필요하다
+        for col in ("pickup_location", "destination"):
+            unknown = ~requests[col].isin(known)
+            if unknown.any():
+                errors.append({"loc": ["requests", col], "msg": "알 수 없는 지역", "rows": _rows(unknown.to_numpy())})
+
+    if errors:
+        raise BulkPayloadError(errors)
+    return drivers, requests, weather
+
+
+def nearest_candidates(req_lat: np.ndarray, req_lon: np.ndarray, req_wheelchair: np.ndarray,
+                       drv_lat: np.ndarray, drv_lon: np.ndarray, drv_wheelchair: np.ndarray,
+                       k: int, chunk: int = 256) -> List[np.ndarray]:
+    """
+    요청별 가까운 적합 차량 k 대의 인덱스 (요청 × 차량 근사 거리 행렬을 chunk 행씩 계산)
+    """
+    if drv_lat.size == 0:
+        return [np.empty(0, dtype=np.intp) for _ in range(req_lat.size)]
+    k = min(k, drv_lat.size)
+    cos_lat = np.cos(np.radians(req_lat))
+    result: List[np.ndarray] = []
+    for start in range(0, req_lat.size, chunk):
+        sl = slice(start, start + chunk)
+        d2 = (req_lat[sl, None] - drv_lat[None, :]) ** 2 + \
+             ((req_lon[sl, None] - drv_lon[None, :]) * cos_lat[sl, None]) ** 2
+        d2[req_wheelchair[sl, None] & ~drv_wheelchair[None, :]] = np.inf
+        part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        for row, idx in zip(d2, part):
+            result.append(idx[np.isfinite(row[idx])])
+    return result
@@ -0,0 +1,304 @@
+# serving/core/cache.py
+"""
+워커 간 공유 캐시 계층 (fastapi-cache2 백엔드)
+
+- 같은 호스트의 uvicorn 워커들이 /dev/shm 위의 SQLite 파일 하나를 공유한다.
+  (공유 메모리 파일시스템이므로 디스크 I/O 없이 프로세스 간 공유)
+- 라우트별 캐시 정책(CACHE_POLICIES): 만료 시간, 쿼리 파라미터 정규화, 태그
+- 태그 단위 무효화: 데이터 파이프라인이 새 날짜를 적재하면 date:/month: 태그 삭제
+- 네임스페이스별 hit/miss 카운터 (모든 워커 합산)
+- sqlite3 호출은 동기(잠금 대기 최대 5초)이므로 Backend 메서드는 asyncio.to_thread 로 실행한다
+  (연결은 스레드별로 열린다)
+
+환경 변수
+---------
+CACHE_DB_PATH  공유 캐시 파일 경로 (기본: /dev/shm/equal_taxi_cache.sqlite)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi_cache.backends import Backend
+
+from ..constants import DEFAULT_DATE
+from .responses import ResponseCoder
+
+logger = logging.getLogger(__name__)
+
+KEY_SEP = "|"
+
+
+def default_cache_path() -> Path:
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() else Path(tempfile.gettempdir())
+    return Path(os.getenv("CACHE_DB_PATH", str(base / "equal_taxi_cache.sqlite")))
+
+
+# ────────────────────────────────────────────────────────────────
+# 공유 메모리 SQLite 백엔드
+# ────────────────────────────────────────────────────────────────
+class SharedMemoryBackend(Backend):
+    """
+    키 형식: "<prefix>:<namespace>|<tag1,tag2>|<digest>"
+    (normalized_key_builder 가 생성하며, set 시 태그 색인을 함께 기록한다)
+    """
+
+    PURGE_EVERY = 256  # set 호출 N회마다 만료 항목 정리
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_cache_path())
+        self._local = threading.local()
+        self._sets = 0
+
+    # 포크 이후 자식 프로세스는 자기 연결을 새로 연다
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY, value BLOB, expires_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT, key TEXT, PRIMARY KEY (tag, key)
+                );
+                CREATE TABLE IF NOT EXISTS cache_stats (
+                    namespace TEXT PRIMARY KEY, hits INTEGER DEFAULT 0, misses INTEGER DEFAULT 0
+                );
+                """
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _split(key: str) -> Tuple[str, List[str]]:
+        parts = key.split(KEY_SEP)
+        namespace = parts[0]
+        tags = [t for t in parts[1].split(",") if t] if len(parts) == 3 else []
+        return namespace, tags
+
+    def _count(self, key: str, hit: bool):
+        namespace, _ = self._split(key)
+        column = "hits" if hit else "misses"
+        self._conn().execute(
+            f"INSERT INTO cache_stats (namespace, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(namespace) DO UPDATE SET {column} = {column} + 1",
+            (namespace,),
+        )
+
+    def _lookup(self, key: str) -> Tuple[int, Optional[bytes]]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self._count(key, hit=False)
+            return 0, None
+        self._count(key, hit=True)
+        ttl = -1 if row[1] is None else int(row[1] - now)
+        return ttl, row[0]
+
+    # ── fastapi-cache Backend 인터페이스 ─────────────────────────
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        return await asyncio.to_thread(self._lookup, key)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await asyncio.to_thread(self._lookup, key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        self._sets += 1
+        await asyncio.to_thread(self._store, key, value, expire, self._sets % self.PURGE_EVERY == 0)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self._clear, namespace, key)
+
+    def _store(self, key: str, value: bytes, expire: Optional[int], purge: bool):
+        conn = self._conn()
+        expires_at = time.time() + expire if expire else None
+        _, tags = self._split(key)
+        conn.execute("BEGIN")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if purge:
+            self.purge_expired()
+
+    def _clear(self, namespace: Optional[str], key: Optional[str]) -> int:
+        conn = self._conn()
+        if key:
+            cur = conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+        elif namespace:
+            pattern = f"%{namespace}{KEY_SEP}%"
+            cur = conn.execute("DELETE FROM cache WHERE key LIKE ?", (pattern,))
+            conn.execute("DELETE FROM cache_tags WHERE key LIKE ?", (pattern,))
+        else:
+            cur = conn.execute("DELETE FROM cache")
+            conn.execute("DELETE FROM cache_tags")
+        return cur.rowcount
+
+    # ── 태그 / 통계 ──────────────────────────────────────────────
+    def invalidate_tags(self, tags: List[str]) -> int:
+        conn = self._conn()
+        removed = 0
+        conn.execute("BEGIN")
+        try:
+            for tag in tags:
+                cur = conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache_tags WHERE tag = ?)",
+                    (tag,),
+                )
+                removed += cur.rowcount
+                conn.execute("DELETE FROM cache_tags WHERE tag = ?", (tag,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        now = time.time()
+        cur = conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        conn.execute("DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache)")
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        namespaces = {}
+        for namespace, hits, misses in conn.execute("SELECT namespace, hits, misses FROM cache_stats"):
+            total = hits + misses
+            namespaces[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / total, 4) if total else None,
+            }
+        entries = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"backend": "shared-sqlite", "path": str(self.path), "entries": entries,
+                "namespaces": namespaces}
+
+    def reset_stats(self):
+        self._conn().execute("DELETE FROM cache_stats")
+
+
+# ────────────────────────────────────────────────────────────────
+# 라우트별 캐시 정책 & 키 정규화
+# ────────────────────────────────────────────────────────────────
+@dataclass
+class CachePolicy:
+    namespace: str
+    expire: int
+    # 정규화된 파라미터 → 태그 목록
+    tags: Callable[[Dict[str, Any]], List[str]] = lambda params: []
+    # 캐시 키에서 제외할 파라미터 (세션, 디버그 플래그 등)
+    ignore: Tuple[str, ...] = ()
+    # 좌표 등 실수형 파라미터 반올림 자릿수
+    float_digits: int = 4
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def date_tags(date: str) -> List[str]:
+    return [f"date:{date}", f"month:{date[:6]}"]
+
+
+CACHE_POLICIES: Dict[str, CachePolicy] = {
+    # 통계는 날짜 단위로 바뀌지만 mock/Gemini 값이 섞여 있어 짧게 유지
+    "usage": CachePolicy("usage", expire=60, tags=lambda p: date_tags(DEFAULT_DATE)),
+    # 실시간 mock 은 초 단위 신선도만 필요
+    "mock_realtime": CachePolicy("mock_realtime", expire=2, tags=lambda p: ["realtime"]),
+    # 월별 베스트 목적지: 월 단위 태그
+    "best_destinations": CachePolicy(
+        "best_destinations", expire=3600,
+        tags=lambda p: [f"month:{str(p.get('sDate', ''))[:6]}"],
+    ),
+}
+
+
+def normalize_params(params: Dict[str, Any], policy: CachePolicy) -> Dict[str, Any]:
+    """문자열 공백 제거, 실수 반올림, 제외 파라미터 삭제 후 키 정렬"""
+    normalized = {}
+    for k in sorted(params):
+        if k in policy.ignore:
+            continue
+        v = params[k]
+        if isinstance(v, str):
+            v = v.strip()
+        elif isinstance(v, float):
+            v = round(v, policy.float_digits)
+        normalized[k] = v
+    return normalized
+
+
+def normalized_key_builder(func, namespace: str = "", *, request=None, response=None,
+                           args=(), kwargs=None, **_) -> str:
+    """
+    FastAPI 가 파싱/기본값을 채운 kwargs 로 키를 만들기 때문에
+    같은 의미의 요청은 쿼리 순서·누락된 기본값과 무관하게 같은 키가 된다.
+    """
+    name = namespace.rsplit(":", 1)[-1]
+    policy = CACHE_POLICIES.get(name) or CachePolicy(name, expire=60)
+    params = normalize_params(dict(kwargs or {}), policy)
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str, ensure_ascii=False).encode()
+    ).hexdigest()[:20]
+    tags = ",".join(t for t in policy.tags(params) if t)
+    return KEY_SEP.join([namespace, tags, digest])
+
+
+def route_cache(name: str) -> Dict[str, Any]:
+    """@cache(**route_cache("usage")) 형태로 라우트에 정책 적용"""
+    policy = CACHE_POLICIES[name]
+    return {"expire": policy.expire, "namespace": policy.namespace,
+            "key_builder": normalized_key_builder, "coder": ResponseCoder}
+
+
+# ────────────────────────────────────────────────────────────────
+# 앱 연동
+# ────────────────────────────────────────────────────────────────
+_backend: Optional[SharedMemoryBackend] = None
+
+
+def get_backend() -> SharedMemoryBackend:
+    global _backend
+    if _backend is None:
+        _backend = SharedMemoryBackend()
+    return _backend
+
+
+def init_cache():
+    from fastapi_cache import FastAPICache
+
+    FastAPICache.init(get_backend(), prefix="equal-taxi", key_builder=normalized_key_builder)
+
+
+def invalidate_date(date: str) -> int:
+    """데이터 파이프라인이 date 를 새로 적재했을 때 호출"""
+    removed = get_backend().invalidate_tags(date_tags(date))
+    logger.info("캐시 무효화 date=%s (%d건)", date, removed)
+    return removed
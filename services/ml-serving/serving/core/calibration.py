@@ -0,0 +1,546 @@
+"""
+대기시간 예측 온라인 보정 (배차 결과 → 잔차 EWMA → 추론 시 보정 + 주기적 전체 재학습)
+
+app/model/model.pkl 은 data_generator 더미 데이터로 한 번 학습되고 바뀌지 않았고,
+learn_from_dispatch 는 출력만 했다. 여기서는
+- 배차 시 예측값(보정 전 raw)과 피처를 request_id 로 워커 공용 저장소(/dev/shm SQLite,
+  core/cache.py 와 같은 방식)에 기억해 두었다가 (크기·기간 제한)
+- POST /dispatch_outcome/ 로 실제 픽업 시각이 들어오면 — 배차한 워커가 아니어도 — (자치구, 시간대)별
+  잔차(실제 - raw)를 EWMA 로 갱신하고, 링 버퍼(numpy 열 배열)에 한 건으로 남긴다
+- 잔차는 공용 저장소의 잔차 로그에도 남기고, 다른 워커는 calibration.flush 때 자기 것이 아닌 잔차를
+  (같은 모델 파일로 예측한 것만) 이어 받아 모든 워커의 보정표가 같은 결과를 반영한다
+- 보정표 corrections[자치구, 시간대] 를 새로 만들어 참조를 바꿔 끼운다
+  (관측이 적은 칸은 자치구 전체 → 도시 전체 잔차로 물러남)
+- 추론 경로(ml_model)는 dict 조회 + 배열 인덱스 한 번으로 raw + 보정값을 돌려준다
+- 링 버퍼는 워커별 npz 조각으로 주기 저장하고(calibration.flush), 호스트당 한 워커가
+  모든 조각을 모아 training/train.py --extra-data 로 전체 재학습을 하위 프로세스에서 돌린다
+  (model.retrain). 새 모델 파일이 생기면 각 워커는 다시 적재하고 잔차를 0 에서 다시 쌓는다.
+
+환경 변수
+---------
+CALIBRATION_ALPHA              잔차 EWMA 가중치 (기본 0.1)
+CALIBRATION_MIN_COUNT          칸별 보정을 쓰기 위한 최소 관측 수 (기본 5)
+CALIBRATION_MAX_CORRECTION     보정 절대값 상한(분, 기본 30)
+CALIBRATION_BUFFER             워커별 링 버퍼 크기 (기본 50000)
+CALIBRATION_PENDING            결과 대기 중인 배차 최대 수 (기본 20000)
+CALIBRATION_PENDING_TTL        결과를 기다리는 최대 시간(초, 기본 21600)
+CALIBRATION_SHARED_PATH        워커 공용 저장소 (기본: /dev/shm/equal_taxi_calibration.sqlite)
+CALIBRATION_FLUSH_INTERVAL     링 버퍼 조각 저장 + 새 모델 확인 주기(초, 기본 60)
+CALIBRATION_RETRAIN_INTERVAL   전체 재학습 주기(초, 0 이면 끔, 기본 21600)
+CALIBRATION_RETRAIN_MIN        재학습에 필요한 새 결과 수 (기본 500)
+CALIBRATION_DIR                조각/재학습 입력 저장 위치 (기본: serving/app/calibration)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .locations import DISTRICT_NAMES, resolve
+from .utils import model_dir
+
+logger = logging.getLogger(__name__)
+
+HOURS = 24
+ALPHA = float(os.getenv("CALIBRATION_ALPHA", "0.1"))
+MIN_COUNT = int(os.getenv("CALIBRATION_MIN_COUNT", "5"))
+MAX_CORRECTION = float(os.getenv("CALIBRATION_MAX_CORRECTION", "30"))
+BUFFER_SIZE = int(os.getenv("CALIBRATION_BUFFER", "50000"))
+PENDING_SIZE = int(os.getenv("CALIBRATION_PENDING", "20000"))
+PENDING_TTL = float(os.getenv("CALIBRATION_PENDING_TTL", str(6 * 3600)))
+FLUSH_INTERVAL = float(os.getenv("CALIBRATION_FLUSH_INTERVAL", "60"))
+RETRAIN_INTERVAL = float(os.getenv("CALIBRATION_RETRAIN_INTERVAL", str(6 * 3600)))
+RETRAIN_MIN = int(os.getenv("CALIBRATION_RETRAIN_MIN", "500"))
+
+# 실제 대기시간 이상치 (취소 후 재호출 등)
+MAX_ACTUAL_MINUTES = 240.0
+# 이보다 오래된 워커 조각은 재학습에 쓰지 않고 지운다
+SHARD_MAX_AGE = 7 * 86400
+RETRAIN_TIMEOUT = 1800
+
+
+def default_calibration_dir() -> Path:
+    return Path(os.getenv("CALIBRATION_DIR", str(model_dir().parent / "calibration")))
+
+
+def default_shared_path() -> Path:
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() else Path(tempfile.gettempdir())
+    return Path(os.getenv("CALIBRATION_SHARED_PATH", str(base / "equal_taxi_calibration.sqlite")))
+
+
+class SharedCalibrationStore:
+    """
+    워커 공용 SQLite (공유 메모리 파일시스템)
+    pending    request_id → 배차 시 raw 예측·피처 (결과를 받는 워커가 꺼낸다)
+    residuals  결과 한 건당 (워커 pid, 모델 파일 시각, 자치구, 시간대, 잔차)
+    """
+
+    PRUNE_EVERY = 512
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_shared_path())
+        self._local = threading.local()
+        self._puts = 0
+
+    # 포크 이후 자식 프로세스는 자기 연결을 새로 연다 (core/cache.py 와 같은 방식)
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS pending (
+                    request_id TEXT PRIMARY KEY, created REAL, entry TEXT
+                );
+                CREATE INDEX IF NOT EXISTS pending_created ON pending (created);
+                CREATE TABLE IF NOT EXISTS residuals (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT, created REAL, pid INTEGER,
+                    model_mtime REAL, district INTEGER, hour INTEGER, residual REAL
+                );
+                """
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def put_pending(self, request_id: str, entry: Dict[str, Any]):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO pending (request_id, created, entry) VALUES (?, ?, ?)",
+            (request_id, time.time(), json.dumps(entry, ensure_ascii=False, default=str)),
+        )
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def pop_pending(self, request_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT entry FROM pending WHERE request_id = ?", (request_id,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM pending WHERE request_id = ?", (request_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return json.loads(row[0]) if row else None
+
+    def pending_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def add_residual(self, model_mtime: Optional[float], district: Optional[int], hour: int, residual: float):
+        self._conn().execute(
+            "INSERT INTO residuals (created, pid, model_mtime, district, hour, residual) VALUES (?, ?, ?, ?, ?, ?)",
+            (time.time(), os.getpid(), model_mtime, district, hour, residual),
+        )
+
+    def last_seq(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM residuals").fetchone()[0]
+
+    def residuals_since(self, seq: int) -> List[tuple]:
+        """seq 이후 다른 워커의 잔차 [(seq, model_mtime, district, hour, residual)]"""
+        return self._conn().execute(
+            "SELECT seq, model_mtime, district, hour, residual FROM residuals WHERE seq > ? AND pid != ? ORDER BY seq",
+            (seq, os.getpid()),
+        ).fetchall()
+
+    def prune(self):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM pending WHERE created < ?", (now - PENDING_TTL,))
+        conn.execute(
+            "DELETE FROM pending WHERE request_id IN "
+            "(SELECT request_id FROM pending ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (PENDING_SIZE,),
+        )
+        # 모든 워커가 flush 주기 안에 읽어 가므로 잔차 로그는 하루만 둔다
+        conn.execute("DELETE FROM residuals WHERE created < ?", (now - 86400,))
+
+
+class OutcomeBuffer:
+    """고정 크기 링 버퍼 (열별 numpy 배열, 가장 오래된 결과부터 덮어씀)"""
+
+    def __init__(self, capacity: int = BUFFER_SIZE):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity)
+        self.location = np.zeros(capacity, dtype=np.int16)    # self.locations 인덱스
+        self.weather = np.zeros(capacity, dtype=np.int16)     # self.weathers 인덱스
+        self.hour = np.zeros(capacity, dtype=np.int8)
+        self.wheelchair = np.zeros(capacity, dtype=bool)
+        self.num_vehicles = np.zeros(capacity, dtype=np.int32)
+        self.num_users = np.zeros(capacity, dtype=np.int32)
+        self.predicted = np.zeros(capacity, dtype=np.float32)  # 보정 전 raw
+        self.actual = np.zeros(capacity, dtype=np.float32)
+        self.locations: List[str] = []
+        self.weathers: List[str] = []
+        self.total = 0
+
+    @staticmethod
+    def _intern(names: List[str], name: str) -> int:
+        try:
+            return names.index(name)
+        except ValueError:
+            names.append(name)
+            return len(names) - 1
+
+    def append(self, features: Dict[str, Any], predicted: float, actual: float, ts: float):
+        i = self.total % self.capacity
+        self.ts[i] = ts
+        self.location[i] = self._intern(self.locations, features["pickup_location"])
+        self.weather[i] = self._intern(self.weathers, features["weather"])
+        self.hour[i] = features["hour"]
+        self.wheelchair[i] = features["wheelchair"]
+        self.num_vehicles[i] = features["num_vehicles"]
+        self.num_users[i] = features["num_users"]
+        self.predicted[i] = predicted
+        self.actual[i] = actual
+        self.total += 1
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def save(self, path: Path):
+        n = len(self)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f, ts=self.ts[:n], hour=self.hour[:n], wheelchair=self.wheelchair[:n],
+                num_vehicles=self.num_vehicles[:n], num_users=self.num_users[:n],
+                predicted=self.predicted[:n], actual=self.actual[:n],
+                location=np.array(self.locations, dtype=str)[self.location[:n]] if n else np.array([], dtype=str),
+                weather=np.array(self.weathers, dtype=str)[self.weather[:n]] if n else np.array([], dtype=str),
+            )
+        os.replace(tmp, path)
+
+
+class WaitCalibrator:
+    def __init__(self, path: Optional[Path] = None, shared: Optional[SharedCalibrationStore] = None):
+        self.dir = Path(path or default_calibration_dir())
+        self.shared = shared or SharedCalibrationStore()
+        z = len(DISTRICT_NAMES)
+        self.bias = np.zeros((z, HOURS))
+        self.count = np.zeros((z, HOURS), dtype=np.int64)
+        self.district_bias = np.zeros(z)
+        self.district_count = np.zeros(z, dtype=np.int64)
+        self.global_bias = 0.0
+        self.global_count = 0
+        self.corrections = np.zeros((z, HOURS))  # 발행된 보정표 (읽기 전용)
+        self.corrections.setflags(write=False)
+        self.buffer = OutcomeBuffer()
+        # 배차 경로에서 공용 저장소 쓰기는 전용 스레드로 넘긴다 (이벤트 루프를 막지 않도록)
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_pid: Optional[int] = None
+        self._seq: Optional[int] = None  # 이어 받은 잔차 로그 위치
+        self.synced = 0
+        self.abs_error_raw = 0.0
+        self.abs_error_corrected = 0.0
+        self.outcomes = 0
+        self.unmatched = 0
+        self.flushed_total = 0
+        self.model_mtime: Optional[float] = None
+        self.retrains = 0
+        self.last_retrain: Optional[Dict[str, Any]] = None
+        self._index: Dict[str, Optional[int]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------
+    # 추론 경로 (보정표 조회만)
+    # ------------------------------------------
+    def _district(self, location: Optional[str]) -> Optional[int]:
+        idx = self._index.get(location, -1)
+        if idx == -1:
+            district = resolve(location) if location else None
+            idx = DISTRICT_NAMES.index(district) if district else None
+            self._index[location] = idx
+        return idx
+
+    def correction(self, location: Optional[str], hour: int) -> float:
+        i = self._district(location)
+        if i is None:
+            return 0.0
+        return float(self.corrections[i, hour % HOURS])
+
+    def correct(self, location: Optional[str], hour: int, raw: float) -> float:
+        return max(raw + self.correction(location, hour), 0.0)
+
+    # ------------------------------------------
+    # 배차 → 결과
+    # ------------------------------------------
+    def _submit(self, fn, *args):
+        # 포크 이전에 만든 실행기는 자식에서 쓸 수 없으므로 pid 가 바뀌면 새로 만든다
+        if self._writer is None or self._writer_pid != os.getpid():
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="calibration-writer")
+            self._writer_pid = os.getpid()
+        self._writer.submit(fn, *args).add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future):
+        if future.exception() is not None:
+            logger.warning("보정 저장소 기록 실패: %s", future.exception())
+
+    def remember(self, request: Dict[str, Any]):
+        """배차 확정 시 예측 피처와 raw 예측을 request_id 로 공용 저장소에 기억 (learn_from_dispatch)"""
+        predicted = request.get("predicted_wait")
+        if predicted is None or predicted >= 999:
+            return
+        request_time = request.get("request_time")
+        # 예측과 같은 시간대 (ml_model 은 request 의 hour 가 없으면 현재 시각을 쓴다)
+        hour = request.get("hour") or datetime.now().hour
+        location = request.get("pickup_location")
+        entry = {
+            "request_time": request_time.isoformat() if isinstance(request_time, datetime) else None,
+            # 예측 함수가 남긴 보정 전 값 (보정 후 0 으로 잘렸으면 predicted 에서 되돌릴 수 없다)
+            "raw": float(request.get("raw_wait", predicted)),
+            "predicted": float(predicted),
+            "features": {
+                "pickup_location": location,
+                "weather": request.get("weather", "맑음"),
+                "hour": hour,
+                "wheelchair": bool(request.get("wheelchair")),
+                "num_vehicles": int(request.get("num_vehicles", 10)),
+                "num_users": int(request.get("num_users", 20)),
+            },
+        }
+        self._submit(self.shared.put_pending, str(request["request_id"]), entry)
+
+    def record_outcome(self, request_id: str, actual_wait: Optional[float] = None,
+                       picked_up_at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        실제 픽업 결과 반영 (어느 워커가 배차했든 공용 저장소에서 찾는다, 동기 sqlite → 스레드에서 호출).
+        기억해 둔 배차가 없으면(기간·크기 제한으로 지워졌거나 모르는 요청) None.
+        actual_wait 가 없으면 picked_up_at - request_time 으로 계산
+        """
+        entry = self.shared.pop_pending(str(request_id))
+        if entry is None:
+            self.unmatched += 1
+            return None
+        if actual_wait is None:
+            if picked_up_at is None or not entry["request_time"]:
+                raise ValueError("actual_wait_minutes 또는 picked_up_at 이 필요합니다")
+            start = datetime.fromisoformat(entry["request_time"])
+            if (start.tzinfo is None) != (picked_up_at.tzinfo is None):
+                picked_up_at = picked_up_at.replace(tzinfo=start.tzinfo)
+            actual_wait = (picked_up_at - start).total_seconds() / 60
+        if not 0 <= actual_wait <= MAX_ACTUAL_MINUTES:
+            raise ValueError(f"실제 대기시간이 범위를 벗어났습니다: {actual_wait:.1f}분")
+
+        features, raw = entry["features"], entry["raw"]
+        residual = actual_wait - raw
+        with self._lock:
+            self.buffer.append(features, raw, actual_wait, time.time())
+            self.outcomes += 1
+            self.abs_error_raw += abs(residual)
+            self.abs_error_corrected += abs(actual_wait - entry["predicted"])
+            district = self._district(features["pickup_location"])
+            self._update(district, features["hour"], residual)
+        # 다른 워커도 같은 잔차를 반영하도록 (sync_residuals, 첫 flush 이전이면 모델 파일 시각을 여기서 잡는다)
+        if self.model_mtime is None:
+            from .ml_model import model_mtime
+
+            self.model_mtime = model_mtime()
+        self.shared.add_residual(self.model_mtime, district, features["hour"], residual)
+        return {
+            "request_id": request_id,
+            "predicted": round(entry["predicted"], 2),
+            "actual": round(actual_wait, 2),
+            "correction": round(self.correction(features["pickup_location"], features["hour"]), 2),
+        }
+
+    def _update(self, district: Optional[int], hour: int, residual: float, publish: bool = True):
+        def ewma(prev: float, n: int) -> float:
+            # 처음 몇 건은 단순 평균으로 시작해 EWMA 초기값 편향을 줄인다
+            weight = max(ALPHA, 1.0 / (n + 1))
+            return (1 - weight) * prev + weight * residual
+
+        self.global_bias = ewma(self.global_bias, self.global_count)
+        self.global_count += 1
+        if district is not None:
+            self.district_bias[district] = ewma(self.district_bias[district], self.district_count[district])
+            self.district_count[district] += 1
+            self.bias[district, hour] = ewma(self.bias[district, hour], self.count[district, hour])
+            self.count[district, hour] += 1
+        if publish:
+            self._publish()
+
+    def sync_residuals(self) -> int:
+        """다른 워커가 받은 결과의 잔차를 이어 받는다 (같은 모델 파일로 예측한 것만, calibration.flush)"""
+        if self._seq is None:
+            # 처음에는 현재 위치부터 (이전 잔차는 재시작 전 모델·보정 기준일 수 있다)
+            self._seq = self.shared.last_seq()
+            return 0
+        rows = self.shared.residuals_since(self._seq)
+        if not rows:
+            return 0
+        applied = 0
+        with self._lock:
+            for seq, mtime, district, hour, residual in rows:
+                self._seq = seq
+                if mtime == self.model_mtime:
+                    self._update(district, hour, residual, publish=False)
+                    applied += 1
+            self._publish()
+        self.synced += applied
+        return applied
+
+    def _publish(self):
+        fallback = np.where(self.district_count >= MIN_COUNT, self.district_bias,
+                            self.global_bias if self.global_count >= MIN_COUNT else 0.0)
+        corrections = np.where(self.count >= MIN_COUNT, self.bias, fallback[:, None])
+        corrections = np.clip(corrections, -MAX_CORRECTION, MAX_CORRECTION)
+        corrections.setflags(write=False)
+        self.corrections = corrections
+
+    def reset(self):
+        """새 모델 적재 후 잔차를 처음부터 다시 쌓는다 (링 버퍼는 유지)"""
+        with self._lock:
+            self.bias[:] = 0
+            self.count[:] = 0
+            self.district_bias[:] = 0
+            self.district_count[:] = 0
+            self.global_bias, self.global_count = 0.0, 0
+            self._publish()
+
+    # ------------------------------------------
+    # 조각 저장 / 새 모델 확인 (워커별 calibration.flush)
+    # ------------------------------------------
+    def shard_path(self) -> Path:
+        return self.dir / f"outcomes.{os.getpid()}.npz"
+
+    def flush(self) -> Dict[str, Any]:
+        from .ml_model import model_mtime, reload_model_assets
+
+        saved = 0
+        if self.buffer.total > self.flushed_total:
+            with self._lock:
+                self.buffer.save(self.shard_path())
+                self.flushed_total = self.buffer.total
+            saved = len(self.buffer)
+
+        reloaded = False
+        mtime = model_mtime()
+        if self.model_mtime is None:
+            self.model_mtime = mtime
+        elif mtime is not None and mtime != self.model_mtime:
+            reload_model_assets()
+            self.reset()
+            self.model_mtime = mtime
+            reloaded = True
+        synced = self.sync_residuals()
+        return {"saved_rows": saved, "model_reloaded": reloaded, "synced_residuals": synced}
+
+    # ------------------------------------------
+    # 전체 재학습 (호스트당 한 워커, model.retrain)
+    # ------------------------------------------
+    def collect_shards(self):
+        import pandas as pd
+
+        frames = []
+        now = time.time()
+        for shard in self.dir.glob("outcomes.*.npz"):
+            if now - shard.stat().st_mtime > SHARD_MAX_AGE:
+                shard.unlink(missing_ok=True)
+                continue
+            try:
+                with np.load(shard, allow_pickle=False) as data:
+                    frames.append(pd.DataFrame({k: data[k] for k in data.files}))
+            except (OSError, ValueError) as e:
+                logger.warning("보정 조각 로드 실패 %s: %s", shard, e)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def training_frame(self):
+        """조각 → training/data_generator.py 와 같은 컬럼의 학습 데이터"""
+        import pandas as pd
+
+        df = self.collect_shards()
+        if df.empty:
+            return df
+        return pd.DataFrame({
+            "탑승시각": pd.to_datetime(df["ts"], unit="s").dt.floor("D")
+                      + pd.to_timedelta(df["hour"].astype(int), unit="h"),
+            "위치": df["location"],
+            "날씨": df["weather"],
+            "휠체어탑승여부": np.where(df["wheelchair"], "Y", "N"),
+            "대기시간(분)": df["actual"],
+            "해당지역운행차량수": df["num_vehicles"],
+            "해당지역이용자수": df["num_users"],
+        })
+
+    def write_training_data(self, path: Path) -> int:
+        frame = self.training_frame()
+        if len(frame) >= RETRAIN_MIN:
+            frame.to_csv(path, index=False)
+        return len(frame)
+
+    async def retrain(self) -> Dict[str, Any]:
+        extra = self.dir / "retrain_extra.csv"
+        rows = await asyncio.to_thread(self.write_training_data, extra)
+        if rows < RETRAIN_MIN:
+            return {"status": "skipped", "rows": rows, "min_rows": RETRAIN_MIN}
+
+        # 학습은 CPU 를 오래 쓰므로 서빙 프로세스 밖에서 (완료 후 모델 파일만 원자적으로 교체됨)
+        project = Path(__file__).resolve().parents[2]
+        started = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "training.train", "--extra-data", str(extra), "--out", str(model_dir()),
+            cwd=str(project), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            output, _ = await asyncio.wait_for(proc.communicate(), RETRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            raise RuntimeError("재학습 시간 초과")
+        log = output.decode(errors="replace").strip().splitlines()[-5:]
+        if proc.returncode != 0:
+            raise RuntimeError(f"재학습 실패 (exit {proc.returncode}): {log}")
+        self.retrains += 1
+        self.last_retrain = {
+            "rows": rows,
+            "seconds": round(time.perf_counter() - started, 1),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "log": log,
+        }
+        # 이 워커는 바로 새 모델로 (다른 워커는 다음 flush 에서)
+        await asyncio.to_thread(self.flush)
+        return self.last_retrain
+
+    def stats(self) -> Dict[str, Any]:
+        n = max(self.outcomes, 1)
+        observed = self.count > 0
+        return {
+            "outcomes": self.outcomes,
+            "pending": self.shared.pending_count(),
+            "unmatched": self.unmatched,
+            "synced_from_workers": self.synced,
+            "buffer_rows": len(self.buffer),
+            "mae_raw": round(self.abs_error_raw / n, 3) if self.outcomes else None,
+            "mae_served": round(self.abs_error_corrected / n, 3) if self.outcomes else None,
+            "global_bias": round(self.global_bias, 3),
+            "calibrated_cells": int((self.count >= MIN_COUNT).sum()),
+            "observed_cells": int(observed.sum()),
+            "mean_abs_correction": round(float(np.abs(self.corrections).mean()), 3),
+            "retrains": self.retrains,
+            "last_retrain": self.last_retrain,
+        }
+
+
+wait_calibrator = WaitCalibrator()
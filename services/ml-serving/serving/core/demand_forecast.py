@@ -0,0 +1,249 @@
+"""
+자치구별 15분 단위 호출 수요 예측
+
+배차 효율 점수의 "도착지 근처 다음 호출" 가산점은 이미 들어온 요청(active_requests)만 봤고,
+mock 의 get_time_multiplier 는 하드코딩된 계단 함수였다. 여기서는
+- 집계 큐브(usage_cube)의 일자 × 자치구 × 시간대 접수건으로 요일별 기준 곡선
+  profile[요일, 자치구, 15분 칸] 을 학습하고 (시간 값은 인접 시간과 선형 보간해 15분 칸으로 나눔)
+- 배차 요청이 들어올 때마다 현재 칸의 자치구별 관측 수를 세어 두었다가
+- 15분 칸이 닫힐 때 관측/기대 비율로 자치구별 수준(level)을 EMA 갱신하고
+  (이 워커가 보는 요청은 도시 전체 호출의 일부이므로, 관측 총량/기대 총량의 장기 EMA(capture)로 나눠 비교)
+  앞으로 HORIZON 칸 예측 배열 forecast[자치구, 칸] 을 새로 만들어 바꿔 끼운다
+  (수준 보정은 먼 미래일수록 1 로 감쇠)
+
+요청 처리 중에는 배열 조회만 한다 (외부 조회 없음).
+
+환경 변수
+---------
+DEMAND_HORIZON_SLOTS   예측 칸 수 (기본 16 = 4시간)
+DEMAND_LEVEL_ALPHA     관측/기대 비율 EMA 가중치 (기본 0.2)
+DEMAND_LEVEL_DECAY     칸마다 수준 보정이 1 로 돌아가는 비율 (기본 0.85)
+DEMAND_REFIT_INTERVAL  기준 곡선 재학습 주기(초, 워밍업 스케줄러, 기본 21600)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .locations import DISTRICT_NAMES, resolve
+from .usage_cube import HOURS, MEASURES, UsageCube, usage_cube
+
+logger = logging.getLogger(__name__)
+
+SLOT_MINUTES = 15
+SLOTS_PER_HOUR = 60 // SLOT_MINUTES
+SLOTS_PER_DAY = HOURS * SLOTS_PER_HOUR
+HORIZON = int(os.getenv("DEMAND_HORIZON_SLOTS", "16"))
+LEVEL_ALPHA = float(os.getenv("DEMAND_LEVEL_ALPHA", "0.2"))
+LEVEL_DECAY = float(os.getenv("DEMAND_LEVEL_DECAY", "0.85"))
+REFIT_INTERVAL = float(os.getenv("DEMAND_REFIT_INTERVAL", str(6 * 3600)))
+
+# 수준 보정 한계 (하루 이상치 한 칸이 예측 전체를 흔들지 않도록)
+MIN_LEVEL, MAX_LEVEL = 0.25, 4.0
+# 관측이 이보다 적은 칸은 수준 갱신에 쓰지 않는다
+MIN_OBSERVED = 5
+CAPTURE_ALPHA = 0.05
+CALLS = MEASURES.index("접수건")
+
+
+def slot_of(when: datetime) -> int:
+    """자정부터 몇 번째 15분 칸인지"""
+    return when.hour * SLOTS_PER_HOUR + when.minute // SLOT_MINUTES
+
+
+def _hourly_to_slots(hourly: np.ndarray) -> np.ndarray:
+    """
+    [..., 24] 시간 합계 → [..., 96] 15분 칸 (칸 중심에서 시간 평균을 선형 보간, 시간 합계 보존)
+    """
+    per_slot = hourly / SLOTS_PER_HOUR
+    centers = np.arange(HOURS) + 0.5
+    t = (np.arange(SLOTS_PER_DAY) + 0.5) / SLOTS_PER_HOUR
+    # 자정 넘어 순환 보간
+    xp = np.concatenate([[centers[-1] - HOURS], centers, [centers[0] + HOURS]])
+    fp = np.concatenate([per_slot[..., -1:], per_slot, per_slot[..., :1]], axis=-1)
+    flat = fp.reshape(-1, fp.shape[-1])
+    slots = np.stack([np.interp(t, xp, row) for row in flat]).reshape(*hourly.shape[:-1], SLOTS_PER_DAY)
+    # 보간으로 달라진 시간 합계를 원래대로 맞춘다
+    sums = slots.reshape(*slots.shape[:-1], HOURS, SLOTS_PER_HOUR).sum(axis=-1)
+    scale = np.divide(hourly, sums, out=np.ones_like(hourly, dtype=float), where=sums > 0)
+    return slots * np.repeat(scale, SLOTS_PER_HOUR, axis=-1)
+
+
+def _fallback_hourly() -> np.ndarray:
+    """학습 데이터가 없을 때: 하루 4000건을 기존 시간대 계수 비율로 자치구에 균등 분배"""
+    multiplier = np.ones(HOURS)
+    multiplier[0:6] *= 0.5
+    multiplier[7:10] *= 2.0
+    multiplier[17:21] *= 2.5
+    hourly = 4000 * multiplier / multiplier.sum() / len(DISTRICT_NAMES)
+    profile = np.broadcast_to(hourly, (7, len(DISTRICT_NAMES), HOURS)).copy()
+    profile[5:] *= 1.3
+    return profile
+
+
+class DemandForecaster:
+    def __init__(self, cube: Optional[UsageCube] = None, horizon: int = HORIZON):
+        self.cube = cube or usage_cube
+        self.horizon = horizon
+        z = len(DISTRICT_NAMES)
+        self.profile = _hourly_to_slots(_fallback_hourly())     # [7, Z, 96]
+        self.trained_on: List[str] = []
+        self.level = np.ones(z)
+        self.capture: Optional[float] = None
+        self.forecast = np.zeros((z, horizon))                  # [Z, horizon] (칸 0 = 현재 칸)
+        self._observed = np.zeros(z)
+        self._slot_start: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.rollovers = 0
+        self._roll(datetime.now())
+
+    # ------------------------------------------
+    # 학습
+    # ------------------------------------------
+    def fit(self) -> Dict[str, Any]:
+        """집계 큐브 전체로 요일별 기준 곡선 재학습 (현재 예측도 다시 계산)"""
+        cube = self.cube
+        cube.refresh()
+        dates = list(cube.dates)
+        if not dates:
+            return {"dates": 0, "profile": "fallback"}
+        calls = cube.sum[..., CALLS]                                    # [D, Z, H]
+        weekdays = np.array([datetime.strptime(d, "%Y%m%d").weekday() for d in dates])
+        overall = calls.mean(axis=0)
+        hourly = np.empty((7, len(DISTRICT_NAMES), HOURS))
+        for wd in range(7):
+            mask = weekdays == wd
+            hourly[wd] = calls[mask].mean(axis=0) if mask.any() else overall
+        profile = _hourly_to_slots(hourly)
+        with self._lock:
+            self.profile = profile
+            self.trained_on = dates
+            self._publish(self._slot_start or datetime.now())
+        logger.info("수요 예측 기준 곡선 학습 (dates=%d)", len(dates))
+        return {"dates": len(dates), "first": dates[0], "last": dates[-1]}
+
+    # ------------------------------------------
+    # 관측 / 칸 전환
+    # ------------------------------------------
+    def observe(self, location: str, when: Optional[datetime] = None):
+        """배차 요청 1건 관측 (칸이 바뀌었으면 먼저 닫는다)"""
+        when = when or datetime.now()
+        self._maybe_roll(when)
+        district = resolve(location)
+        if district is not None:
+            self._observed[DISTRICT_NAMES.index(district)] += 1
+
+    def _maybe_roll(self, now: datetime):
+        if self._slot_start is not None and now < self._slot_start + timedelta(minutes=SLOT_MINUTES):
+            return
+        with self._lock:
+            if self._slot_start is None or now >= self._slot_start + timedelta(minutes=SLOT_MINUTES):
+                self._roll(now)
+
+    def _roll(self, now: datetime):
+        """닫힌 칸의 관측/기대 비율로 수준 갱신 후 예측 재계산"""
+        if self._slot_start is not None:
+            expected = self.forecast[:, 0] / self.level   # 수준 보정 전 기준값
+            total_observed, total_expected = self._observed.sum(), expected.sum()
+            if total_observed >= MIN_OBSERVED and total_expected > 0:
+                rate = total_observed / total_expected
+                self.capture = rate if self.capture is None else (
+                    (1 - CAPTURE_ALPHA) * self.capture + CAPTURE_ALPHA * rate
+                )
+                scaled = expected * self.capture
+                ratio = np.where(scaled > 0, self._observed / np.where(scaled > 0, scaled, 1), 1.0)
+                self.level = np.clip((1 - LEVEL_ALPHA) * self.level + LEVEL_ALPHA * ratio, MIN_LEVEL, MAX_LEVEL)
+            self.rollovers += 1
+        self._observed = np.zeros(len(DISTRICT_NAMES))
+        self._slot_start = now.replace(minute=now.minute - now.minute % SLOT_MINUTES, second=0, microsecond=0)
+        self._publish(self._slot_start)
+
+    def _publish(self, start: datetime):
+        # 기준 곡선에서 현재 칸부터 horizon 칸 (자정·요일 경계 넘김 처리)
+        wd, slot = start.weekday(), slot_of(start)
+        idx = slot + np.arange(self.horizon)
+        days = (wd + idx // SLOTS_PER_DAY) % 7
+        base = self.profile[days, :, idx % SLOTS_PER_DAY].T                 # [Z, horizon]
+        decay = LEVEL_DECAY ** np.arange(self.horizon)
+        correction = self.level[:, None] ** decay[None, :]
+        forecast = base * correction
+        forecast.setflags(write=False)
+        self.forecast = forecast
+
+    # ------------------------------------------
+    # 조회 (배열만 읽음)
+    # ------------------------------------------
+    def expected(self, location: str, start_minutes: float, end_minutes: float,
+                 at: Optional[datetime] = None) -> float:
+        """
+        지금부터 start~end 분 사이 location 의 예상 호출 수
+        at: 지금 대신 이 시각부터 (이벤트 재생, 그때의 수준 보정은 남아 있지 않으므로 기준 곡선만)
+        """
+        if at is None:
+            self._maybe_roll(datetime.now())
+        district = resolve(location)
+        if district is None or end_minutes <= start_minutes:
+            return 0.0
+        z = DISTRICT_NAMES.index(district)
+        if at is None:
+            row = self.forecast[z]
+            offset = (datetime.now() - self._slot_start).total_seconds() / 60
+        else:
+            start = at.replace(minute=at.minute - at.minute % SLOT_MINUTES, second=0, microsecond=0)
+            idx = slot_of(start) + np.arange(self.horizon)
+            days = (start.weekday() + idx // SLOTS_PER_DAY) % 7
+            row = self.profile[days, z, idx % SLOTS_PER_DAY]
+            offset = (at - start).total_seconds() / 60
+        lo = (start_minutes + offset) / SLOT_MINUTES
+        hi = min((end_minutes + offset) / SLOT_MINUTES, self.horizon)
+        if lo >= hi:
+            return 0.0
+        first, last = int(lo), int(np.ceil(hi))
+        weights = np.ones(last - first)
+        weights[0] -= lo - first
+        weights[-1] -= last - hi
+        return float(np.dot(row[first:last], weights))
+
+    def district_forecast(self, slots: Optional[int] = None) -> np.ndarray:
+        """[Z, slots] 예측 (재배치 계획용)"""
+        self._maybe_roll(datetime.now())
+        return self.forecast[:, : slots or self.horizon]
+
+    def time_multiplier(self, hour: int, weekday: int) -> Optional[float]:
+        """도시 전체 (요일, hour 시) 수요 / 주간 평균 시간 수요 (학습 전이면 None)"""
+        if not self.trained_on:
+            return None
+        daily = self.profile[weekday].sum(axis=0)                          # [96]
+        mean_hour = self.profile.sum() / 7 / HOURS
+        if mean_hour <= 0:
+            return None
+        return float(daily[hour * SLOTS_PER_HOUR:(hour + 1) * SLOTS_PER_HOUR].sum() / mean_hour)
+
+    def stats(self, location: Optional[str] = None) -> Dict[str, Any]:
+        self._maybe_roll(datetime.now())
+        forecast = self.forecast
+        out: Dict[str, Any] = {
+            "trained_dates": len(self.trained_on),
+            "slot_minutes": SLOT_MINUTES,
+            "horizon_slots": self.horizon,
+            "slot_start": self._slot_start.isoformat(timespec="minutes") if self._slot_start else None,
+            "rollovers": self.rollovers,
+            "capture_rate": round(self.capture, 4) if self.capture is not None else None,
+            "city_next_hour": round(float(forecast[:, :SLOTS_PER_HOUR].sum()), 1),
+        }
+        if location is not None:
+            district = resolve(location)
+            if district is not None:
+                i = DISTRICT_NAMES.index(district)
+                out["district"] = district
+                out["level"] = round(float(self.level[i]), 3)
+                out["forecast"] = [round(float(v), 2) for v in forecast[i]]
+        return out
+
+
+demand_forecaster = DemandForecaster()
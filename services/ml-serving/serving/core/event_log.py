@@ -0,0 +1,470 @@
+"""
+배차 이벤트 로그 (고정 길이 레코드, 메모리 맵 링 → 세그먼트 파일) + 재생 / Parquet 내보내기
+
+배차 결정은 응답 후 사라졌고 learn_from_dispatch 는 stdout 출력뿐이었다. 여기서는
+- 배차 1건을 고정 길이 레코드 한 줄(RECORD_DTYPE: 요청, 상위 후보 CANDIDATES 대와 점수,
+  선택 차량, 점수 구성요소, 배정 방식, 요청 수신부터 결정까지 지연)로 만들어
+- 워커별 .npy 메모리 맵(active.<pid>.npy)의 다음 칸에 대입한다 (시스템 호출·직렬화 없음, 수 µs)
+- 맵이 차면 segment-<첫 기록 시각>-<pid>.npy 로 이름을 바꿔 봉인하고 새 맵을 연다
+  (EVENT_LOG_MAX_SEGMENTS 를 넘는 오래된 세그먼트는 삭제)
+
+세그먼트는 일반 .npy 파일이라 np.load(mmap_mode="r") 로 바로 읽힌다.
+- read_events(since, until, limit)  시간 구간의 레코드 (활성 맵 포함, 모든 워커, 최근 limit 건)
+- replay(algorithm, events)   기록된 요청·후보를 현재 SmartDispatchAlgorithm 에 다시 넣어
+                               선택이 같은지 비교 (모델·혼잡 계수·수요 곡선은 현재 값, 대기시간 예측·
+                               ETA·예측 수요의 시간대는 기록 시각. 혼잡 계수 조회는 표본 우선순위에 세지 않음)
+                               요청별 최고 점수(argmax)·긴급 배차만 다시 계산한다. 묶음 동시 배정(joint)과
+                               합승 구성원(pooled)은 다른 요청과 함께 정한 결과라 한 건만으로는 재현되지
+                               않으므로 방식별 건수만 센다
+- export_parquet(path, ...)   오프라인 분석용 (pyarrow 또는 fastparquet 필요)
+
+    python -m serving.core.event_log stats
+    python -m serving.core.event_log replay --since 2025-01-31T08:00 --until 2025-01-31T09:00 --limit 5000
+    python -m serving.core.event_log export --out events.parquet --since 2025-01-31
+
+환경 변수
+---------
+EVENT_LOG                   0 이면 기록하지 않음 (기본 1)
+EVENT_LOG_DIR               저장 위치 (기본: serving/app/events)
+EVENT_LOG_SEGMENT_RECORDS   세그먼트당 레코드 수 (기본 16384, 약 12MB)
+EVENT_LOG_MAX_SEGMENTS      보관 세그먼트 수 (기본 64)
+EVENT_LOG_REPLAY_MAX        /system/events/replay 한 번에 재생하는 최대 이벤트 수 (기본 20000)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .utils import model_dir
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("EVENT_LOG", "1") == "1"
+SEGMENT_RECORDS = int(os.getenv("EVENT_LOG_SEGMENT_RECORDS", "16384"))
+MAX_SEGMENTS = int(os.getenv("EVENT_LOG_MAX_SEGMENTS", "64"))
+REPLAY_MAX_EVENTS = int(os.getenv("EVENT_LOG_REPLAY_MAX", "20000"))
+
+# 레코드에 남기는 후보 수 (점수 상위, 선택 차량 포함)
+CANDIDATES = 8
+
+# 배정 방식 (match["assignment"], 레코드에는 이 튜플의 인덱스)
+#   argmax     요청 하나의 후보 중 최고 점수 (dynamic_dispatch, 요청 1건 묶음)
+#   emergency  긴급 배차 (가장 빠른 차량)
+#   joint      묶음 요청 × 차량 동시 배정 (dispatch_engine.joint_assignment)
+#   pooled     합승 구성원 (묶음 lead 의 배정을 공유)
+ASSIGNMENT_MODES = ("argmax", "emergency", "joint", "pooled")
+REPLAYABLE = ("argmax", "emergency")
+
+ID, LOC = 36, 24
+RECORD_DTYPE = np.dtype([
+    ("ts", "f8"),                    # 기록 시각 (epoch 초, 0 = 빈 칸)
+    ("request_time", "f8"),
+    ("request_id", f"S{ID}"),
+    ("user_id", f"S{ID}"),
+    ("pickup", f"S{LOC}"),
+    ("destination", f"S{LOC}"),
+    ("weather", "S12"),
+    ("wheelchair", "?"),
+    ("medical", "?"),
+    ("emergency", "?"),
+    ("pool_size", "u1"),
+    ("assignment", "u1"),
+    ("num_vehicles", "i4"),
+    ("num_users", "i4"),
+    ("predicted_wait", "f4"),
+    ("driver_id", f"S{ID}"),
+    ("driver_location", f"S{LOC}"),
+    ("driver_wheelchair", "?"),
+    ("score", "f4"),
+    ("urgency", "f4"),
+    ("efficiency", "f4"),
+    ("fairness", "f4"),
+    ("latency_ms", "f4"),
+    ("n_candidates", "u1"),
+    ("cand_id", f"S{ID}", (CANDIDATES,)),
+    ("cand_location", f"S{LOC}", (CANDIDATES,)),
+    ("cand_wheelchair", "?", (CANDIDATES,)),
+    ("cand_score", "f4", (CANDIDATES,)),
+])
+
+_TEXT_FIELDS = ("request_id", "user_id", "pickup", "destination", "weather", "driver_id", "driver_location")
+
+
+def default_event_dir() -> Path:
+    return Path(os.getenv("EVENT_LOG_DIR", str(model_dir().parent / "events")))
+
+
+def _b(value: Any, size: int) -> bytes:
+    # 고정 길이 바이트 칸 (UTF-8, 넘치면 자름 — 읽을 때 errors="ignore")
+    return b"" if value is None else str(value).encode("utf-8")[:size]
+
+
+def _s(value: bytes) -> str:
+    return value.decode("utf-8", errors="ignore")
+
+
+def _epoch(value: Any) -> float:
+    return value.timestamp() if isinstance(value, datetime) else 0.0
+
+
+def assignment_mode(match: Dict[str, Any]) -> str:
+    # 방식이 표시되지 않은 match 는 점수로 판단 (긴급 배차는 999)
+    return match.get("assignment") or ("emergency" if match.get("score") == 999 else "argmax")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DispatchEventLog:
+    def __init__(self, directory: Optional[Path] = None, segment_records: int = SEGMENT_RECORDS,
+                 max_segments: int = MAX_SEGMENTS):
+        self.dir = Path(directory or default_event_dir())
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self._map: Optional[np.memmap] = None
+        self._path: Optional[Path] = None
+        self._pos = 0
+        self._lock = threading.Lock()
+        self.written = 0
+        self.errors = 0
+        self.rotations = 0
+        self.write_ns = 0
+
+    # ------------------------------------------
+    # 기록 (배차 경로)
+    # ------------------------------------------
+    def append(self, request: Dict[str, Any], match: Dict[str, Any], pool_size: int = 1,
+               candidates: Optional[List[Dict[str, Any]]] = None):
+        """candidates: 점수 없이 본 차량 목록 (긴급 배차, 점수 칸은 NaN)"""
+        if not ENABLED:
+            return
+        started = time.perf_counter_ns()
+        try:
+            record = self._record(request, match, pool_size, candidates)
+            with self._lock:
+                if self._map is None:
+                    self._open()
+                self._map[self._pos] = record
+                self._pos += 1
+                if self._pos >= self.segment_records:
+                    self._rotate()
+            self.written += 1
+        except Exception as e:  # 로그 실패가 배차를 막지 않도록
+            self.errors += 1
+            logger.warning("배차 이벤트 기록 실패: %s", e)
+        self.write_ns += time.perf_counter_ns() - started
+
+    @staticmethod
+    def _record(request: Dict[str, Any], match: Dict[str, Any], pool_size: int,
+                unscored: Optional[List[Dict[str, Any]]]) -> tuple:
+        driver = match["driver"]
+        components = match.get("components", {})
+        # 선택 차량을 맨 앞에, 나머지는 점수 순 (match["alternatives"], dispatch_engine / dispatch)
+        alternatives = [a for a in match.get("alternatives", ()) if a["driver"] is not driver]
+        alternatives += [{"driver": d} for d in unscored or () if d is not driver]
+        candidates = ([match] + alternatives)[:CANDIDATES]
+        pad = CANDIDATES - len(candidates)
+        received = request.get("received_at")
+        return (
+            time.time(),
+            _epoch(request.get("request_time")),
+            _b(request.get("request_id"), ID),
+            _b(request.get("user_id"), ID),
+            _b(request.get("pickup_location"), LOC),
+            _b(request.get("destination"), LOC),
+            _b(request.get("weather", "맑음"), 12),
+            bool(request.get("wheelchair")),
+            bool(request.get("medical_appointment")),
+            match.get("score") == 999,
+            min(pool_size, 255),
+            ASSIGNMENT_MODES.index(assignment_mode(match)),
+            int(request.get("num_vehicles") or 0),
+            int(request.get("num_users") or 0),
+            np.nan if request.get("predicted_wait") is None else float(request["predicted_wait"]),
+            _b(driver.get("driver_id"), ID),
+            _b(driver.get("current_location"), LOC),
+            bool(driver.get("wheelchair_capable")),
+            float(match.get("score", np.nan)),
+            float(components.get("urgency", np.nan)),
+            float(components.get("efficiency", np.nan)),
+            float(components.get("fairness", np.nan)),
+            (time.perf_counter() - received) * 1000 if received is not None else np.nan,
+            len(candidates),
+            [_b(c["driver"].get("driver_id"), ID) for c in candidates] + [b""] * pad,
+            [_b(c["driver"].get("current_location"), LOC) for c in candidates] + [b""] * pad,
+            [bool(c["driver"].get("wheelchair_capable")) for c in candidates] + [False] * pad,
+            [float(c.get("score", np.nan)) for c in candidates] + [np.nan] * pad,
+        )
+
+    # ------------------------------------------
+    # 맵 열기 / 봉인
+    # ------------------------------------------
+    def _open(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._seal_orphans()
+        self._path = self.dir / f"active.{os.getpid()}.npy"
+        if self._path.exists():
+            self._seal(self._path)
+        self._map = np.lib.format.open_memmap(
+            self._path, mode="w+", dtype=RECORD_DTYPE, shape=(self.segment_records,),
+        )
+        self._pos = 0
+
+    def _seal(self, path: Path) -> Optional[Path]:
+        """활성 파일 → segment-<첫 기록 시각>-<pid>.npy (빈 파일은 삭제)"""
+        try:
+            first = float(np.load(path, mmap_mode="r")["ts"][0])
+        except (OSError, ValueError) as e:
+            logger.warning("이벤트 로그 파일 손상, 삭제: %s (%s)", path, e)
+            path.unlink(missing_ok=True)
+            return None
+        if first <= 0:
+            path.unlink(missing_ok=True)
+            return None
+        pid = path.suffixes[0].lstrip(".") if path.suffixes else "0"
+        stamp = datetime.fromtimestamp(first).strftime("%Y%m%d%H%M%S")
+        target = self.dir / f"segment-{stamp}-{pid}.npy"
+        os.replace(path, target)
+        return target
+
+    def _seal_orphans(self):
+        """종료된 워커가 남긴 활성 파일 봉인"""
+        for path in self.dir.glob("active.*.npy"):
+            try:
+                pid = int(path.name.split(".")[1])
+            except (IndexError, ValueError):
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                self._seal(path)
+
+    def _rotate(self):
+        self._map.flush()
+        self._map = None
+        self._seal(self._path)
+        self.rotations += 1
+        segments = sorted(self.dir.glob("segment-*.npy"))
+        for old in segments[: max(len(segments) - self.max_segments, 0)]:
+            old.unlink(missing_ok=True)
+        self._open()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+                self._map = None
+                self._seal(self._path)
+
+    def stats(self) -> Dict[str, Any]:
+        segments = sorted(self.dir.glob("segment-*.npy")) if self.dir.exists() else []
+        return {
+            "enabled": ENABLED,
+            "path": str(self.dir),
+            "record_bytes": RECORD_DTYPE.itemsize,
+            "segment_records": self.segment_records,
+            "active_position": self._pos,
+            "written": self.written,
+            "errors": self.errors,
+            "rotations": self.rotations,
+            "segments": len(segments),
+            "segment_bytes": sum(p.stat().st_size for p in segments),
+            "avg_write_us": round(self.write_ns / max(self.written, 1) / 1000, 2),
+        }
+
+
+dispatch_event_log = DispatchEventLog()
+
+
+# ------------------------------------------
+# 읽기 / 재생 / 내보내기
+# ------------------------------------------
+def _files(directory: Path) -> List[Path]:
+    return sorted(directory.glob("segment-*.npy")) + sorted(directory.glob("active.*.npy"))
+
+
+def read_events(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                directory: Optional[Path] = None, limit: Optional[int] = None) -> np.ndarray:
+    """[since, until) 레코드 (기록 시각 순, limit 이 있으면 가장 최근 limit 건)"""
+    directory = Path(directory or default_event_dir())
+    lo = since.timestamp() if since else 0.0
+    hi = until.timestamp() if until else np.inf
+    parts = []
+    for path in _files(directory):
+        try:
+            data = np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning("이벤트 로그 읽기 실패 %s: %s", path, e)
+            continue
+        if data.dtype != RECORD_DTYPE:
+            logger.warning("레코드 형식이 다른 파일 건너뜀: %s", path)
+            continue
+        ts = data["ts"]
+        # 파일 하나는 한 워커가 순서대로 쓴 것이라 뒤쪽 limit 건만 복사하면 된다
+        idx = np.flatnonzero((ts > 0) & (ts >= lo) & (ts < hi))
+        if limit is not None:
+            idx = idx[len(idx) - min(limit, len(idx)):]
+        if len(idx):
+            parts.append(np.array(data[idx]))
+    if not parts:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    events = np.concatenate(parts)
+    events = events[np.argsort(events["ts"], kind="stable")]
+    return events if limit is None else events[len(events) - min(limit, len(events)):]
+
+
+def to_frame(events: np.ndarray):
+    import pandas as pd
+
+    df = pd.DataFrame({
+        name: events[name] for name in RECORD_DTYPE.names if RECORD_DTYPE[name].shape == ()
+    })
+    for name in _TEXT_FIELDS:
+        df[name] = [_s(v) for v in events[name]]
+    df["assignment"] = [ASSIGNMENT_MODES[k] for k in events["assignment"]]
+    df["ts"] = pd.to_datetime(df["ts"], unit="s")
+    df["request_time"] = pd.to_datetime(df["request_time"].where(df["request_time"] > 0), unit="s", utc=True)
+    n = events["n_candidates"]
+    df["candidates"] = [[_s(v) for v in row[:k]] for row, k in zip(events["cand_id"], n)]
+    df["candidate_scores"] = [row[:k].tolist() for row, k in zip(events["cand_score"], n)]
+    return df
+
+
+def export_parquet(path: Path, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   directory: Optional[Path] = None) -> int:
+    df = to_frame(read_events(since, until, directory))
+    try:
+        df.to_parquet(path, index=False)
+    except ImportError as e:
+        raise RuntimeError("Parquet 내보내기에는 pyarrow 또는 fastparquet 이 필요합니다") from e
+    return len(df)
+
+
+def replay(algorithm, events: np.ndarray, recompute_prediction: bool = False) -> List[Dict[str, Any]]:
+    """
+    기록된 요청·후보 차량으로 algorithm 의 선택을 다시 계산해 기록과 비교
+    recompute_prediction=True 이면 대기시간도 현재 모델로 다시 예측 (긴급도는 기록값 사용)
+    REPLAYABLE 이 아닌 배정 방식은 다시 계산하지 않는다 (same=None)
+    """
+    results = []
+    for e in events:
+        mode = ASSIGNMENT_MODES[int(e["assignment"])]
+        if mode not in REPLAYABLE:
+            results.append({
+                "ts": datetime.fromtimestamp(float(e["ts"])).isoformat(timespec="seconds"),
+                "request_id": _s(e["request_id"]),
+                "assignment": mode,
+                "logged_driver": _s(e["driver_id"]),
+                "same": None,
+            })
+            continue
+        n = int(e["n_candidates"])
+        at = datetime.fromtimestamp(float(e["ts"]))
+        request = {
+            "request_id": _s(e["request_id"]),
+            "user_id": _s(e["user_id"]),
+            "request_time": datetime.fromtimestamp(float(e["request_time"] or e["ts"])),
+            # 배차 당시 시간대 (없으면 재생 시각의 시간대로 예측된다)
+            "hour": at.hour,
+            # ETA·예측 수요도 기록 시각 기준 (dispatch.driver_travel_time / calculate_efficiency_score)
+            "replay_at": at,
+            "pickup_location": _s(e["pickup"]),
+            "destination": _s(e["destination"]),
+            "weather": _s(e["weather"]),
+            "wheelchair": bool(e["wheelchair"]),
+            "medical_appointment": bool(e["medical"]),
+            "num_vehicles": int(e["num_vehicles"]),
+            "num_users": int(e["num_users"]),
+            "predicted_wait": None if recompute_prediction or np.isnan(e["predicted_wait"])
+            else float(e["predicted_wait"]),
+        }
+        drivers = [
+            {"driver_id": _s(e["cand_id"][k]), "current_location": _s(e["cand_location"][k]),
+             "wheelchair_capable": bool(e["cand_wheelchair"][k]), "specialty_areas": []}
+            for k in range(n)
+        ]
+        if mode == "emergency":
+            chosen = algorithm.emergency_dispatch(request, drivers)
+        else:
+            scored = algorithm.score_drivers(request, float(e["urgency"]), drivers)
+            chosen = max(scored, key=lambda m: m["score"]) if scored else None
+        logged = _s(e["driver_id"])
+        replayed = chosen["driver"]["driver_id"] if chosen else None
+        results.append({
+            "ts": datetime.fromtimestamp(float(e["ts"])).isoformat(timespec="seconds"),
+            "request_id": request["request_id"],
+            "assignment": mode,
+            "logged_driver": logged,
+            "replayed_driver": replayed,
+            "logged_score": round(float(e["score"]), 3),
+            "replayed_score": round(float(chosen["score"]), 3) if chosen else None,
+            "same": logged == replayed,
+        })
+    return results
+
+
+def replay_summary(results: List[Dict[str, Any]], limit: int = 20) -> Dict[str, Any]:
+    """일치율은 다시 계산한 배차(REPLAYABLE)만으로, 나머지는 방식별 건수만"""
+    compared = [r for r in results if r["same"] is not None]
+    changed = [r for r in compared if not r["same"]]
+    by_mode: Dict[str, int] = {}
+    for r in results:
+        by_mode[r["assignment"]] = by_mode.get(r["assignment"], 0) + 1
+    return {
+        "events": len(results),
+        "replayed": len(compared),
+        "not_replayed": len(results) - len(compared),
+        "by_assignment": by_mode,
+        "agreement": round(1 - len(changed) / len(compared), 4) if compared else None,
+        "changed": changed[:limit],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="배차 이벤트 로그 조회 / 재생 / Parquet 내보내기")
+    parser.add_argument("command", choices=["stats", "replay", "export"])
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--dir", type=Path, default=None)
+    parser.add_argument("--out", type=Path, default=Path("dispatch_events.parquet"))
+    parser.add_argument("--recompute", action="store_true", help="재생 시 대기시간 재예측")
+    parser.add_argument("--limit", type=int, default=None, help="재생할 최대 이벤트 수 (가장 최근 것부터)")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        rows = export_parquet(args.out, args.since, args.until, args.dir)
+        print(f"{rows}건 → {args.out}")
+        return 0
+    events = read_events(args.since, args.until, args.dir,
+                         args.limit if args.command == "replay" else None)
+    if args.command == "stats":
+        span = (
+            f"{datetime.fromtimestamp(events['ts'][0])} ~ {datetime.fromtimestamp(events['ts'][-1])}"
+            if len(events) else "-"
+        )
+        print(f"{len(events)}건 ({span}), 레코드 {RECORD_DTYPE.itemsize}바이트")
+        return 0
+    from ..dispatch import dispatch_algorithm
+
+    summary = replay_summary(replay(dispatch_algorithm, events, args.recompute))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# serving/core/execution.py
+"""
+CPU 작업 실행 정책 계층
+
+연산(operation) 이름별로 어디서 실행할지 정한다.
+  - inline  : 이벤트 루프에서 바로 실행 (작은 입력)
+  - thread  : 스레드 풀 (GIL 을 놓는 NumPy / XGBoost / lxml / pandas 작업)
+  - process : 프로세스 풀 (순수 파이썬 CPU 작업, 큰 배치)
+
+풀은 모두 크기와 대기열 길이가 제한되어 있고, 가득 차면 지연을 늘리는 대신
+즉시 503(Retry-After)을 돌려준다.
+
+프로세스 풀은 워커(프로세스)마다 처음 사용할 때 forkserver 로 만든다 (없으면 spawn).
+서빙 워커는 이미 스레드 풀·보정 기록·섀도 평가 스레드와 XGBoost(OpenMP)를 가진 상태라
+여기서 fork 하면 자식이 잠긴 락을 물려받아 멈출 수 있다 (launcher.py 주의 사항과 같은 이유).
+forkserver 는 깨끗한 인터프리터에서 serving.dispatch 를 한 번 import 해 두고 풀 작업자를
+그 프로세스에서 fork 하므로, 작업자는 모듈 수준 상태(거리 행렬 등)만 새로 만든 채 시작한다.
+
+환경 변수
+---------
+EXEC_THREAD_WORKERS    스레드 풀 크기 (기본 min(32, CPU+4))
+EXEC_THREAD_QUEUE      스레드 풀 대기열 한도 (기본 64)
+DISPATCH_PROCESS_POOL  프로세스 풀 크기 (기본 2)
+EXEC_PROCESS_QUEUE     프로세스 풀 대기열 한도 (기본 16)
+EXECUTION_POLICIES     연산별 정책 덮어쓰기
+                       예) "dispatch.score=process:200,seoul.parse_table=inline"
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+
+class Policy(str, Enum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+@dataclass(frozen=True)
+class OperationPolicy:
+    policy: Policy
+    # 입력 크기가 min_size 미만이면 오버헤드가 더 크므로 inline 실행
+    min_size: int = 0
+
+
+OPERATION_POLICIES: Dict[str, OperationPolicy] = {
+    # 배차: 운전자별 점수 계산(+XGBoost 예측)
+    "dispatch.score": OperationPolicy(Policy.THREAD, min_size=20),
+    "dispatch.urgency": OperationPolicy(Policy.THREAD),
+    "dispatch.global_optimization": OperationPolicy(Policy.PROCESS, min_size=500),
+    # 대량 배차 후보 선정 (요청 × 차량 거리 행렬, numpy)
+    "dispatch.candidates": OperationPolicy(Policy.THREAD, min_size=10000),
+    # 유휴 차량 재배치 (지역 이동시간 행렬 + 헝가리안)
+    "dispatch.rebalance": OperationPolicy(Policy.THREAD),
+    # 합승 묶음 탐색 (칸 쌍 × 정차 순서)
+    "dispatch.pooling": OperationPolicy(Policy.THREAD, min_size=1000),
+    # 서울시 API 동기 다운로드 + 파싱 (estimate_usage_stats)
+    "usage.estimate_stats": OperationPolicy(Policy.THREAD),
+    # mock 우선순위 점수 (순수 파이썬)
+    "mock.priority_scores": OperationPolicy(Policy.PROCESS, min_size=5000),
+    # pandas groupby / 집계
+    "analysis.aggregate": OperationPolicy(Policy.THREAD),
+    # lxml / openpyxl 표 파싱
+    "seoul.parse_table": OperationPolicy(Policy.THREAD),
+}
+
+
+def _parse_overrides(spec: str) -> Dict[str, OperationPolicy]:
+    overrides = {}
+    for item in filter(None, (x.strip() for x in spec.split(","))):
+        op, _, rule = item.partition("=")
+        policy, _, min_size = rule.partition(":")
+        overrides[op.strip()] = OperationPolicy(Policy(policy.strip()), int(min_size or 0))
+    return overrides
+
+
+OPERATION_POLICIES.update(_parse_overrides(os.getenv("EXECUTION_POLICIES", "")))
+
+
+class ExecutorOverloaded(HTTPException):
+    def __init__(self, name: str):
+        super().__init__(
+            status_code=503,
+            detail=f"서버가 혼잡합니다 ({name} 대기열 초과). 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": "1"},
+        )
+
+
+# ────────────────────────────────────────────────────────────────
+# 크기 제한 실행기
+# ────────────────────────────────────────────────────────────────
+def _timed_call(fn: Callable[..., Any], args: Tuple, kwargs: Dict) -> Tuple[Any, float, float]:
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+class BoundedExecutor:
+    """동시에 max_workers + max_queue 개까지만 받는 실행기 래퍼 (이벤트 루프 스레드 전용)"""
+
+    def __init__(self, name: str, factory: Callable[[], Executor], max_workers: int, max_queue: int):
+        self.name = name
+        self.factory = factory
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._pid: Optional[int] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def executor(self) -> Executor:
+        # fork 된 워커가 부모의 풀을 그대로 쓰지 않도록 pid 로 구분
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = self.factory()
+            self._pid = os.getpid()
+        return self._executor
+
+    async def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise ExecutorOverloaded(self.name)
+
+        self.in_flight += 1
+        self.submitted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        queued_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(
+                self.executor(), functools.partial(_timed_call, fn, args, kwargs)
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.total_wait += max(started - queued_at, 0.0)
+        self.total_run += finished - started
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        done = max(self.completed, 1)
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": max(self.in_flight - self.max_workers, 0),
+            "peak_in_flight": self.peak_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / done * 1000, 3),
+            "avg_run_ms": round(self.total_run / done * 1000, 3),
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor, self._pid = None, None
+
+
+# 풀 작업자가 받는 작업 함수가 있는 모듈 (serving.dispatch)
+_PRELOAD = [f"{__name__.rsplit('.core.', 1)[0]}.dispatch"]
+
+
+def _process_factory(max_workers: int) -> Callable[[], Executor]:
+    def factory() -> Executor:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(_PRELOAD)
+        else:
+            ctx = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx)
+    return factory
+
+
+_THREAD_WORKERS = int(os.getenv("EXEC_THREAD_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+_PROCESS_WORKERS = int(os.getenv("DISPATCH_PROCESS_POOL", "2"))
+
+EXECUTORS: Dict[Policy, BoundedExecutor] = {
+    Policy.THREAD: BoundedExecutor(
+        "thread",
+        lambda: ThreadPoolExecutor(max_workers=_THREAD_WORKERS, thread_name_prefix="serving-cpu"),
+        _THREAD_WORKERS,
+        int(os.getenv("EXEC_THREAD_QUEUE", "64")),
+    ),
+    Policy.PROCESS: BoundedExecutor(
+        "process",
+        _process_factory(_PROCESS_WORKERS),
+        _PROCESS_WORKERS,
+        int(os.getenv("EXEC_PROCESS_QUEUE", "16")),
+    ),
+}
+
+
+# ────────────────────────────────────────────────────────────────
+# 공개 API
+# ────────────────────────────────────────────────────────────────
+def resolve(op: str, size: int = 1) -> Policy:
+    rule = OPERATION_POLICIES.get(op)
+    if rule is None or size < rule.min_size:
+        return Policy.INLINE
+    return rule.policy
+
+
+async def run(op: str, fn: Callable[..., Any], *args, size: int = 1, **kwargs) -> Any:
+    """
+    정책에 따라 fn(*args, **kwargs) 실행.
+    process 정책에 쓰는 fn 은 모듈 최상위 함수여야 한다 (pickle 가능).
+    """
+    policy = resolve(op, size)
+    if policy is Policy.INLINE:
+        return fn(*args, **kwargs)
+    return await EXECUTORS[policy].submit(fn, *args, **kwargs)
+
+
+def metrics() -> Dict[str, Any]:
+    return {
+        "executors": {policy.value: ex.metrics() for policy, ex in EXECUTORS.items()},
+        "policies": {
+            op: {"policy": rule.policy.value, "min_size": rule.min_size}
+            for op, rule in OPERATION_POLICIES.items()
+        },
+    }
+
+
+def shutdown(wait: bool = True):
+    for ex in EXECUTORS.values():
+        ex.shutdown(wait=wait)
@@ -1,16 +1,41 @@
-import google.generativeai as genai
-from .utils import get_env  # utils.py가 core 폴더 안에 있다고 가정
+import threading
+import time
 
-# Gemini API Key 설정
-GEMINI_API_KEY = get_env("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+from .startup import lazy_import
+from .utils import get_env
+from . import upstream
+
+# google.generativeai 는 import 만 1초 이상 걸리므로 첫 호출 때 불러온다
+genai = lazy_import("google.generativeai")
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def _configure():
+    """Gemini API Key 설정 (첫 호출 시 한 번, 키가 없으면 호출 시점에 RuntimeError)"""
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if not _configured:
+            genai.configure(api_key=get_env("GEMINI_API_KEY"))
+            _configured = True
 
 
 async def ask_gemini_model(prompt: str) -> str:
     """
     Gemini 모델을 호출하여 텍스트 응답을 반환
+    (UPSTREAM_MODE=replay 이면 녹화된 응답, record 이면 호출 결과를 녹화)
     """
+    mode = upstream.upstream_mode()
+    if mode == "replay":
+        return await upstream.replay_gemini(prompt)
+
+    _configure()
+    t0 = time.perf_counter()
     model = genai.GenerativeModel("gemini-2.5-pro")
     response = model.generate_content(prompt)
+    if mode == "record":
+        upstream.record_gemini(prompt, response.text, (time.perf_counter() - t0) * 1000)
     return response.text
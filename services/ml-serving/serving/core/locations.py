@@ -0,0 +1,228 @@
+"""
+지역명 정규화 사전 + 지역별 그룹 인덱스
+
+사용량 표의 출발지 원문("서울특별시 강남구 역삼동", "강남구", "강남" …)과 사용자 입력을
+표준 자치구 코드로 바꾼다. 예전처럼 매 호출마다 str.contains 로 모든 행을 정규식 검사하지 않고,
+- 원문 문자열 → 자치구 는 고유값 단위로 한 번만 해석(lru_cache)하고
+- 표는 categorical 자치구 열 + 자치구별 행 위치/합계를 미리 만들어 두어
+  지역별 집계가 dict 조회 한 번이 된다.
+
+부분 문자열 오매칭("중구" ⊂ "중구청", "강서" ⊂ "강서로")을 막기 위해
+별칭은 토큰 경계에서만 인정한다 (토큰 전체가 별칭이거나, "○○구" 뒤에 동/로 이름이 붙은 경우).
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 서울 25개 자치구 (행정구역 코드)
+SEOUL_DISTRICTS: Dict[str, str] = {
+    "종로구": "11110", "중구": "11140", "용산구": "11170", "성동구": "11200", "광진구": "11215",
+    "동대문구": "11230", "중랑구": "11260", "성북구": "11290", "강북구": "11305", "도봉구": "11320",
+    "노원구": "11350", "은평구": "11380", "서대문구": "11410", "마포구": "11440", "양천구": "11470",
+    "강서구": "11500", "구로구": "11530", "금천구": "11545", "영등포구": "11560", "동작구": "11590",
+    "관악구": "11620", "서초구": "11650", "강남구": "11680", "송파구": "11710", "강동구": "11740",
+}
+DISTRICT_NAMES: List[str] = list(SEOUL_DISTRICTS)
+
+# 자치구 대표 좌표 (구청 위치, 위도·경도)
+DISTRICT_CENTROIDS: Dict[str, Tuple[float, float]] = {
+    "종로구": (37.5735, 126.9790), "중구": (37.5641, 126.9979), "용산구": (37.5326, 126.9905),
+    "성동구": (37.5634, 127.0369), "광진구": (37.5385, 127.0823), "동대문구": (37.5744, 127.0396),
+    "중랑구": (37.6066, 127.0927), "성북구": (37.5894, 127.0167), "강북구": (37.6396, 127.0257),
+    "도봉구": (37.6688, 127.0471), "노원구": (37.6542, 127.0568), "은평구": (37.6027, 126.9291),
+    "서대문구": (37.5791, 126.9368), "마포구": (37.5663, 126.9019), "양천구": (37.5170, 126.8665),
+    "강서구": (37.5509, 126.8495), "구로구": (37.4954, 126.8874), "금천구": (37.4568, 126.8954),
+    "영등포구": (37.5264, 126.8962), "동작구": (37.5124, 126.9393), "관악구": (37.4784, 126.9516),
+    "서초구": (37.4837, 127.0324), "강남구": (37.5172, 127.0473), "송파구": (37.5145, 127.1059),
+    "강동구": (37.5301, 127.1238),
+}
+
+# 시 단위 접두어 (무시)
+CITY_PREFIXES = ("서울특별시", "서울시", "서울")
+
+# "○○구" 뒤에 붙어도 다른 장소를 뜻하는 접미어 (중구청, 강남구보건소 …)
+NON_AREA_SUFFIXES = ("청", "보건소", "의회", "민")
+
+_SPLIT = re.compile(r"[\s,/()\[\]·\-]+")
+
+
+def _aliases() -> Dict[str, str]:
+    aliases: Dict[str, str] = {}
+    for name in DISTRICT_NAMES:
+        aliases[name] = name
+        short = name[:-1]
+        # "중구" → "중" 같은 한 글자 약칭은 너무 모호하므로 제외
+        if len(short) >= 2:
+            aliases[short] = name
+    return aliases
+
+
+ALIASES: Dict[str, str] = _aliases()
+
+
+class _Trie:
+    """문자 단위 trie — 토큰 앞부분에서 가장 긴 별칭을 찾는다"""
+
+    def __init__(self, words: Dict[str, str]):
+        self.root: Dict[str, dict] = {}
+        for word, value in words.items():
+            node = self.root
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[""] = value
+
+    def longest_prefix(self, text: str) -> Tuple[Optional[str], int]:
+        node, found, length = self.root, None, 0
+        for i, ch in enumerate(text):
+            node = node.get(ch)
+            if node is None:
+                break
+            if "" in node:
+                found, length = node[""], i + 1
+        return found, length
+
+
+_TRIE = _Trie(ALIASES)
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", str(text)).strip()
+
+
+def _strip_city(token: str) -> str:
+    for prefix in CITY_PREFIXES:
+        if token.startswith(prefix):
+            return token[len(prefix):]
+    return token
+
+
+def _resolve_token(token: str) -> Optional[str]:
+    token = _strip_city(token)
+    if not token:
+        return None
+    district, length = _TRIE.longest_prefix(token)
+    if district is None:
+        return None
+    rest = token[length:]
+    if not rest:
+        return district
+    # "강남구역삼동" 처럼 붙여 쓴 경우: 완전한 "○○구" 뒤에 동/로 이름이 오면 인정
+    matched = token[:length]
+    if matched.endswith("구") and not rest.startswith(NON_AREA_SUFFIXES):
+        return district
+    return None
+
+
+@lru_cache(maxsize=65536)
+def resolve(text) -> Optional[str]:
+    """원문 지역명/사용자 입력 → 표준 자치구명 (예: "강남구"), 해석 불가면 None"""
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return None
+    text = _normalize(text)
+    if text in ALIASES:
+        return ALIASES[text]
+    for token in _SPLIT.split(text):
+        district = _resolve_token(token)
+        if district is not None:
+            return district
+    return None
+
+
+def district_code(text) -> Optional[str]:
+    district = resolve(text)
+    return SEOUL_DISTRICTS.get(district) if district else None
+
+
+# ==========================================
+# 지역 인덱스가 붙은 표
+# ==========================================
+class LocationTable:
+    """
+    df 에 categorical 자치구 열을 붙이고 자치구별 행 위치와 숫자 열 합계를 미리 계산
+    """
+
+    DISTRICT_COLUMN = "자치구"
+
+    def __init__(self, df: pd.DataFrame, column: str = "출발지"):
+        if column not in df.columns:
+            raise KeyError(f"지역 열 '{column}' 없음: {df.columns.tolist()}")
+        raw = df[column]
+        # 고유값만 해석 (행 수가 아니라 서로 다른 출발지 문자열 수만큼)
+        mapping = {value: resolve(value) for value in pd.unique(raw)}
+        districts = pd.Categorical(raw.map(mapping), categories=DISTRICT_NAMES)
+
+        self.df = df.assign(**{self.DISTRICT_COLUMN: districts})
+        self.column = column
+        grouped = self.df.groupby(self.DISTRICT_COLUMN, observed=True, sort=False)
+        self.positions: Dict[str, np.ndarray] = {str(k): v for k, v in grouped.indices.items()}
+        numeric = self.df.select_dtypes("number").columns
+        self.totals: Dict[str, Dict[str, float]] = (
+            grouped[list(numeric)].sum().to_dict("index") if len(numeric) else {}
+        )
+        self.unresolved = int(pd.isna(districts).sum())
+
+    def rows(self, location: str) -> pd.DataFrame:
+        district = resolve(location)
+        pos = self.positions.get(district) if district else None
+        if pos is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[pos]
+
+    def total(self, location: str, column: str, default: float = 0) -> float:
+        district = resolve(location)
+        return self.totals.get(district, {}).get(column, default) if district else default
+
+    def stats(self) -> Dict[str, int]:
+        return {"rows": len(self.df), "districts": len(self.positions), "unresolved": self.unresolved}
+
+
+class TableCache:
+    """
+    날짜별 LocationTable TTL 캐시 (같은 날짜 표를 요청마다 다시 받고 색인하지 않도록)
+    """
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str], Tuple[float, LocationTable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[LocationTable]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], table: LocationTable) -> LocationTable:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (time.monotonic() + self.ttl, table)
+        return table
+
+    def get_or_build(self, key: Tuple[str, str], build: Callable[[], LocationTable]) -> LocationTable:
+        table = self.get(key)
+        return table if table is not None else self.put(key, build())
+
+    def invalidate(self, date: Optional[str] = None):
+        with self._lock:
+            if date is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[1] == date]:
+                    del self._entries[key]
+
+
+# 날짜별 사용량 표 (public_api 동기 경로 / seoul_api 비동기 경로 공용)
+usage_tables = TableCache(ttl=float(os.getenv("USAGE_TABLE_TTL", "600")))
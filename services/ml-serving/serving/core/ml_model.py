@@ -1,19 +1,94 @@
 from __future__ import annotations
-import joblib
+import json
+import threading
 import pandas as pd
 from datetime import datetime
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
 from .utils import model_dir
 from .public_api import estimate_usage_stats
+from . import prediction_grid
+from .startup import lazy_import, readiness
+from .calibration import wait_calibrator
+
+# joblib unpickle 시 xgboost/sklearn 까지 import 되므로 모델을 실제로 읽을 때까지 미룬다
+joblib = lazy_import("joblib")
+
+FEATURE_COLUMNS = ['시간대', '위치_encoded', '날씨_encoded', '휠체어YN', '해당지역운행차량수', '해당지역이용자수']
 
 # 모델 로드
-def load_model_assets() -> Tuple[Any, Any, Any]:
+def load_model_assets(with_grid: bool = True) -> Tuple[Any, Any, Any]:
+    """
+    with_grid=False: 모델·인코더만 읽는다 (예측 없음). pre-fork 런처의 마스터는 XGBoost(OpenMP)를
+    실행하면 안 되므로 이렇게 적재하고, 격자는 fork 이후 워커가 ensure_prediction_grid() 로 붙인다.
+    """
     mdir = model_dir()
     model = joblib.load(mdir / "model.pkl")
     le_loc = joblib.load(mdir / "le_loc.pkl")
     le_weather = joblib.load(mdir / "le_weather.pkl")
+    if with_grid:
+        _attach_grid(model, le_loc, le_weather)
     return model, le_loc, le_weather
 
+
+def _attach_grid(model, le_loc, le_weather):
+    # PREDICTION_GRID=1 이면 이산 피처 조합 전체를 미리 예측해 둔 격자를 연결
+    if not prediction_grid.GRID_ENABLED:
+        return
+    model_path = model_dir() / "model.pkl"
+    try:
+        prediction_grid.attach_grid(
+            model, le_loc, le_weather, FEATURE_COLUMNS,
+            cache_key=(str(model_path), model_path.stat().st_mtime),
+        )
+    except Exception as e:
+        print(f"⚠️ 예측 격자 생성 실패, 모델 직접 호출 사용: {e}")
+
+
+# 프로세스 공용 모델 (import 시점이 아니라 첫 사용 또는 startup 백그라운드 적재 시 로드)
+_assets: Tuple[Any, Any, Any] | None = None
+_assets_lock = threading.Lock()
+readiness.register("model")
+
+
+def get_model_assets(with_grid: bool = True) -> Tuple[Any, Any, Any]:
+    global _assets
+    if _assets is None:
+        with _assets_lock:
+            if _assets is None:
+                _assets = readiness.load("model", lambda: load_model_assets(with_grid))
+    return _assets
+
+
+def ensure_prediction_grid():
+    """격자 없이 적재된 모델(런처 마스터에서 물려받은 것)에 격자 연결 — fork 이후 워커에서 호출"""
+    if prediction_grid.GRID_ENABLED and prediction_grid.grid_for(get_model_assets()[0]) is None:
+        _attach_grid(*get_model_assets())
+
+
+def reload_model_assets() -> Tuple[Any, Any, Any]:
+    """재학습으로 모델 파일이 바뀌었을 때 (core/calibration.py)"""
+    global _assets
+    assets = load_model_assets()
+    with _assets_lock:
+        _assets = assets
+    return assets
+
+
+def model_profile() -> Dict[str, Any] | None:
+    """training/tune.py 가 모델과 함께 내보낸 파라미터·MAE·지연 프로파일"""
+    path = model_dir() / "model_profile.json"
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def model_mtime() -> float | None:
+    try:
+        return (model_dir() / "model.pkl").stat().st_mtime
+    except FileNotFoundError:
+        return None
+
 # 예측용 데이터프레임 생성
 def build_predict_dataframe(
     시간대: int,
@@ -25,7 +100,7 @@ def build_predict_dataframe(
 ) -> pd.DataFrame:
     return pd.DataFrame(
         [[시간대, loc_encoded, weather_encoded, 휠체어YN, 해당지역운행차량수, 해당지역이용자수]],
-        columns=['시간대', '위치_encoded', '날씨_encoded', '휠체어YN', '해당지역운행차량수', '해당지역이용자수']
+        columns=FEATURE_COLUMNS
     )
 
 # 요청 기반 예측
@@ -44,13 +119,24 @@ def predict_waiting_time_from_request(
     weather = request_dict.get("weather", "맑음")
     wheelchair_yn = 1 if request_dict.get("wheelchair", False) else 0
 
-    try:
-        est_vehicles, est_users = estimate_usage_stats(loc)
-    except:
-        est_vehicles, est_users = default_vehicle_count, default_user_count
+    # 배차 경로는 num_vehicles/num_users 를 이미 채워 오므로 그때는 공공데이터를 다시 받지 않는다
+    num_vehicles = request_dict.get("num_vehicles")
+    num_users = request_dict.get("num_users")
+    if num_vehicles is None or num_users is None:
+        try:
+            est_vehicles, est_users = estimate_usage_stats(loc)
+        except:
+            est_vehicles, est_users = default_vehicle_count, default_user_count
+        num_vehicles = est_vehicles if num_vehicles is None else num_vehicles
+        num_users = est_users if num_users is None else num_users
 
-    num_vehicles = request_dict.get("num_vehicles", est_vehicles)
-    num_users = request_dict.get("num_users", est_users)
+    grid = prediction_grid.grid_for(model)
+    if grid is not None:
+        pred = grid.lookup(hour, loc, weather, wheelchair_yn, num_vehicles, num_users)
+        if pred is not None:
+            # 보정 전 값 (결과 학습은 raw 기준 잔차, 보정 후 값은 0 으로 잘릴 수 있다)
+            request_dict["raw_wait"] = float(pred)
+            return wait_calibrator.correct(loc, hour, pred)
 
     try:
         loc_encoded = int(le_loc.transform([loc])[0])
@@ -63,7 +149,61 @@ def predict_waiting_time_from_request(
         num_vehicles, num_users,
     )
     pred = model.predict(df)[0]
-    return float(pred)
+    request_dict["raw_wait"] = float(pred)
+    # 배차 결과로 학습한 (자치구, 시간대) 잔차 보정
+    return wait_calibrator.correct(loc, hour, float(pred))
+
+# 여러 요청을 모델 1회 호출로 예측 (배치 배차용)
+def predict_waiting_times(
+    model,
+    le_loc,
+    le_weather,
+    request_dicts: List[Dict[str, Any]],
+    *,
+    default_hour: int = None,
+    default_vehicle_count: int = 10,
+    default_user_count: int = 20,
+) -> List[float]:
+    hour_default = default_hour if default_hour is not None else datetime.now().hour
+    preds = [999.0] * len(request_dicts)
+    grid = prediction_grid.grid_for(model)
+    rows, positions = [], []
+    for i, r in enumerate(request_dicts):
+        if grid is not None:
+            pred = grid.lookup(
+                r.get("hour") or hour_default,
+                r.get("pickup_location"),
+                r.get("weather", "맑음"),
+                1 if r.get("wheelchair", False) else 0,
+                r.get("num_vehicles", default_vehicle_count),
+                r.get("num_users", default_user_count),
+            )
+            if pred is not None:
+                r["raw_wait"] = float(pred)
+                preds[i] = wait_calibrator.correct(r.get("pickup_location"), r.get("hour") or hour_default, pred)
+                continue
+        try:
+            loc_encoded = int(le_loc.transform([r.get("pickup_location")])[0])
+            weather_encoded = int(le_weather.transform([r.get("weather", "맑음")])[0])
+        except Exception:
+            continue
+        rows.append([
+            r.get("hour") or hour_default,
+            loc_encoded,
+            weather_encoded,
+            1 if r.get("wheelchair", False) else 0,
+            r.get("num_vehicles", default_vehicle_count),
+            r.get("num_users", default_user_count),
+        ])
+        positions.append(i)
+
+    if rows:
+        out = model.predict(pd.DataFrame(rows, columns=FEATURE_COLUMNS))
+        for i, pred in zip(positions, out):
+            r = request_dicts[i]
+            r["raw_wait"] = float(pred)
+            preds[i] = wait_calibrator.correct(r.get("pickup_location"), r.get("hour") or hour_default, float(pred))
+    return preds
 
 # DispatchRequest 객체 기반 피처 추출
 def extract_features(request) -> list:
@@ -0,0 +1,260 @@
+"""
+합승(풀링) 묶음 — 같은 방향으로 가는 호환 요청을 한 차량에 태우고 정차 순서를 정한다
+
+CallRequest 하나에 차량 한 대가 배정되어, 같은 시간에 같은 지역 사이를 이동하는 일반 승객 둘도
+각각 차량을 차지했다. 합승 모드에서는 배정 전에
+- 호환되는 요청(휠체어·병원 예약 아님, weather·special_requirements 동일)을
+  (출발 지역, 도착 지역) 칸으로 모으고
+- 출발지끼리·도착지끼리 POOL_RADIUS_KM 안인 칸 쌍마다 가능한 정차 순서를 모두 따져
+  (픽업이 하차보다 먼저, 승객별 우회 한도 안) 운행 시간이 가장 짧은 경로를 구한 뒤
+- 단독 운행 시간 합 대비 절약이 큰 칸 쌍부터 요청을 짝지어 묶음(Pool)을 만든다
+  (POOL_MAX_GROUP=3 이면 만들어진 짝에 세 번째 요청을 붙여 더 줄어드는지 본다)
+
+지역 단위 이동시간은 칸 쌍마다 한 번만 계산하므로 요청 수가 많아도 비용은 칸 수에 좌우된다.
+묶음의 첫 픽업 요청(lead)만 차량 배정에 들어가고 나머지는 같은 차량을 받는다 (dispatch_engine.assign_requests).
+
+환경 변수
+---------
+DISPATCH_POOLING          1 이면 배치 엔진(DispatchBatcher)에서 합승 묶음 사용 (기본 0)
+POOL_MAX_GROUP            한 차량에 묶는 최대 요청 수 (2~3, 기본 2)
+POOL_MAX_DETOUR_RATIO     승객별 탑승 시간 한도 = 단독 이동 × 비율 (기본 1.5)
+POOL_MAX_DETOUR_MINUTES   승객별 추가 탑승 시간 상한 (기본 10)
+POOL_RADIUS_KM            출발지끼리, 도착지끼리 이 거리 안이어야 후보 (기본 4)
+POOL_MIN_SAVING_MINUTES   단독 운행 합 대비 이만큼 줄어야 묶음 (기본 3)
+POOL_STOP_MINUTES         같은 지역 안 정차 간 이동·승하차 시간 (기본 3)
+"""
+from __future__ import annotations
+
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+POOLING = os.getenv("DISPATCH_POOLING", "0") == "1"
+MAX_GROUP = min(max(int(os.getenv("POOL_MAX_GROUP", "2")), 2), 3)
+MAX_DETOUR_RATIO = float(os.getenv("POOL_MAX_DETOUR_RATIO", "1.5"))
+MAX_DETOUR_MINUTES = float(os.getenv("POOL_MAX_DETOUR_MINUTES", "10"))
+RADIUS_KM = float(os.getenv("POOL_RADIUS_KM", "4"))
+MIN_SAVING_MINUTES = float(os.getenv("POOL_MIN_SAVING_MINUTES", "3"))
+STOP_MINUTES = float(os.getenv("POOL_STOP_MINUTES", "3"))
+
+# (출발 지역, 도착 지역, 날씨) → 분 (모르는 지역이면 None)
+TravelFn = Callable[[str, str, str], Optional[float]]
+# (지역, 지역) → km (모르는 지역이면 None)
+DistanceFn = Callable[[str, str], Optional[float]]
+
+# (호환 키, 출발 지역, 도착 지역)
+Bucket = Tuple[tuple, str, str]
+
+
+@dataclass
+class Stop:
+    request_id: str
+    action: str              # pickup / dropoff
+    location: str
+    offset_minutes: float    # 첫 픽업부터 경과 시간
+
+
+@dataclass
+class Pool:
+    members: List[int]                # 입력 요청 인덱스 (첫 픽업 요청이 members[0])
+    requests: List[Dict[str, Any]]    # members 순서
+    stops: List[Stop]
+    duration: float                   # 첫 픽업 → 마지막 하차
+    solo_duration: float              # 단독 배차 시 운행 시간 합
+    ride_minutes: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def lead(self) -> Dict[str, Any]:
+        return self.requests[0]
+
+    @property
+    def saved_minutes(self) -> float:
+        return self.solo_duration - self.duration
+
+    def pickup_offset(self, request_id: str) -> float:
+        return next(s.offset_minutes for s in self.stops if s.request_id == request_id and s.action == "pickup")
+
+    def summary(self, request_id: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "pool_id": f"pool-{self.lead['request_id']}",
+            "size": len(self.members),
+            "shared_with": [r["request_id"] for r in self.requests if r["request_id"] != request_id],
+            "stops": [
+                {"request_id": s.request_id, "action": s.action, "location": s.location,
+                 "offset_minutes": round(s.offset_minutes, 1)}
+                for s in self.stops
+            ],
+            "ride_minutes": round(self.ride_minutes[request_id], 1) if request_id in self.ride_minutes else None,
+            "saved_vehicle_minutes": round(self.saved_minutes, 1),
+        }
+
+
+def pooling_key(request: Dict[str, Any]) -> Optional[tuple]:
+    """합승 가능한 요청끼리 같은 키 (불가하면 None)"""
+    if request.get("wheelchair") or request.get("medical_appointment"):
+        return None
+    return request.get("weather", "맑음"), tuple(sorted(request.get("special_requirements") or ()))
+
+
+def max_ride_minutes(direct: float) -> float:
+    extra = min(max(direct * (MAX_DETOUR_RATIO - 1), STOP_MINUTES), MAX_DETOUR_MINUTES)
+    return direct + extra
+
+
+def _sequences(n: int) -> Iterator[List[Tuple[int, bool]]]:
+    """
+    n 명의 (승객, 픽업 여부) 정차 순서 — 픽업이 하차보다 먼저이고
+    마지막 픽업 전에 차가 비지 않는 순서만 (비면 합승이 아니라 연속 단독 운행)
+    """
+    def _walk(seq, picked, dropped):
+        if len(seq) == 2 * n:
+            yield list(seq)
+            return
+        onboard = len(picked) - len(dropped)
+        for k in range(n):
+            if k not in picked:
+                seq.append((k, True))
+                yield from _walk(seq, picked | {k}, dropped)
+                seq.pop()
+            elif k not in dropped and (onboard > 1 or len(picked) == n):
+                seq.append((k, False))
+                yield from _walk(seq, picked, dropped | {k})
+                seq.pop()
+
+    yield from _walk([], frozenset(), frozenset())
+
+
+_SEQUENCES = {n: list(_sequences(n)) for n in (2, 3)}
+
+
+def best_route(
+    trips: List[Tuple[str, str]], leg: Callable[[str, str], float]
+) -> Optional[Tuple[List[Tuple[int, bool, str, float]], float, List[float], float]]:
+    """
+    trips[k] = (출발 지역, 도착 지역)
+    반환: (정차 [(k, 픽업 여부, 지역, 경과 분)], 총 운행 분, 승객별 탑승 분, 단독 운행 합) 또는 None
+    """
+    direct = [leg(o, d) for o, d in trips]
+    limits = [max_ride_minutes(t) for t in direct]
+    best = None
+    for seq in _SEQUENCES[len(trips)]:
+        t, loc, ok = 0.0, None, True
+        picked_at, ride, stops = {}, [0.0] * len(trips), []
+        for k, pickup in seq:
+            target = trips[k][0] if pickup else trips[k][1]
+            if loc is not None:
+                t += leg(loc, target)
+            loc = target
+            if pickup:
+                picked_at[k] = t
+            else:
+                ride[k] = t - picked_at[k]
+                if ride[k] > limits[k]:
+                    ok = False
+                    break
+            stops.append((k, pickup, target, t))
+        if ok and (best is None or t < best[1]):
+            best = (stops, t, ride, sum(direct))
+    return best
+
+
+def plan_pools(
+    requests: List[Dict[str, Any]],
+    travel: TravelFn,
+    distance: DistanceFn,
+    max_group: int = MAX_GROUP,
+) -> List[Pool]:
+    """
+    requests 는 우선순위 순 (같은 칸 안에서는 앞선 요청부터 묶는다)
+    반환된 Pool 에 들어가지 않은 요청은 단독 배차
+    """
+    buckets: Dict[Bucket, Deque[int]] = {}
+    for i, r in enumerate(requests):
+        key = pooling_key(r)
+        o, d = r.get("pickup_location"), r.get("destination")
+        if key is None or o is None or d is None or travel(o, d, key[0]) is None:
+            continue
+        buckets.setdefault((key, o, d), deque()).append(i)
+    if sum(len(v) for v in buckets.values()) < 2:
+        return []
+
+    def near(a: str, b: str) -> bool:
+        if a == b:
+            return True
+        km = distance(a, b)
+        return km is not None and km <= RADIUS_KM
+
+    def compatible(group: Tuple[Bucket, ...], other: Bucket) -> bool:
+        return all(b[0] == other[0] and near(b[1], other[1]) and near(b[2], other[2]) for b in group)
+
+    routes: Dict[Tuple[Bucket, ...], Any] = {}
+
+    def route(group: Tuple[Bucket, ...]):
+        if group not in routes:
+            weather = group[0][0][0]
+
+            def leg(a: str, b: str) -> float:
+                return STOP_MINUTES if a == b else travel(a, b, weather)
+
+            routes[group] = best_route([(b[1], b[2]) for b in group], leg)
+        return routes[group]
+
+    def saving(group: Tuple[Bucket, ...]) -> Optional[float]:
+        r = route(group)
+        return None if r is None else r[3] - r[1]
+
+    # ① 칸 쌍별 절약 시간
+    keys = list(buckets)
+    pairs = []
+    for a, ka in enumerate(keys):
+        for kb in keys[a:]:
+            if ka == kb and len(buckets[ka]) < 2:
+                continue
+            if not compatible((ka,), kb):
+                continue
+            s = saving((ka, kb))
+            if s is not None and s >= MIN_SAVING_MINUTES:
+                pairs.append((s, ka, kb))
+    pairs.sort(key=lambda p: -p[0])
+
+    # ② 절약이 큰 칸 쌍부터 짝짓기
+    groups: List[List[Tuple[Bucket, int]]] = []
+    for _, ka, kb in pairs:
+        while len(buckets[ka]) >= (2 if ka == kb else 1) and buckets[kb]:
+            groups.append([(ka, buckets[ka].popleft()), (kb, buckets[kb].popleft())])
+
+    # ③ 세 번째 요청 추가
+    if max_group >= 3:
+        for group in groups:
+            current = tuple(b for b, _ in group)
+            base, best = saving(current), None
+            for kc, members in buckets.items():
+                if not members or not compatible(current, kc):
+                    continue
+                s = saving(current + (kc,))
+                if s is not None and s >= base + MIN_SAVING_MINUTES and (best is None or s > best[0]):
+                    best = (s, kc)
+            if best is not None:
+                group.append((best[1], buckets[best[1]].popleft()))
+
+    return [_build_pool(requests, group, route(tuple(b for b, _ in group))) for group in groups]
+
+
+def _build_pool(requests: List[Dict[str, Any]], group: List[Tuple[Bucket, int]], plan) -> Pool:
+    stops, duration, ride, solo = plan
+    indices = [i for _, i in group]
+    # 첫 픽업 요청을 lead 로
+    order = [k for k, pickup, _, _ in stops if pickup]
+    members = [indices[k] for k in order]
+    return Pool(
+        members=members,
+        requests=[requests[i] for i in members],
+        stops=[
+            Stop(requests[indices[k]]["request_id"], "pickup" if pickup else "dropoff", loc, t)
+            for k, pickup, loc, t in stops
+        ],
+        duration=duration,
+        solo_duration=solo,
+        ride_minutes={requests[indices[k]]["request_id"]: ride[k] for k in range(len(indices))},
+    )
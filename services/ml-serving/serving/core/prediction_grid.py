@@ -0,0 +1,202 @@
+"""
+대기시간 모델 사전 계산 격자 (선택 모드, PREDICTION_GRID=1)
+
+모델 피처 중 시간대(24)·위치·날씨·휠체어(2)는 작은 이산 도메인이다.
+모델 로드 시 이 조합 전체 × 운행차량수/이용자수 구간점에 대한 예측을 한 번에 계산해
+밀집 텐서 [시간대, 위치, 날씨, 휠체어, 차량 구간, 이용자 구간] 로 저장하고,
+이후 예측은 인덱스 조회 + 차량/이용자 축 쌍선형 보간으로 처리한다.
+
+- 구간점(step 1)이 정수 입력과 일치하면 XGBoost 결과와 (float32 범위에서) 동일하다.
+- 빌드 직후 구간 범위 안의 임의 실수 입력(구간점 사이 보간 오차 포함)으로 실제 모델과 비교한
+  오차(max/p99/mean)를 기록하고,
+  최대 오차가 PREDICTION_GRID_MAX_ERROR(분) 를 넘으면 격자를 쓰지 않는다.
+- 격자 밖 입력(미등록 위치/날씨, 범위를 벗어난 차량·이용자 수)은 None → 실제 모델로 폴백.
+"""
+from __future__ import annotations
+
+import os
+import time
+import weakref
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+HOURS = 24
+
+
+def _parse_range(value: str) -> np.ndarray:
+    """'start:stop:step' → 구간점 배열 (stop 포함)"""
+    start, stop, step = (float(x) for x in value.split(":"))
+    return np.arange(start, stop + step / 2, step)
+
+
+class PredictionGrid:
+    def __init__(self, model, le_loc, le_weather, vehicle_bins: Sequence[float], user_bins: Sequence[float],
+                 feature_columns: Sequence[str]):
+        self.loc_index = {str(name): i for i, name in enumerate(le_loc.classes_)}
+        self.weather_index = {str(name): i for i, name in enumerate(le_weather.classes_)}
+        self.loc_codes = le_loc.transform(le_loc.classes_).astype(int)
+        self.weather_codes = le_weather.transform(le_weather.classes_).astype(int)
+        self.vehicle_bins = np.asarray(vehicle_bins, dtype=float)
+        self.user_bins = np.asarray(user_bins, dtype=float)
+        self.feature_columns = list(feature_columns)
+        self.error: Dict[str, float] = {}
+        self.build_seconds = 0.0
+        self.table = self._build(model)
+
+    # ------------------------------------------
+    # 빌드 / 검증
+    # ------------------------------------------
+    def _build(self, model) -> np.ndarray:
+        started = time.perf_counter()
+        nl, nw = len(self.loc_codes), len(self.weather_codes)
+        nv, nu = len(self.vehicle_bins), len(self.user_bins)
+        table = np.empty((HOURS, nl, nw, 2, nv, nu), dtype=np.float32)
+
+        # 시간대별로 나눠 예측 (한 번에 수백만 행을 만들지 않도록)
+        l, w, wc, v, u = np.meshgrid(
+            self.loc_codes, self.weather_codes, np.arange(2), self.vehicle_bins, self.user_bins,
+            indexing="ij",
+        )
+        for hour in range(HOURS):
+            frame = pd.DataFrame({
+                self.feature_columns[0]: np.full(l.size, hour),
+                self.feature_columns[1]: l.ravel(),
+                self.feature_columns[2]: w.ravel(),
+                self.feature_columns[3]: wc.ravel(),
+                self.feature_columns[4]: v.ravel(),
+                self.feature_columns[5]: u.ravel(),
+            })
+            table[hour] = np.asarray(model.predict(frame), dtype=np.float32).reshape(nl, nw, 2, nv, nu)
+
+        self.build_seconds = time.perf_counter() - started
+        return table
+
+    def measure_error(self, model, samples: int = 2000, seed: int = 0) -> Dict[str, float]:
+        """구간 범위 안 임의 실수 입력에서 격자 조회 vs 실제 모델 오차 (구간점 사이 보간 오차 포함)"""
+        rng = np.random.default_rng(seed)
+        hours = rng.integers(0, HOURS, samples)
+        li = rng.integers(0, len(self.loc_codes), samples)
+        wi = rng.integers(0, len(self.weather_codes), samples)
+        wc = rng.integers(0, 2, samples)
+        v = rng.uniform(self.vehicle_bins[0], self.vehicle_bins[-1], samples)
+        u = rng.uniform(self.user_bins[0], self.user_bins[-1], samples)
+
+        frame = pd.DataFrame({
+            self.feature_columns[0]: hours,
+            self.feature_columns[1]: self.loc_codes[li],
+            self.feature_columns[2]: self.weather_codes[wi],
+            self.feature_columns[3]: wc,
+            self.feature_columns[4]: v,
+            self.feature_columns[5]: u,
+        })
+        live = np.asarray(model.predict(frame), dtype=float)
+        grid = np.array([self._interpolate(h, a, b, c, x, y) for h, a, b, c, x, y in zip(hours, li, wi, wc, v, u)])
+        diff = np.abs(grid - live)
+        self.error = {
+            "samples": int(samples),
+            "max_abs": float(diff.max()),
+            "p99_abs": float(np.percentile(diff, 99)),
+            "mean_abs": float(diff.mean()),
+        }
+        return self.error
+
+    # ------------------------------------------
+    # 조회
+    # ------------------------------------------
+    @staticmethod
+    def _axis(bins: np.ndarray, x: float):
+        """구간점 배열에서 (왼쪽 인덱스, 보간 비율), 범위 밖이면 None"""
+        if x < bins[0] or x > bins[-1]:
+            return None
+        i = int(np.searchsorted(bins, x, side="right")) - 1
+        if i >= len(bins) - 1:
+            return len(bins) - 1, 0.0
+        return i, (x - bins[i]) / (bins[i + 1] - bins[i])
+
+    def _interpolate(self, hour: int, li: int, wi: int, wc: int, vehicles: float, users: float) -> Optional[float]:
+        va = self._axis(self.vehicle_bins, vehicles)
+        ua = self._axis(self.user_bins, users)
+        if va is None or ua is None:
+            return None
+        (vi, tv), (ui, tu) = va, ua
+        cell = self.table[hour, li, wi, wc]
+        vj = min(vi + 1, len(self.vehicle_bins) - 1)
+        uj = min(ui + 1, len(self.user_bins) - 1)
+        return float(
+            (1 - tv) * (1 - tu) * cell[vi, ui] + (1 - tv) * tu * cell[vi, uj] +
+            tv * (1 - tu) * cell[vj, ui] + tv * tu * cell[vj, uj]
+        )
+
+    def lookup(self, hour, location, weather, wheelchair_yn, vehicles, users) -> Optional[float]:
+        """격자에서 예측, 격자 밖 입력이면 None"""
+        try:
+            hour = int(hour)
+            li = self.loc_index[str(location)]
+            wi = self.weather_index[str(weather)]
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not 0 <= hour < HOURS or wheelchair_yn not in (0, 1):
+            return None
+        try:
+            return self._interpolate(hour, li, wi, wheelchair_yn, float(vehicles), float(users))
+        except (TypeError, ValueError):
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shape": list(self.table.shape),
+            "bytes": int(self.table.nbytes),
+            "build_seconds": round(self.build_seconds, 3),
+            "vehicle_range": [float(self.vehicle_bins[0]), float(self.vehicle_bins[-1])],
+            "user_range": [float(self.user_bins[0]), float(self.user_bins[-1])],
+            "error": self.error,
+        }
+
+
+# ==========================================
+# 모델 ↔ 격자 연결
+# ==========================================
+GRID_ENABLED = os.getenv("PREDICTION_GRID", "0") == "1"
+GRID_VEHICLES = os.getenv("PREDICTION_GRID_VEHICLES", "0:40:1")
+GRID_USERS = os.getenv("PREDICTION_GRID_USERS", "0:60:1")
+GRID_MAX_ERROR = float(os.getenv("PREDICTION_GRID_MAX_ERROR", "0.5"))
+
+_grids: "weakref.WeakKeyDictionary[Any, PredictionGrid]" = weakref.WeakKeyDictionary()
+# 같은 모델 파일을 여러 모듈에서 로드해도 격자는 한 번만 만든다 (key: 모델 파일 경로·수정 시각)
+_built: Dict[Any, Optional[PredictionGrid]] = {}
+
+
+def attach_grid(model, le_loc, le_weather, feature_columns: Sequence[str],
+                cache_key: Any = None) -> Optional[PredictionGrid]:
+    """격자를 만들어 모델에 연결 (오차 한도를 넘으면 연결하지 않음)"""
+    cache_key = cache_key if cache_key is not None else id(model)
+    if cache_key in _built:
+        grid = _built[cache_key]
+    else:
+        grid = PredictionGrid(
+            model, le_loc, le_weather,
+            _parse_range(GRID_VEHICLES), _parse_range(GRID_USERS), feature_columns,
+        )
+        error = grid.measure_error(model)
+        if error["max_abs"] > GRID_MAX_ERROR:
+            print(f"⚠️ 예측 격자 비활성화: 최대 오차 {error['max_abs']:.3f}분 > {GRID_MAX_ERROR}분")
+            grid = None
+        else:
+            print(f"✅ 예측 격자 {grid.table.shape} ({grid.build_seconds:.1f}s, 최대 오차 {error['max_abs']:.4f}분)")
+        _built[cache_key] = grid
+    if grid is not None:
+        _grids[model] = grid
+    return grid
+
+
+def grid_for(model) -> Optional[PredictionGrid]:
+    try:
+        return _grids.get(model)
+    except TypeError:
+        return None
+
+
+def metrics() -> Dict[str, Any]:
+    return {"enabled": GRID_ENABLED, "grids": [g.stats() for g in _built.values() if g is not None]}
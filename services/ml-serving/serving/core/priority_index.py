@@ -0,0 +1,530 @@
+"""
+실시간 호출 목록의 증분 우선순위 인덱스
+
+routers/mock.py 의 compute_priority_scores 는 호출마다 대기시간·거리의 min/max 를 다시 구하고,
+요청 시각으로 정렬해 순번을 매기고, 전체 점수를 계산한 뒤 다시 정렬한다 (매번 O(n log n)).
+호출 목록이 수천 건이고 초당 여러 번 갱신되면 이 비용이 그대로 반복된다.
+
+PriorityIndex 는 같은 점수 식을 유지하면서
+- 요청 시각 / 대기시간 / 거리 별 정렬 구조(_SortedList)를 증분으로 유지하고
+  (min/max 는 양 끝 원소, 도착 순번은 순위 질의로 O(log n))
+- 호출 1건의 점수는 필요할 때 O(log n) 으로 계산하며
+- 상위 N 건은 세 정렬 목록 + 휠체어 집합의 앞부분만 훑는 threshold algorithm(Fagin)으로 구한다.
+호출 추가/삭제 시 다른 호출의 점수를 다시 쓰지 않는다 (점수는 조회 시점의 통계로 계산).
+
+실시간 호출 목록(live_calls)은 pre-fork 워커가 함께 쓰도록 SharedLiveCalls 로 감싼다.
+- 추가/삭제는 /dev/shm SQLite 변경 로그(core/cache.py 와 같은 연결 방식)에 seq 를 붙여 기록하고
+- 각 워커는 조회 전에(최대 LIVE_CALLS_SYNC_SECONDS 마다) 자기 seq 이후 변경만 자기 PriorityIndex 에
+  같은 순서로 반영한다 (모든 워커의 인덱스·도착 순번이 같아진다).
+  배차 경로는 await live_calls.refresh() 로 스레드에서 동기화한 뒤 score() 로 메모리만 읽는다
+- 삭제는 묘비(deleted=1)로 남겼다가 오래되면 지우고, 그보다 뒤처진 워커는 전체를 다시 읽는다
+
+환경 변수
+---------
+LIVE_CALLS_PATH            워커 공용 호출 목록 (기본: /dev/shm/equal_taxi_live_calls.sqlite)
+LIVE_CALLS_SYNC_SECONDS    조회 전 변경 로그 확인 최소 간격(초, 기본 0.5)
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from pathlib import Path
+from threading import RLock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# compute_priority_scores 와 같은 가중치
+ORDER_WEIGHT = 0.2
+WAIT_WEIGHT = 0.3
+DISTANCE_WEIGHT = 0.3
+WHEELCHAIR_WEIGHT = 0.2
+
+SYNC_SECONDS = float(os.getenv("LIVE_CALLS_SYNC_SECONDS", "0.5"))
+# 삭제 묘비 보관 시간 (이보다 오래 동기화하지 않은 워커는 전체를 다시 읽는다)
+TOMBSTONE_SECONDS = 3600
+
+
+class _SortedList:
+    """
+    버킷 단위 정렬 리스트 (sortedcontainers 방식)
+    추가/삭제/순위 질의는 버킷 max 목록 이분탐색 + 버킷 내부 이분탐색
+    순위 질의의 앞 버킷 원소 수는 버킷 길이 펜윅 트리로 O(log 버킷 수)
+    (버킷이 나뉘거나 사라질 때만 트리를 다시 만든다)
+    """
+
+    LOAD = 256
+
+    def __init__(self):
+        self._buckets: List[List[Any]] = []
+        self._maxes: List[Any] = []
+        self._len = 0
+        self._tree: Optional[List[int]] = None  # 버킷 길이 펜윅 트리 (None = 다시 만들어야 함)
+
+    def _build_tree(self) -> List[int]:
+        size = len(self._buckets)
+        tree = [0] + [len(b) for b in self._buckets]
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_add(self, pos: int, delta: int):
+        tree = self._tree
+        if tree is None:
+            return
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _count_before(self, pos: int) -> int:
+        """앞 pos 개 버킷의 원소 수"""
+        tree = self._tree if self._tree is not None else self._build_tree()
+        total, i = 0, pos
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, value):
+        if not self._buckets:
+            self._buckets.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            self._tree = None
+            return
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._buckets[pos].append(value)
+            self._maxes[pos] = value
+        else:
+            insort(self._buckets[pos], value)
+        self._len += 1
+        self._tree_add(pos, 1)
+        if len(self._buckets[pos]) > 2 * self.LOAD:
+            bucket = self._buckets[pos]
+            self._buckets[pos:pos + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._maxes[pos:pos + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+            self._tree = None
+
+    def remove(self, value):
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            raise ValueError(value)
+        bucket = self._buckets[pos]
+        idx = bisect_left(bucket, value)
+        if idx == len(bucket) or bucket[idx] != value:
+            raise ValueError(value)
+        del bucket[idx]
+        self._len -= 1
+        if not bucket:
+            del self._buckets[pos]
+            del self._maxes[pos]
+            self._tree = None
+            return
+        self._tree_add(pos, -1)
+        if idx == len(bucket):
+            self._maxes[pos] = bucket[-1]
+
+    def rank(self, value) -> int:
+        """value 보다 작은 원소 수"""
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._count_before(pos) + bisect_left(self._buckets[pos], value)
+
+    def first(self):
+        return self._buckets[0][0]
+
+    def last(self):
+        return self._buckets[-1][-1]
+
+    def __iter__(self) -> Iterator[Any]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __reversed__(self) -> Iterator[Any]:
+        for bucket in reversed(self._buckets):
+            yield from reversed(bucket)
+
+
+def _normalize(value, min_val, max_val) -> float:
+    if max_val == min_val:
+        return 0.0
+    return (value - min_val) / (max_val - min_val)
+
+
+def _as_datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class PriorityIndex:
+    """
+    calls: [{id, wait_time, distance_km, wheelchair, request_time, ...}]
+    점수 식은 compute_priority_scores 와 동일 (0.2 선착순 + 0.3 대기 + 0.3 거리 + 0.2 휠체어)
+    """
+
+    def __init__(self, calls: Optional[List[Dict[str, Any]]] = None):
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self._by_time = _SortedList()
+        self._by_wait = _SortedList()
+        self._by_distance = _SortedList()
+        self._wheelchair: Dict[str, None] = {}  # 삽입 순서 유지 집합
+        # 요청 시각이 같으면 먼저 들어온 호출이 앞선다 (sorted() 의 안정 정렬과 같은 순번)
+        self._arrival: Dict[str, Tuple[datetime, int]] = {}
+        self._seq = 0
+        self._lock = RLock()
+        for call in calls or ():
+            self.add(call)
+
+    # ------------------------------------------
+    # 증분 갱신
+    # ------------------------------------------
+    def add(self, call: Dict[str, Any]):
+        """같은 id 가 있으면 교체"""
+        call_id = str(call["id"])
+        call = dict(call, request_time=_as_datetime(call["request_time"]))
+        with self._lock:
+            if call_id in self._calls:
+                self._remove_locked(call_id)
+            self._calls[call_id] = call
+            self._seq += 1
+            self._arrival[call_id] = (call["request_time"], self._seq)
+            self._by_time.add((call["request_time"], self._seq, call_id))
+            self._by_wait.add((call["wait_time"], call_id))
+            self._by_distance.add((call["distance_km"], call_id))
+            if call.get("wheelchair"):
+                self._wheelchair[call_id] = None
+
+    def remove(self, call_id) -> bool:
+        with self._lock:
+            return self._remove_locked(str(call_id))
+
+    def _remove_locked(self, call_id: str) -> bool:
+        call = self._calls.pop(call_id, None)
+        if call is None:
+            return False
+        self._by_time.remove(self._arrival.pop(call_id) + (call_id,))
+        self._by_wait.remove((call["wait_time"], call_id))
+        self._by_distance.remove((call["distance_km"], call_id))
+        self._wheelchair.pop(call_id, None)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, call_id) -> bool:
+        return str(call_id) in self._calls
+
+    # ------------------------------------------
+    # 점수 조회
+    # ------------------------------------------
+    def _bounds(self) -> Tuple[float, float, float, float, int]:
+        return (
+            self._by_wait.first()[0], self._by_wait.last()[0],
+            self._by_distance.first()[0], self._by_distance.last()[0],
+            len(self._calls),
+        )
+
+    @staticmethod
+    def _combine(order_rank: int, call: Dict[str, Any], bounds) -> float:
+        min_wait, max_wait, min_dist, max_dist, n = bounds
+        order_score = 1 - _normalize(order_rank, 1, n)
+        wait_score = _normalize(call["wait_time"], min_wait, max_wait)
+        distance_score = 1 - _normalize(call["distance_km"], min_dist, max_dist)
+        wheelchair_score = 1.0 if call.get("wheelchair") else 0.0
+        return (
+            ORDER_WEIGHT * order_score +
+            WAIT_WEIGHT * wait_score +
+            DISTANCE_WEIGHT * distance_score +
+            WHEELCHAIR_WEIGHT * wheelchair_score
+        )
+
+    def _order_rank(self, call_id: str) -> int:
+        return self._by_time.rank(self._arrival[call_id] + (call_id,)) + 1
+
+    def score(self, call_id) -> Optional[float]:
+        call_id = str(call_id)
+        with self._lock:
+            call = self._calls.get(call_id)
+            if call is None:
+                return None
+            return round(self._combine(self._order_rank(call_id), call, self._bounds()), 3)
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        """
+        우선순위 상위 n 건 (threshold algorithm)
+        네 정렬 목록을 한 칸씩 번갈아 내려가며 처음 본 호출만 전체 점수를 계산하고,
+        아직 못 본 호출이 받을 수 있는 최대 점수(각 목록 현재 위치 값의 합)가
+        n 번째 점수 이하가 되면 멈춘다.
+        """
+        with self._lock:
+            if not self._calls or n <= 0:
+                return []
+            bounds = self._bounds()
+            min_wait, max_wait, min_dist, max_dist, total = bounds
+
+            time_iter = enumerate(iter(self._by_time), start=1)
+            wait_iter = reversed(self._by_wait)
+            dist_iter = iter(self._by_distance)
+            wc_iter = iter(self._wheelchair)
+
+            seen: Dict[str, float] = {}
+            best: List[Tuple[float, str]] = []  # 내림차순 유지 (n 이 작으므로 삽입 정렬)
+            rank_bound, wait_bound, dist_bound = 1, max_wait, min_dist
+            wc_bound = 1.0 if self._wheelchair else 0.0
+
+            def _visit(call_id: str, order_rank: Optional[int] = None):
+                if call_id in seen:
+                    return
+                call = self._calls[call_id]
+                if order_rank is None:
+                    order_rank = self._order_rank(call_id)
+                s = self._combine(order_rank, call, bounds)
+                seen[call_id] = s
+                insort(best, (-s, call_id))
+                if len(best) > n:
+                    best.pop()
+
+            while len(seen) < total:
+                # 선착순 목록은 순번을 그대로 알 수 있어 순위 질의가 필요 없다
+                rank, (_, _, cid) = next(time_iter)
+                rank_bound = rank
+                _visit(cid, rank)
+                wait_bound, cid = next(wait_iter)
+                _visit(cid)
+                dist_bound, cid = next(dist_iter)
+                _visit(cid)
+                if wc_bound:
+                    cid = next(wc_iter, None)
+                    if cid is None:
+                        wc_bound = 0.0
+                    else:
+                        _visit(cid)
+
+                if len(best) == n:
+                    threshold = (
+                        ORDER_WEIGHT * (1 - _normalize(rank_bound, 1, total)) +
+                        WAIT_WEIGHT * _normalize(wait_bound, min_wait, max_wait) +
+                        DISTANCE_WEIGHT * (1 - _normalize(dist_bound, min_dist, max_dist)) +
+                        WHEELCHAIR_WEIGHT * wc_bound
+                    )
+                    if -best[-1][0] >= threshold:
+                        break
+
+            return [
+                dict(self._calls[cid], priority_score=round(-neg, 3))
+                for neg, cid in best
+            ]
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        """전체 목록 (compute_priority_scores 와 같은 형태)"""
+        with self._lock:
+            bounds = self._bounds() if self._calls else None
+            ranked = []
+            for order_rank, (_, _, cid) in enumerate(self._by_time, start=1):
+                call = dict(self._calls[cid], order_rank=order_rank)
+                call["priority_score"] = round(self._combine(order_rank, call, bounds), 3)
+                ranked.append(call)
+        return sorted(ranked, key=lambda x: x["priority_score"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if not self._calls:
+                return {"calls": 0}
+            min_wait, max_wait, min_dist, max_dist, n = self._bounds()
+            return {
+                "calls": n,
+                "wheelchair": len(self._wheelchair),
+                "wait_range": [min_wait, max_wait],
+                "distance_range": [min_dist, max_dist],
+            }
+
+
+# ------------------------------------------
+# 워커 공용 호출 목록
+# ------------------------------------------
+def default_live_calls_path() -> Path:
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() else Path(tempfile.gettempdir())
+    return Path(os.getenv("LIVE_CALLS_PATH", str(base / "equal_taxi_live_calls.sqlite")))
+
+
+class SharedLiveCalls:
+    """
+    PriorityIndex 와 같은 조회 인터페이스 (add/remove/score/top/ranked/stats)
+    calls  id → (seq, 호출 JSON, 삭제 여부, 갱신 시각)  seq 는 모든 변경에 대해 단조 증가
+    meta   pruned_seq: 지워진 묘비 중 가장 큰 seq
+    """
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, path: Optional[Path] = None, sync_seconds: float = SYNC_SECONDS):
+        self.path = Path(path or default_live_calls_path())
+        self.sync_seconds = sync_seconds
+        self.index = PriorityIndex()
+        self._seq = 0                 # 이 워커 인덱스에 반영한 마지막 seq
+        self._next_sync = 0.0
+        self._sync_lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.reloads = 0
+
+    # 포크 이후 자식 프로세스는 자기 연결을 새로 연다 (core/cache.py 와 같은 방식)
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS calls (
+                    id TEXT PRIMARY KEY, seq INTEGER, call TEXT, deleted INTEGER, updated REAL
+                );
+                CREATE INDEX IF NOT EXISTS calls_seq ON calls (seq);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+                """
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _write(self, call_id: str, call: Optional[Dict[str, Any]]) -> bool:
+        """call=None 이면 삭제 (묘비). 반환: 기존에 살아 있던 호출인지"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT deleted FROM calls WHERE id = ?", (call_id,)).fetchone()
+            existed = row is not None and not row[0]
+            if call is not None or existed:
+                seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM calls").fetchone()[0]
+                seq = max(seq, self._pruned_seq(conn) + 1)
+                conn.execute(
+                    "INSERT OR REPLACE INTO calls (id, seq, call, deleted, updated) VALUES (?, ?, ?, ?, ?)",
+                    (call_id, seq, None if call is None else json.dumps(call, default=str, ensure_ascii=False),
+                     int(call is None), time.time()),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune(conn)
+        return existed
+
+    @staticmethod
+    def _pruned_seq(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'pruned_seq'").fetchone()
+        return row[0] if row else 0
+
+    def _prune(self, conn: sqlite3.Connection):
+        cutoff = time.time() - TOMBSTONE_SECONDS
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT MAX(seq) FROM calls WHERE deleted = 1 AND updated < ?", (cutoff,)
+            ).fetchone()
+            if row[0] is not None:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('pruned_seq', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                    (row[0],),
+                )
+                conn.execute("DELETE FROM calls WHERE deleted = 1 AND updated < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ------------------------------------------
+    # 동기화 (변경 로그 → 이 워커의 인덱스)
+    # ------------------------------------------
+    def due(self) -> bool:
+        return time.monotonic() >= self._next_sync
+
+    async def refresh(self):
+        """배차 경로용: 동기화할 때가 됐을 때만 스레드에서 (이벤트 루프에서 sqlite 를 기다리지 않도록)"""
+        if self.due():
+            await asyncio.to_thread(self.sync)
+
+    def sync(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now < self._next_sync:
+            return
+        with self._sync_lock:
+            self._next_sync = now + self.sync_seconds
+            conn = self._conn()
+            if self._seq < self._pruned_seq(conn):
+                # 지워진 묘비보다 뒤처졌다: 살아 있는 호출 전체를 seq 순으로 다시 읽는다
+                rows = conn.execute(
+                    "SELECT id, seq, call, deleted FROM calls WHERE deleted = 0 ORDER BY seq"
+                ).fetchall()
+                index = PriorityIndex()
+                for _, _, call, _ in rows:
+                    index.add(json.loads(call))
+                self.index = index
+                self._seq = max([self._pruned_seq(conn)] + [r[1] for r in rows])
+                self.reloads += 1
+                return
+            rows = conn.execute(
+                "SELECT id, seq, call, deleted FROM calls WHERE seq > ? ORDER BY seq", (self._seq,)
+            ).fetchall()
+            for call_id, seq, call, deleted in rows:
+                if deleted:
+                    self.index.remove(call_id)
+                else:
+                    self.index.add(json.loads(call))
+                self._seq = seq
+
+    # ------------------------------------------
+    # PriorityIndex 인터페이스 (동기 sqlite — 스레드에서 호출)
+    # score / in 은 이 워커의 인덱스만 읽는다 (먼저 refresh)
+    # ------------------------------------------
+    def add(self, call: Dict[str, Any]):
+        """같은 id 가 있으면 교체 (모든 워커)"""
+        self._write(str(call["id"]), call)
+        self.sync(force=True)
+
+    def remove(self, call_id) -> bool:
+        existed = self._write(str(call_id), None)
+        self.sync(force=True)
+        return existed
+
+    def __len__(self) -> int:
+        self.sync()
+        return len(self.index)
+
+    def __contains__(self, call_id) -> bool:
+        return call_id in self.index
+
+    def score(self, call_id) -> Optional[float]:
+        return self.index.score(call_id)
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        self.sync()
+        return self.index.top(n)
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        self.sync()
+        return self.index.ranked()
+
+    def stats(self) -> Dict[str, Any]:
+        self.sync()
+        return {**self.index.stats(), "shared_seq": self._seq, "reloads": self.reloads}
+
+
+# 실시간 호출 목록 (배차 priority_boost 조회에 사용, 모든 워커 공용)
+live_calls = SharedLiveCalls()
@@ -2,9 +2,10 @@ import logging
 import os
 import pandas as pd
 from datetime import datetime
-from httpx import AsyncClient
 from fastapi import HTTPException
 from ..constants import TMAP_API_KEY, TMAP_BASE_URL
+from . import execution, upstream
+from .locations import LocationTable, usage_tables
 
 logger = logging.getLogger(__name__)
 
@@ -13,21 +14,27 @@ def estimate_usage_stats(location: str, date: str = None) -> tuple[int, int]:
     if not date:
         date = datetime.now().strftime("%Y%m%d")
     try:
-        df = fetch_daily_usage_data_sync(date)
-        filtered = df[df["출발지"].astype(str).str.contains(location)]
-        vehicle_count = int(filtered["운행건수"].sum())
-        user_count = int(filtered["콜수"].sum())
+        table = usage_table(date)
+        vehicle_count = int(table.total(location, "운행건수"))
+        user_count = int(table.total(location, "콜수"))
         return vehicle_count, user_count
     except Exception as e:
         logger.warning(f"estimate_usage_stats 오류: {e}")
         return 10, 20
 
+# 날짜별 표를 한 번 받아 지역 인덱스를 붙여 TTL 동안 재사용 (refresh=True 면 새로 받아 교체)
+def usage_table(date: str, refresh: bool = False) -> LocationTable:
+    build = lambda: LocationTable(fetch_daily_usage_data_sync(date))
+    if refresh:
+        return usage_tables.put(("public", date), build())
+    return usage_tables.get_or_build(("public", date), build)
+
 # 동기 방식으로 데이터 로드 (ML 예측용)
 def fetch_daily_usage_data_sync(date: str) -> pd.DataFrame:
-    import requests
     url = "http://m.calltaxi.sisul.or.kr/api/open/newEXCEL0001.asp"
     params = {"key": os.getenv("CALLTAXI_USAGE_KEY"), "eDate": date}
-    r = requests.get(url, params=params)
+    with upstream.sync_client(timeout=15) as client:
+        r = client.get(url, params=params)
     r.encoding = 'euc-kr'
     tables = pd.read_html(r.text, encoding='euc-kr')
     return tables[0]
@@ -37,13 +44,17 @@ async def fetch_daily_usage_data(date: str) -> pd.DataFrame:
     url = "http://m.calltaxi.sisul.or.kr/api/open/newEXCEL0001.asp"
     params = {"key": os.getenv("CALLTAXI_USAGE_KEY"), "eDate": date}
     try:
-        async with AsyncClient() as client:
+        async with upstream.async_client() as client:
             response = await client.get(url, params=params)
             response.encoding = 'euc-kr'
-            tables = pd.read_html(response.text, encoding='euc-kr')
+            tables = await execution.run(
+                "seoul.parse_table", pd.read_html, response.text, encoding='euc-kr'
+            )
             if not tables:
                 raise ValueError("No tables found in response")
             return tables[0]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"데이터 가져오기 실패: {e}")
         raise HTTPException(status_code=500, detail=f"데이터 가져오기 실패: {str(e)}")
@@ -62,7 +73,7 @@ async def get_public_transit_alternatives(
         "format": "json"
     }
     try:
-        async with AsyncClient() as client:
+        async with upstream.async_client() as client:
             response = await client.get(url, headers=headers, params=params)
             response.raise_for_status()
             return response.json()
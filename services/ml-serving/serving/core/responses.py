@@ -0,0 +1,173 @@
+"""
+대용량 JSON 응답용 고속 직렬화 계층
+
+FastAPI 기본 경로는 반환값을 jsonable_encoder 로 한 번 훑고(response_model 이 있으면 pydantic 재검증까지)
+표준 json 으로 다시 인코딩한다. 내부에서 만든 신뢰할 수 있는 데이터는 이 과정이 필요 없으므로
+- FastJSONResponse: orjson 으로 바로 직렬화 (numpy/pandas/datetime 처리 포함, orjson 없으면 json 폴백)
+- fast_response(): Response 객체를 돌려주므로 FastAPI 가 response_model 검증을 건너뛴다
+  (response_model 은 OpenAPI 문서용으로만 남는다)
+- ?format=columnar: 레코드 목록을 {"columns": [...], "data": {열: [값...]}} 로 바꿔 키 반복을 없앤다
+- ResponseCoder: fastapi-cache 가 Response 본문 바이트를 그대로 저장/복원하도록 하는 coder
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from fastapi import Query
+from fastapi.responses import JSONResponse, Response
+from fastapi_cache.coder import Coder, JsonCoder
+from pydantic import BaseModel
+
+try:  # requirements.txt 에 포함, 없는 환경에서는 표준 json 사용
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ResponseFormat(str, Enum):
+    json = "json"
+    columnar = "columnar"
+
+
+# 라우트 파라미터로 사용: fmt: ResponseFormat = FORMAT_QUERY
+FORMAT_QUERY = Query(ResponseFormat.json, alias="format", description="json(레코드) 또는 columnar(열 단위)")
+
+
+def _default(obj: Any) -> Any:
+    """orjson 이 기본 지원하지 않는 타입"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, pd.DataFrame):
+        return frame_columnar(obj)
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (dt.date, dt.time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"직렬화할 수 없는 타입: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            content, default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ------------------------------------------
+# 열 단위(columnar) 인코딩
+# ------------------------------------------
+def _column_values(series: pd.Series) -> List[Any]:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return [None if pd.isna(v) else v.isoformat() for v in series]
+    values = series.to_numpy(dtype=object, na_value=None) if series.hasnans else series.to_numpy()
+    return values.tolist()
+
+
+def frame_columnar(df: pd.DataFrame) -> Dict[str, Any]:
+    """DataFrame → {"columns": [...], "data": {열: [...]}} (행 단위 dict 를 만들지 않음)"""
+    columns = [str(c) for c in df.columns]
+    return {
+        "columns": columns,
+        "data": {name: _column_values(df[col]) for name, col in zip(columns, df.columns)},
+    }
+
+
+def records_columnar(records: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """레코드 목록 → 열 단위 (키는 첫 등장 순서, 빠진 값은 null)"""
+    columns: List[str] = []
+    seen = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+    return {"columns": columns, "data": {c: [r.get(c) for r in records] for c in columns}}
+
+
+def frame_payload(df: pd.DataFrame, fmt: ResponseFormat = ResponseFormat.json):
+    if fmt == ResponseFormat.columnar:
+        return frame_columnar(df)
+    return df.to_dict(orient="records")
+
+
+def columnarize(content: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """content 안의 레코드 목록 필드들만 열 단위로 바꾼다"""
+    out = dict(content)
+    for name in fields:
+        value = out.get(name)
+        if isinstance(value, pd.DataFrame):
+            out[name] = frame_columnar(value)
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            out[name] = records_columnar(value)
+    out["format"] = ResponseFormat.columnar.value
+    return out
+
+
+def fast_response(content: Any, fmt: ResponseFormat = ResponseFormat.json,
+                  columnar_fields: Sequence[str] = (), status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """
+    신뢰할 수 있는 내부 데이터 전용 (response_model 재검증 없음)
+    fmt=columnar 이면 columnar_fields 의 레코드 목록을 열 단위로 변환
+    """
+    if fmt == ResponseFormat.columnar and isinstance(content, dict):
+        content = columnarize(content, columnar_fields)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+# ------------------------------------------
+# fastapi-cache 연동
+# ------------------------------------------
+class ResponseCoder(Coder):
+    """
+    Response 는 "<media type>\\n<본문>" 바이트로 저장해 적중 시 그대로 돌려준다
+    (다시 파싱/인코딩하지 않음). 그 밖의 값은 JsonCoder 와 같다.
+    """
+
+    MARKER = b"\x00R"
+
+    @classmethod
+    def encode(cls, value: Any):
+        if isinstance(value, Response):
+            return cls.MARKER + (value.media_type or "application/json").encode() + b"\n" + bytes(value.body)
+        return JsonCoder.encode(value)
+
+    @classmethod
+    def decode(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            value = value.encode()
+        if value.startswith(cls.MARKER):
+            media_type, _, body = value[len(cls.MARKER):].partition(b"\n")
+            return Response(content=body, media_type=media_type.decode())
+        return JsonCoder.decode(value)
+
+    @classmethod
+    def decode_as_type(cls, value: Any, *, type_: Any) -> Any:
+        return cls.decode(value)
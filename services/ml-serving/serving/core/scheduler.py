@@ -0,0 +1,243 @@
+"""
+시작 시 워밍업 + 주기적 백그라운드 갱신 스케줄러
+
+배포 직후 첫 /v2/usage, /v2/best_destinations, /ai/chat 호출자가 서울시 다운로드·Tmap 호출·
+모델 적재 비용을 떠안지 않도록, 등록된 작업(RefreshJob)을 시작 시 한 번 실행하고
+이후 주기(every 초) 또는 매일 정해진 시각(at_hour)에 다시 실행한다.
+
+- 시작 시각과 주기에 지터(WARMUP_JITTER 비율)를 더해 워커·호스트가 동시에 몰리지 않게 한다
+- 동시에 실행되는 작업 수는 WARMUP_CONCURRENCY 로 제한한다
+- exclusive 작업(공유 캐시/파일을 채우는 작업)은 호스트당 한 워커만 실행한다
+  (파일 잠금 + 마지막 성공 시각 파일: 워커마다 지터된 시각에 깨어나도 주기당 한 번만 실행)
+- 작업별 마지막 실행/성공 시각, 소요 시간, 오류를 status() 로 노출 (/system/refresh)
+
+환경 변수
+---------
+WARMUP_ENABLED       0 이면 스케줄러를 띄우지 않음 (기본 1)
+WARMUP_CONCURRENCY   동시 실행 작업 수 (기본 2)
+WARMUP_JITTER        주기 대비 지터 비율 (기본 0.1)
+REFRESH_INTERVALS    작업별 주기 덮어쓰기(초, 0 이면 시작 시 한 번만)
+                     예) "usage.route=120,destinations.route=0"
+"""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import logging
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "2"))
+JITTER = float(os.getenv("WARMUP_JITTER", "0.1"))
+
+
+def _parse_intervals(spec: str) -> Dict[str, float]:
+    overrides = {}
+    for item in filter(None, (x.strip() for x in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        overrides[name.strip()] = float(seconds)
+    return overrides
+
+
+INTERVAL_OVERRIDES = _parse_intervals(os.getenv("REFRESH_INTERVALS", ""))
+
+
+@dataclass
+class RefreshJob:
+    name: str
+    fn: Callable[[], Awaitable[Any]]
+    every: float = 0.0               # 초 단위 주기 (0 이면 주기 실행 없음)
+    at_hour: Optional[int] = None    # 매일 이 시각에 실행 (every 대신)
+    on_startup: bool = True
+    exclusive: bool = False          # 호스트당 한 워커만 실행
+    timeout: float = 300.0
+
+    # 상태
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    running: bool = False
+    last_started: Optional[float] = None
+    last_success: Optional[float] = None
+    last_error: Optional[str] = None
+    last_duration: Optional[float] = None
+    next_run: Optional[float] = None
+    detail: Any = field(default=None, repr=False)
+
+    def delay_until_next(self, now: datetime) -> Optional[float]:
+        if self.at_hour is not None:
+            target = now.replace(hour=self.at_hour, minute=0, second=0, microsecond=0)
+            if target <= now:
+                target += timedelta(days=1)
+            return (target - now).total_seconds()
+        if self.every > 0:
+            return self.every
+        return None
+
+    def min_age(self, jitter: float) -> float:
+        """exclusive 작업: 다른 워커의 마지막 성공이 이보다 최근이면 건너뛴다"""
+        if self.at_hour is not None:
+            # 같은 날 워커들은 ±jitter × 24h 안에 깨어나고, 다음 날은 그보다 멀다
+            return 12 * 3600.0
+        if self.every > 0:
+            return self.every * (1 - jitter)
+        return 0.0
+
+
+def _read_stamp(path: Path) -> Optional[float]:
+    try:
+        return float(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_stamp(path: Path, value: float):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(repr(value))
+    os.replace(tmp, path)
+
+
+def _lock_path(name: str) -> Path:
+    return Path(tempfile.gettempdir()) / f"equal_taxi_refresh.{name}.lock"
+
+
+def _stamp_path(name: str) -> Path:
+    """exclusive 작업의 호스트 공용 마지막 성공 시각"""
+    return Path(tempfile.gettempdir()) / f"equal_taxi_refresh.{name}.last"
+
+
+class RefreshScheduler:
+    def __init__(self, concurrency: int = CONCURRENCY, jitter: float = JITTER):
+        self.jobs: Dict[str, RefreshJob] = {}
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, job: RefreshJob) -> RefreshJob:
+        if job.name in INTERVAL_OVERRIDES:
+            job.every, job.at_hour = INTERVAL_OVERRIDES[job.name], None
+        self.jobs[job.name] = job
+        return job
+
+    # ── 실행 ─────────────────────────────────────────────────
+    async def run(self, name: str, force: bool = False) -> RefreshJob:
+        """force: exclusive 작업의 주기 확인(마지막 성공 시각) 없이 실행 (수동 갱신)"""
+        job = self.jobs[name]
+        if job.running:
+            job.skipped += 1
+            return job
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            if job.exclusive:
+                with open(_lock_path(job.name), "w") as lock:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        job.skipped += 1  # 다른 워커가 실행 중
+                        return job
+                    try:
+                        stamp = _read_stamp(_stamp_path(job.name))
+                        if not force and stamp is not None and time.time() - stamp < job.min_age(self.jitter):
+                            job.skipped += 1  # 다른 워커가 이번 주기에 이미 실행
+                            return job
+                        await self._execute(job)
+                        if job.last_error is None:
+                            _write_stamp(_stamp_path(job.name), job.last_success)
+                    finally:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+            else:
+                await self._execute(job)
+        return job
+
+    async def _execute(self, job: RefreshJob):
+        job.running = True
+        job.runs += 1
+        job.last_started = time.time()
+        t0 = time.perf_counter()
+        try:
+            job.detail = await asyncio.wait_for(job.fn(), job.timeout)
+            job.last_success = time.time()
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            logger.warning("갱신 작업 실패 %s: %s", job.name, job.last_error)
+        finally:
+            job.running = False
+            job.last_duration = time.perf_counter() - t0
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _loop(self, job: RefreshJob):
+        if job.on_startup:
+            # 시작 직후 모든 워커가 같은 순간에 몰리지 않도록 짧게 흩뿌린다
+            await asyncio.sleep(random.uniform(0, self.jitter * 10))
+            await self.run(job.name)
+        while True:
+            delay = job.delay_until_next(datetime.now())
+            if delay is None:
+                job.next_run = None
+                return
+            delay = self._jittered(delay)
+            job.next_run = time.time() + delay
+            await asyncio.sleep(delay)
+            await self.run(job.name)
+
+    # ── 수명 주기 ────────────────────────────────────────────
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._loop(job), name=f"refresh:{job.name}") for job in self.jobs.values()
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+
+        def _ts(value: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(value).isoformat(timespec="seconds") if value else None
+
+        return {
+            "enabled": bool(self._tasks),
+            "concurrency": self.concurrency,
+            "jobs": {
+                job.name: {
+                    "schedule": f"daily@{job.at_hour:02d}:00" if job.at_hour is not None
+                    else (f"every {job.every:g}s" if job.every > 0 else "startup"),
+                    "exclusive": job.exclusive,
+                    "running": job.running,
+                    "runs": job.runs,
+                    "failures": job.failures,
+                    "skipped": job.skipped,
+                    "last_started": _ts(job.last_started),
+                    "last_success": _ts(job.last_success),
+                    "age_seconds": round(now - job.last_success, 1) if job.last_success else None,
+                    "last_duration_ms": round(job.last_duration * 1000, 1) if job.last_duration else None,
+                    "last_error": job.last_error,
+                    "next_run": _ts(job.next_run),
+                    "detail": job.detail,
+                }
+                for job in self.jobs.values()
+            },
+        }
+
+
+scheduler = RefreshScheduler()
@@ -4,7 +4,6 @@ from __future__ import annotations
 import logging
 from io import BytesIO
 from pathlib import Path
-from typing import Final
 
 import httpx
 import pandas as pd
@@ -12,14 +11,20 @@ from fastapi import HTTPException
 
 from ..constants import BASE_URL
 from ..core.utils import get_env
+from . import execution, upstream
+from .locations import LocationTable, usage_tables
 
 logger = logging.getLogger(__name__)
 
 # ────────────────────────────────────────────────────────────────
-# 환경 변수
+# 환경 변수 (import 시점이 아니라 호출 시점에 확인 — 키가 없어도 앱은 뜬다)
 # ────────────────────────────────────────────────────────────────
-API_KEY_USAGE: Final[str] = get_env("CALLTAXI_USAGE_KEY")
-API_KEY_DEST:  Final[str] = get_env("CALLTAXI_DEST_KEY")
+def _usage_key() -> str:
+    return get_env("CALLTAXI_USAGE_KEY")
+
+
+def _dest_key() -> str:
+    return get_env("CALLTAXI_DEST_KEY")
 
 # ────────────────────────────────────────────────────────────────
 # 공통 설정
@@ -45,11 +50,16 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 # 내부: Excel 혹은 HTML → DataFrame
 # ────────────────────────────────────────────────────────────────
 async def _fetch_table(url: str) -> pd.DataFrame:
-    async with httpx.AsyncClient(timeout=15) as client:
+    async with upstream.async_client(timeout=15) as client:
         resp = await client.get(url)
         resp.raise_for_status()
 
-    content = resp.content
+    # lxml/openpyxl 파싱은 이벤트 루프 밖(스레드 풀)에서
+    return await execution.run("seoul.parse_table", _parse_table, resp.content)
+
+
+def _parse_table(content: bytes) -> pd.DataFrame:
+    """응답 바이트(HTML 표 또는 Excel)를 DataFrame 으로 변환"""
     if b"<table" in content[:100].lower():
         tables = pd.read_html(BytesIO(content), flavor="lxml", encoding="euc-kr")
         if not tables:
@@ -64,7 +74,7 @@ async def _fetch_table(url: str) -> pd.DataFrame:
 # 1) 일자별 이용 통계
 # ────────────────────────────────────────────────────────────────
 async def fetch_daily_usage_data(date: str) -> pd.DataFrame:
-    url = f"{BASE_URL}/newEXCEL0001.asp?key={API_KEY_USAGE}&sDate={date}&eDate={date}"
+    url = f"{BASE_URL}/newEXCEL0001.asp?key={_usage_key()}&sDate={date}&eDate={date}"
     df = await _fetch_table(url)
 
     # ── NEW: 컬럼이 0,1,2… 일 때 첫 행을 헤더로 승격 ───────────────
@@ -87,3 +97,35 @@ async def fetch_daily_usage_data(date: str) -> pd.DataFrame:
     df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
 
     return df
+
+
+async def fetch_usage_location_table(date: str, refresh: bool = False) -> LocationTable:
+    """
+    일자별 이용 통계 + 출발지 자치구 인덱스 (날짜별 TTL 캐시, refresh=True 면 새로 받아 교체)
+    """
+    table = None if refresh else usage_tables.get(("seoul", date))
+    if table is None:
+        df = await fetch_daily_usage_data(date)
+        table = usage_tables.put(("seoul", date), await execution.run("analysis.aggregate", LocationTable, df))
+    return table
+
+
+# ────────────────────────────────────────────────────────────────
+# 2) 목적지 베스트 100
+# ────────────────────────────────────────────────────────────────
+async def fetch_best_100_destinations(s_date: str) -> pd.DataFrame:
+    url = f"{BASE_URL}/newEXCEL0002.asp?key={_dest_key()}&sDate={s_date}"
+    df = await _fetch_table(url)
+
+    if all(isinstance(c, (int, float)) for c in df.columns):
+        df.columns = df.iloc[0]
+        df = df.iloc[1:].reset_index(drop=True)
+    df = df.rename(columns=lambda c: str(c).strip())
+
+    # 응답 형식(시/군/구 + 동/읍/면, 승차건수)을 장소명/이용건수로 통일
+    if "장소명" not in df.columns and {"시/군/구", "동/읍/면"}.issubset(df.columns):
+        df["장소명"] = df["시/군/구"].astype(str) + " " + df["동/읍/면"].astype(str)
+    if "이용건수" not in df.columns and "승차건수" in df.columns:
+        df["이용건수"] = df["승차건수"]
+    df["이용건수"] = pd.to_numeric(df["이용건수"], errors="coerce").fillna(0).astype(int)
+    return df
@@ -0,0 +1,372 @@
+"""
+섀도 모드 배차 정책 평가
+
+dynamic_dispatch 의 가중치(긴급도 0.4, 효율 0.4, 공정성 0.2), priority_score 배수(1 + 2 × boost),
+긴급 배차 기준(30 / 혼잡 시 50)은 DispatchPolicy 한 곳에 모였다. 실제 배차는 LIVE_POLICY 로 하고,
+후보 정책(섀도 정책)은 실시간 요청 중 일부를 표본으로 뽑아 배차 경로 밖에서 "이 정책이라면 누구를
+골랐을지"를 계산해 실제 선택과 비교한다.
+
+- offer()         learn_from_dispatch 에서 호출. 표본 추출 + put_nowait 뿐 (배차 지연에 영향 없음)
+- 대기열          SHADOW_QUEUE 건까지, 차면 버린다 (dropped)
+- 평가            전용 스레드 1개 (core/execution.py 의 배차 풀과 분리).
+                  실제 배차가 계산한 후보별 점수 구성요소를 재가중하고 (match["scored"]: 점수 계산한
+                  후보 전체 — 이벤트 로그용 상위 CANDIDATES 대로 자르면 실제 정책 순위 밖 차량을 못 고른다),
+                  구성요소가 없는 후보(긴급 배차)만 score_drivers 로 다시 계산
+- 집계            정책별 불일치율, 긴급 판정 차이, 선택 차량의 ETA·공정성 점수 차이(섀도 - 실제)
+- 배정 방식        섀도 정책은 요청별로 고르므로 실제 배차도 요청별(argmax·긴급)인 표본만 실제 선택과 비교한다.
+                  묶음 동시 배정(joint)은 실제 선택 대신 LIVE_POLICY 가 요청별로 골랐을 차량과 비교해
+                  따로 집계하고(joint), 합승 구성원(pooled)은 후보·점수가 묶음 lead 의 것이라 건너뛴다
+
+정책은 환경 변수 또는 register() 로 추가한다. register() 는 DispatchPolicy 외에
+choose(algorithm, sample) -> ShadowChoice 를 구현한 임의 객체도 받는다.
+
+    DISPATCH_SHADOW_POLICIES="eff:efficiency=0.5,urgency=0.3;strict:threshold=25"
+
+환경 변수
+---------
+DISPATCH_SHADOW_SAMPLE      섀도 평가 표본 비율 0~1 (기본 0 = 끔)
+DISPATCH_SHADOW_QUEUE       평가 대기열 상한 (기본 256)
+DISPATCH_SHADOW_POLICIES    후보 정책 목록 "이름:키=값,...;이름:..."
+                            키: urgency, efficiency, fairness, boost, threshold, loaded_threshold, load
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+from .event_log import assignment_mode
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = float(os.getenv("DISPATCH_SHADOW_SAMPLE", "0"))
+MAX_QUEUE = int(os.getenv("DISPATCH_SHADOW_QUEUE", "256"))
+
+# 정책별로 보관하는 최근 불일치 사례 수
+RECENT = 20
+
+
+@dataclass(frozen=True)
+class DispatchPolicy:
+    name: str = "live"
+    urgency_weight: float = 0.4
+    efficiency_weight: float = 0.4
+    fairness_weight: float = 0.2
+    # 긴급도 = 기본 긴급도 × (1 + boost_factor × priority_score)
+    boost_factor: float = 2.0
+    emergency_threshold: float = 30.0
+    # 활성 요청 / 차량 비율이 load_ratio 를 넘으면 긴급 기준을 올린다
+    loaded_emergency_threshold: float = 50.0
+    load_ratio: float = 3.0
+
+    def urgency(self, base: float, boost: float) -> float:
+        return base * (1 + self.boost_factor * boost)
+
+    def threshold(self, load: float) -> float:
+        return self.loaded_emergency_threshold if load > self.load_ratio else self.emergency_threshold
+
+    def score(self, urgency: float, efficiency: float, fairness: float) -> float:
+        return urgency * self.urgency_weight + efficiency * self.efficiency_weight + fairness * self.fairness_weight
+
+    def choose(self, algorithm, sample: "ShadowSample") -> Optional["ShadowChoice"]:
+        urgency = self.urgency(sample.urgency_base, sample.priority_boost)
+        if urgency > self.threshold(sample.load):
+            suitable = [c for c in sample.candidates
+                        if not sample.request.get("wheelchair") or c["driver"].get("wheelchair_capable")]
+            if not suitable:
+                return None
+            best = min(suitable, key=lambda c: sample.eta(algorithm, c["driver"]))
+            comp = sample.components(algorithm, best)
+            return ShadowChoice(best["driver"]["driver_id"], True, sample.eta(algorithm, best["driver"]),
+                                comp["fairness"] if comp else 0.0)
+        scored = [
+            (self.score(urgency, comp["efficiency"], comp["fairness"]), c, comp)
+            for c in sample.candidates
+            for comp in [sample.components(algorithm, c)]
+            if comp is not None
+        ]
+        if not scored:
+            return None
+        _, best, comp = max(scored, key=lambda s: s[0])
+        return ShadowChoice(best["driver"]["driver_id"], False, sample.eta(algorithm, best["driver"]),
+                            comp["fairness"])
+
+
+LIVE_POLICY = DispatchPolicy()
+
+_POLICY_KEYS = {
+    "urgency": "urgency_weight",
+    "efficiency": "efficiency_weight",
+    "fairness": "fairness_weight",
+    "boost": "boost_factor",
+    "threshold": "emergency_threshold",
+    "loaded_threshold": "loaded_emergency_threshold",
+    "load": "load_ratio",
+}
+
+
+def parse_policies(spec: str) -> List[DispatchPolicy]:
+    """"이름:키=값,...;이름:..." → LIVE_POLICY 에서 지정한 값만 바꾼 정책 목록"""
+    policies = []
+    for item in filter(None, (x.strip() for x in spec.split(";"))):
+        name, _, params = item.partition(":")
+        overrides = {}
+        for pair in filter(None, (p.strip() for p in params.split(","))):
+            key, _, value = pair.partition("=")
+            if key.strip() not in _POLICY_KEYS:
+                raise ValueError(f"알 수 없는 섀도 정책 키: {key.strip()} ({name})")
+            overrides[_POLICY_KEYS[key.strip()]] = float(value)
+        policies.append(replace(LIVE_POLICY, name=name.strip(), **overrides))
+    return policies
+
+
+@dataclass
+class ShadowChoice:
+    driver_id: str
+    emergency: bool
+    eta: float
+    fairness: float
+
+
+@dataclass
+class ShadowSample:
+    """실제 배차 1건의 스냅샷 (request 는 얕은 복사, candidates 는 {driver, components?})"""
+    request: Dict[str, Any]
+    urgency_base: float
+    priority_boost: float
+    load: float
+    candidates: List[Dict[str, Any]]
+    live: Optional[ShadowChoice]
+    # 실제 배정 방식 (core/event_log.ASSIGNMENT_MODES)
+    assignment: str = "argmax"
+    _eta: Dict[str, float] = field(default_factory=dict)
+    _components: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def eta(self, algorithm, driver: Dict[str, Any]) -> float:
+        key = driver["driver_id"]
+        if key not in self._eta:
+            self._eta[key] = algorithm.driver_travel_time(driver, self.request)
+        return self._eta[key]
+
+    def components(self, algorithm, candidate: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        if candidate.get("components") and candidate["components"].get("urgency") != 999:
+            return candidate["components"]
+        # 긴급 배차로 점수가 계산되지 않은 후보: 효율·공정성은 긴급도와 무관하므로 한 번만 계산
+        key = candidate["driver"]["driver_id"]
+        if key not in self._components:
+            scored = algorithm.score_drivers(self.request, 0.0, [candidate["driver"]])
+            self._components[key] = scored[0]["components"] if scored else None
+        return self._components[key]
+
+
+@dataclass
+class PolicyStats:
+    samples: int = 0
+    no_choice: int = 0
+    disagreements: int = 0
+    emergency_flips: int = 0
+    eta_delta: float = 0.0
+    fairness_delta: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=RECENT))
+
+    def add(self, sample: ShadowSample, choice: Optional[ShadowChoice]):
+        self.samples += 1
+        if choice is None:
+            self.no_choice += 1
+            return
+        live = sample.live
+        self.eta_delta += choice.eta - live.eta
+        self.fairness_delta += choice.fairness - live.fairness
+        self.emergency_flips += choice.emergency != live.emergency
+        if choice.driver_id != live.driver_id:
+            self.disagreements += 1
+            self.recent.append({
+                "request_id": sample.request.get("request_id"),
+                "live_driver": live.driver_id,
+                "shadow_driver": choice.driver_id,
+                "live_emergency": live.emergency,
+                "shadow_emergency": choice.emergency,
+                "eta_delta": round(choice.eta - live.eta, 2),
+                "fairness_delta": round(choice.fairness - live.fairness, 2),
+            })
+
+    def summary(self) -> Dict[str, Any]:
+        compared = self.samples - self.no_choice
+        return {
+            "samples": self.samples,
+            "no_choice": self.no_choice,
+            "disagreement_rate": round(self.disagreements / compared, 4) if compared else None,
+            "emergency_flips": self.emergency_flips,
+            "mean_eta_delta_minutes": round(self.eta_delta / compared, 3) if compared else None,
+            "mean_fairness_delta": round(self.fairness_delta / compared, 3) if compared else None,
+            "recent_disagreements": list(self.recent),
+        }
+
+
+class ShadowEvaluator:
+    def __init__(self, algorithm, policies: Optional[List[Any]] = None, sample_rate: float = SAMPLE_RATE,
+                 max_queue: int = MAX_QUEUE):
+        self.algorithm = algorithm
+        self.policies: Dict[str, Any] = {p.name: p for p in policies or []}
+        self.sample_rate = sample_rate
+        self.max_queue = max_queue
+        self.stats_by_policy: Dict[str, PolicyStats] = {name: PolicyStats() for name in self.policies}
+        # 묶음 동시 배정 표본 (LIVE_POLICY 의 요청별 선택과 비교)
+        self.joint_stats_by_policy: Dict[str, PolicyStats] = {name: PolicyStats() for name in self.policies}
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.offered = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.evaluated = 0
+        self.pooled_skipped = 0
+        self.errors = 0
+        self.eval_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and bool(self.policies)
+
+    def register(self, policy: Any):
+        """DispatchPolicy 또는 name 속성과 choose(algorithm, sample) 를 가진 객체"""
+        self.policies[policy.name] = policy
+        self.stats_by_policy[policy.name] = PolicyStats()
+        self.joint_stats_by_policy[policy.name] = PolicyStats()
+
+    def reset(self):
+        self.stats_by_policy = {name: PolicyStats() for name in self.policies}
+        self.joint_stats_by_policy = {name: PolicyStats() for name in self.policies}
+        self.offered = self.sampled = self.dropped = self.evaluated = self.errors = 0
+        self.pooled_skipped = 0
+        self.eval_seconds = 0.0
+
+    # ------------------------------------------
+    # 배차 경로 (이벤트 루프 스레드)
+    # ------------------------------------------
+    def offer(self, request: Dict[str, Any], match: Dict[str, Any],
+              candidates: Optional[List[Dict[str, Any]]] = None):
+        """
+        실제 배차 결과를 표본 추출해 대기열에 넣는다
+        match       실제 선택 (scored → alternatives 순으로 점수 계산된 후보로 사용)
+        candidates  긴급 배차처럼 점수 없이 본 차량 목록
+        """
+        if self._queue is None or not self.enabled:
+            return
+        self.offered += 1
+        if random.random() >= self.sample_rate:
+            return
+        if self._queue.qsize() >= self.max_queue:
+            self.dropped += 1
+            return
+        self.sampled += 1
+        self._queue.put_nowait((dict(request), match, candidates))
+
+    # ------------------------------------------
+    # 평가 (전용 스레드)
+    # ------------------------------------------
+    def _sample(self, request: Dict[str, Any], match: Dict[str, Any],
+                candidates: Optional[List[Dict[str, Any]]]) -> Optional[ShadowSample]:
+        if "urgency_base" not in request:
+            return None
+        mode = assignment_mode(match)
+        if mode == "pooled":
+            self.pooled_skipped += 1
+            return None
+        scored = match.get("scored") or match.get("alternatives") or [match]
+        if candidates:
+            seen = {c["driver"]["driver_id"] for c in scored}
+            scored = scored + [{"driver": d} for d in candidates if d["driver_id"] not in seen]
+        sample = ShadowSample(
+            request=request,
+            urgency_base=request["urgency_base"],
+            priority_boost=request.get("priority_boost", 0.0),
+            load=request.get("system_load", 0.0),
+            candidates=scored,
+            live=None,
+            assignment=mode,
+        )
+        if mode == "joint":
+            # 실제 선택은 다른 요청과 함께 정한 것이라 요청별 정책과 비교할 기준이 아니다
+            sample.live = LIVE_POLICY.choose(self.algorithm, sample)
+            return sample if sample.live is not None else None
+        live_emergency = match.get("score") == 999
+        components = sample.components(self.algorithm, match)
+        sample.live = ShadowChoice(
+            match["driver"]["driver_id"], live_emergency,
+            sample.eta(self.algorithm, match["driver"]), components["fairness"] if components else 0.0,
+        )
+        return sample
+
+    def _evaluate(self, request, match, candidates):
+        started = time.perf_counter()
+        sample = self._sample(request, match, candidates)
+        if sample is not None:
+            stats = self.joint_stats_by_policy if sample.assignment == "joint" else self.stats_by_policy
+            for name, policy in list(self.policies.items()):
+                stats[name].add(sample, policy.choose(self.algorithm, sample))
+            self.evaluated += 1
+        self.eval_seconds += time.perf_counter() - started
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            try:
+                await loop.run_in_executor(self._executor, self._evaluate, *item)
+            except Exception:
+                self.errors += 1
+                logger.exception("섀도 정책 평가 실패")
+
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dispatch-shadow")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("섀도 정책 평가 시작: %s (표본 %.0f%%)", ", ".join(self.policies), self.sample_rate * 100)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "queue": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "offered": self.offered,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "evaluated": self.evaluated,
+            "pooled_skipped": self.pooled_skipped,
+            "errors": self.errors,
+            "avg_eval_ms": round(self.eval_seconds / self.evaluated * 1000, 3) if self.evaluated else None,
+            "live_policy": LIVE_POLICY,
+            "policies": {
+                name: {"policy": policy if isinstance(policy, DispatchPolicy) else type(policy).__name__,
+                       **self.stats_by_policy[name].summary(),
+                       # 묶음 동시 배정 표본: 실제 선택이 아니라 LIVE_POLICY 의 요청별 선택 대비
+                       "joint": self.joint_stats_by_policy[name].summary()}
+                for name, policy in self.policies.items()
+            },
+        }
+
+
+def evaluator_from_env(algorithm) -> ShadowEvaluator:
+    return ShadowEvaluator(algorithm, parse_policies(os.getenv("DISPATCH_SHADOW_POLICIES", "")))
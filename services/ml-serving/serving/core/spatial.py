@@ -0,0 +1,173 @@
+# serving/core/spatial.py
+"""
+운전자 위치 공간 인덱스 (격자 버킷)
+
+위도/경도를 cell_deg 크기 격자로 나눠 셀별로 운전자 id 를 보관한다.
+위치가 들어올 때마다 해당 운전자만 셀을 옮기므로 갱신은 O(1),
+k-최근접 질의는 가까운 셀부터 고리(ring) 단위로 넓혀 가며
+k 번째 후보까지의 거리가 다음 고리의 최소 거리보다 작아지면 멈춘다.
+
+휠체어 탑승 가능 차량은 별도 격자에도 넣어 두어
+휠체어 요청의 k-최근접 질의가 일반 차량을 건너뛰지 않게 한다.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+# 서울 위도(37.5°) 기준 경도 1도 ≈ 88km, 위도 1도 ≈ 111km
+KM_PER_DEG_LAT = 111.195
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dlat = p2 - p1
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+@dataclass
+class IndexedDriver:
+    driver_id: str
+    lat: float
+    lon: float
+    wheelchair_capable: bool
+    cell: Tuple[int, int]
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class DriverSpatialIndex:
+    def __init__(self, cell_deg: float = 0.01, ref_lat: float = 37.55, max_radius_cells: int = 60):
+        self.cell_deg = cell_deg
+        self.max_radius_cells = max_radius_cells
+        # 셀 한 칸의 최소 변 길이(km) — 고리 r 의 최소 거리 하한 계산용
+        self.cell_km = cell_deg * KM_PER_DEG_LAT * min(1.0, math.cos(math.radians(ref_lat)))
+        self._cos_ref = math.cos(math.radians(ref_lat))
+        self._drivers: Dict[str, IndexedDriver] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._wc_cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._lock = threading.RLock()
+
+    # ── 갱신 ─────────────────────────────────────────────────
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    @staticmethod
+    def _discard(cells: Dict[Tuple[int, int], Set[str]], cell: Tuple[int, int], driver_id: str):
+        bucket = cells.get(cell)
+        if bucket is not None:
+            bucket.discard(driver_id)
+            if not bucket:
+                del cells[cell]
+
+    def upsert(self, driver_id: str, lat: float, lon: float,
+               wheelchair_capable: bool = False, **data) -> IndexedDriver:
+        cell = self._cell(lat, lon)
+        with self._lock:
+            prev = self._drivers.get(driver_id)
+            if prev is not None:
+                if prev.cell != cell or prev.wheelchair_capable != wheelchair_capable:
+                    self._discard(self._cells, prev.cell, driver_id)
+                    if prev.wheelchair_capable:
+                        self._discard(self._wc_cells, prev.cell, driver_id)
+                    prev = None
+                else:
+                    prev.lat, prev.lon = lat, lon
+                    prev.data.update(data)
+                    return prev
+
+            entry = IndexedDriver(driver_id, lat, lon, wheelchair_capable, cell, dict(data))
+            self._drivers[driver_id] = entry
+            self._cells.setdefault(cell, set()).add(driver_id)
+            if wheelchair_capable:
+                self._wc_cells.setdefault(cell, set()).add(driver_id)
+            return entry
+
+    def remove(self, driver_id: str) -> bool:
+        with self._lock:
+            entry = self._drivers.pop(driver_id, None)
+            if entry is None:
+                return False
+            self._discard(self._cells, entry.cell, driver_id)
+            if entry.wheelchair_capable:
+                self._discard(self._wc_cells, entry.cell, driver_id)
+            return True
+
+    def get(self, driver_id: str) -> Optional[IndexedDriver]:
+        return self._drivers.get(driver_id)
+
+    # ── 질의 ─────────────────────────────────────────────────
+    def _approx_km(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        # 도시 규모에서는 등장방형 근사로 충분 (순위 계산용)
+        dx = (lon2 - lon1) * self._cos_ref
+        dy = lat2 - lat1
+        return math.hypot(dx, dy) * KM_PER_DEG_LAT
+
+    @staticmethod
+    def _ring(cx: int, cy: int, r: int) -> Iterator[Tuple[int, int]]:
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 10,
+        wheelchair_only: bool = False,
+        predicate: Optional[Callable[[IndexedDriver], bool]] = None,
+        max_km: Optional[float] = None,
+    ) -> List[Tuple[IndexedDriver, float]]:
+        """가까운 순서로 최대 k 명 (운전자, 근사 거리 km)"""
+        cells = self._wc_cells if wheelchair_only else self._cells
+        cx, cy = self._cell(lat, lon)
+        best: List[Tuple[float, str]] = []  # (−거리, id) max-heap
+        with self._lock:
+            if not cells:
+                return []
+            for r in range(self.max_radius_cells + 1):
+                # 고리 r 에 있는 점까지의 최소 거리 하한
+                ring_min_km = max(r - 1, 0) * self.cell_km
+                if len(best) >= k and -best[0][0] <= ring_min_km:
+                    break
+                if max_km is not None and ring_min_km > max_km:
+                    break
+                for cell in self._ring(cx, cy, r):
+                    for driver_id in cells.get(cell, ()):
+                        d = self._drivers[driver_id]
+                        if predicate is not None and not predicate(d):
+                            continue
+                        dist = self._approx_km(lat, lon, d.lat, d.lon)
+                        if max_km is not None and dist > max_km:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-dist, driver_id))
+                        elif dist < -best[0][0]:
+                            heapq.heapreplace(best, (-dist, driver_id))
+            return [(self._drivers[i], -neg) for neg, i in sorted(best, reverse=True)]
+
+    def snapshot(self) -> List[IndexedDriver]:
+        with self._lock:
+            return list(self._drivers.values())
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "drivers": len(self._drivers),
+            "wheelchair_capable": sum(len(b) for b in self._wc_cells.values()),
+            "occupied_cells": len(self._cells),
+            "cell_deg": self.cell_deg,
+        }
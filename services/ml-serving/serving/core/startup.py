@@ -0,0 +1,171 @@
+"""
+콜드 스타트 예산 관리
+
+`import serving.api` 가 무거운 의존성(google.generativeai, scipy, joblib → xgboost/sklearn)과
+모델 unpickle 까지 끌고 오면 컨테이너가 요청을 받기까지 수 초가 걸린다.
+- lazy_import(): 드물게 쓰는 무거운 모듈은 첫 속성 접근 시점에 import (소요 시간 기록)
+- readiness: 모델 같은 구성 요소의 적재 상태. /healthz(liveness) 와 별개로 /readyz 가 참조한다
+- import_profile(): `python -X importtime` 으로 import 시간 상위 모듈을 뽑는다
+
+    python -m serving.core.startup --top 20 --budget 1.0   # 예산 초과 시 종료 코드 1
+
+환경 변수
+---------
+MODEL_PRELOAD            background(기본: 시작 후 백그라운드 적재) / eager(시작 시 적재 완료까지 대기)
+                         / lazy(첫 요청에서 적재)
+STARTUP_IMPORT_BUDGET    import_profile CLI 의 기본 예산(초, 기본 1.0)
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "background")
+IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "1.0"))
+
+# 지연 import / 지연 적재에 걸린 시간 (초)
+timings: Dict[str, float] = {}
+
+
+# ------------------------------------------
+# 지연 import
+# ------------------------------------------
+class _LazyModule(types.ModuleType):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    t0 = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    timings[f"import {self.__name__}"] = time.perf_counter() - t0
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._load(), item)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "deferred"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """이미 import 되어 있으면 그대로, 아니면 첫 속성 접근 때 import 하는 대리 모듈"""
+    return sys.modules.get(name) or _LazyModule(name)
+
+
+# ------------------------------------------
+# 준비 상태 (readiness)
+# ------------------------------------------
+class Readiness:
+    """구성 요소별 pending → loading → ready / failed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, required: bool = True):
+        with self._lock:
+            self._components.setdefault(name, {"state": "pending"})["required"] = required
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._components.setdefault(name, {"required": True}).update(fields)
+
+    def load(self, name: str, fn: Callable[[], Any]) -> Any:
+        """fn 을 실행하며 상태와 소요 시간을 기록 (예외는 기록 후 다시 던짐)"""
+        self._set(name, state="loading", error=None)
+        t0 = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self._set(name, state="failed", error=str(e), seconds=round(time.perf_counter() - t0, 3))
+            raise
+        self._set(name, state="ready", seconds=round(time.perf_counter() - t0, 3))
+        timings[f"load {name}"] = time.perf_counter() - t0
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(c) for name, c in self._components.items()}
+        return {
+            "ready": all(c["state"] == "ready" for c in components.values() if c["required"]),
+            "components": components,
+            "timings": {k: round(v, 3) for k, v in timings.items()},
+        }
+
+
+readiness = Readiness()
+
+
+# ------------------------------------------
+# import 시간 프로파일
+# ------------------------------------------
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str = "serving.api", top: int = 20) -> Dict[str, Any]:
+    """
+    새 인터프리터에서 module 을 import 하며 -X importtime 출력을 모아
+    누적 시간 상위 top 개 최상위 패키지와 전체 시간을 돌려준다
+    """
+    root = Path(__file__).resolve().parents[2]
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": str(root) + os.pathsep + os.environ.get("PYTHONPATH", "")},
+    )
+    packages: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if depth == 1:  # 최상위 import 만 합산 (하위 모듈은 누적값에 포함됨)
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + cumulative
+    ranked = sorted(packages.items(), key=lambda kv: -kv[1])[:top]
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "total_seconds": round(sum(packages.values()) / 1e6, 3),
+        "top": [{"package": name, "seconds": round(us / 1e6, 3)} for name, us in ranked],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="serving import 시간 프로파일")
+    parser.add_argument("--module", default="serving.api")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET, help="허용 import 시간(초)")
+    args = parser.parse_args(argv)
+
+    profile = import_profile(args.module, args.top)
+    if not profile["ok"]:
+        print(f"import 실패: {profile['error']}")
+        return 2
+    for row in profile["top"]:
+        print(f"{row['seconds']:8.3f}s  {row['package']}")
+    print(f"{profile['total_seconds']:8.3f}s  합계 ({args.module}, 예산 {args.budget:.3f}s)")
+    return 0 if profile["total_seconds"] <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
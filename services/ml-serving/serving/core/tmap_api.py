@@ -1,11 +1,10 @@
-import httpx
 from ..core.utils import get_env
+from . import upstream
 
-TMAP_KEY = get_env("TMAP_API_KEY")
 
 async def get_tmap_travel_time(start_lng, start_lat, end_lng, end_lat) -> int:
     url = "https://apis.openapi.sk.com/tmap/routes"
-    headers = {"appKey": TMAP_KEY, "Content-Type": "application/json"}
+    headers = {"appKey": get_env("TMAP_API_KEY"), "Content-Type": "application/json"}
     body = {
         "startX": str(start_lng),
         "startY": str(start_lat),
@@ -15,7 +14,7 @@ async def get_tmap_travel_time(start_lng, start_lat, end_lng, end_lat) -> int:
         "resCoordType": "WGS84GEO",
         "searchOption": "0",
     }
-    async with httpx.AsyncClient(timeout=10) as client:
+    async with upstream.async_client(timeout=10) as client:
         r = await client.post(url, headers=headers, json=body)
         r.raise_for_status()
         return r.json()["features"][0]["properties"]["totalTime"]
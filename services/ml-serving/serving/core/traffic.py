@@ -0,0 +1,235 @@
+"""
+실시간 교통 혼잡 계수 (자치구 쌍 × 시간대)
+
+배차 ETA 는 직선거리 / 25km/h 에 출퇴근 시간대를 하드코딩한 모델이었고,
+SmartDispatchAlgorithm.real_time_traffic 은 읽기만 하고 아무도 채우지 않았다.
+여기서는
+- 정해진 예산(TRAFFIC_SAMPLES_PER_RUN)만큼 자치구 쌍을 골라 Tmap 자동차 ETA 를 받고
+  (배차에서 실제로 조회된 쌍 중 현재 시간대 관측이 가장 오래된 쌍 우선)
+- 자유 주행 추정(직선거리 / TRAFFIC_FREE_FLOW_KMH)과의 비율을 혼잡 계수로 보고
+- 쌍 × 시간대 행렬에 지수이동평균(EMA)으로 누적한 뒤
+- 새 배열을 만들어 참조를 바꿔 끼우고 npz 로 원자적으로 저장한다 (다른 워커는 mtime 으로 다시 읽음)
+
+배차 쪽 비용은 factor() 의 dict 조회 + 배열 인덱스 한 번이다. 관측이 없는 칸은 None 을 돌려주고
+호출자는 기존 시간대 휴리스틱을 쓴다.
+
+환경 변수
+---------
+TRAFFIC_SAMPLING          1 이면 워밍업 스케줄러에 표본 수집 작업 등록 (기본 0, Tmap 호출 비용)
+TRAFFIC_SAMPLE_INTERVAL   표본 수집 주기(초, 기본 300)
+TRAFFIC_SAMPLES_PER_RUN   1회 수집 시 Tmap 호출 수 (기본 12)
+TRAFFIC_EMA_ALPHA         EMA 가중치 (기본 0.3)
+TRAFFIC_FREE_FLOW_KMH     자유 주행 속도 (기본 32.5 — 기존 모델의 심야 속도)
+TRAFFIC_MATRIX_PATH       저장 파일 (기본: serving/app/cube/traffic_factors.npz)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .locations import DISTRICT_CENTROIDS, DISTRICT_NAMES, resolve
+from .spatial import haversine_km
+from .tmap_api import get_tmap_travel_time
+from .utils import model_dir
+
+logger = logging.getLogger(__name__)
+
+HOURS = 24
+SAMPLING = os.getenv("TRAFFIC_SAMPLING", "0") == "1"
+SAMPLE_INTERVAL = float(os.getenv("TRAFFIC_SAMPLE_INTERVAL", "300"))
+SAMPLES_PER_RUN = int(os.getenv("TRAFFIC_SAMPLES_PER_RUN", "12"))
+EMA_ALPHA = float(os.getenv("TRAFFIC_EMA_ALPHA", "0.3"))
+FREE_FLOW_KMH = float(os.getenv("TRAFFIC_FREE_FLOW_KMH", "32.5"))
+
+# 이상치 방어 (Tmap 오류·경로 우회 등)
+MIN_FACTOR, MAX_FACTOR = 0.5, 6.0
+# 다른 워커가 저장한 파일 확인 주기 (초)
+RELOAD_CHECK_SECONDS = 30.0
+SAMPLE_CONCURRENCY = 4
+
+
+def default_traffic_path() -> Path:
+    return Path(os.getenv("TRAFFIC_MATRIX_PATH", str(model_dir().parent / "cube" / "traffic_factors.npz")))
+
+
+def free_flow_minutes(distance_km: float) -> float:
+    return distance_km / FREE_FLOW_KMH * 60
+
+
+class TrafficFactors:
+    """
+    factors[i, j, h]  자치구 i → j, h 시 혼잡 계수 (관측 없으면 NaN)
+    updated[i, j, h]  마지막 관측 시각 (epoch 초, 0 = 없음)
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_traffic_path())
+        n = len(DISTRICT_NAMES)
+        self.factors = np.full((n, n, HOURS), np.nan, dtype=np.float32)
+        self.updated = np.zeros((n, n, HOURS))
+        # 배차에서 조회된 쌍 (표본 우선순위용)
+        self.requested = np.zeros((n, n), dtype=np.int64)
+        self._index: Dict[str, Optional[int]] = {}
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.samples = 0
+        self.sample_errors = 0
+        self.published_at: Optional[float] = None
+
+    # ------------------------------------------
+    # 조회 (배차 경로)
+    # ------------------------------------------
+    def _district(self, name: str) -> Optional[int]:
+        idx = self._index.get(name, -1)
+        if idx == -1:
+            district = resolve(name)
+            idx = DISTRICT_NAMES.index(district) if district else None
+            self._index[name] = idx
+        return idx
+
+    def factor_matrix(self, names: List[str], hour: int) -> np.ndarray:
+        """names × names 지역 쌍의 h 시 혼잡 계수 (관측 없음·미등록 지역은 NaN, 배차 조회 횟수에는 넣지 않음)"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + RELOAD_CHECK_SECONDS
+            self.refresh()
+        rows = np.array([-1 if i is None else i for i in map(self._district, names)])
+        known = rows >= 0
+        factors = self.factors  # 발행된 배열 참조 한 번만 읽는다
+        out = factors[rows[:, None].clip(0), rows[None, :].clip(0), hour].astype(float)
+        out[~(known[:, None] & known[None, :])] = np.nan
+        return out
+
+    def factor(self, from_loc: str, to_loc: str, hour: int, count: bool = True) -> Optional[float]:
+        """count=False 이면 배차 조회 횟수(표본 우선순위)에 넣지 않는다 (이벤트 재생)"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + RELOAD_CHECK_SECONDS
+            self.refresh()
+        i, j = self._district(from_loc), self._district(to_loc)
+        if i is None or j is None:
+            return None
+        if count:
+            self.requested[i, j] += 1
+        value = self.factors[i, j, hour]  # 발행된 배열 참조 한 번만 읽는다
+        return None if np.isnan(value) else float(value)
+
+    # ------------------------------------------
+    # 표본 수집 + EMA + 발행
+    # ------------------------------------------
+    def pick_pairs(self, hour: int, budget: int) -> List[Tuple[int, int]]:
+        """현재 시간대 관측이 오래된 순, 배차에서 조회된 쌍 우선 (i ≠ j)"""
+        n = len(DISTRICT_NAMES)
+        staleness = self.updated[:, :, hour].copy()
+        staleness[np.arange(n), np.arange(n)] = np.inf
+        wanted = self.requested > 0
+        # 조회된 쌍은 같은 오래됨이라도 먼저 (조회 안 된 쌍에 큰 오프셋)
+        order = np.lexsort((staleness.ravel(), ~wanted.ravel()))
+        pairs = [divmod(int(k), n) for k in order[:budget]]
+        return [(i, j) for i, j in pairs if i != j]
+
+    async def sample(self, budget: int = SAMPLES_PER_RUN) -> Dict[str, Any]:
+        hour = datetime.now().hour
+        pairs = self.pick_pairs(hour, budget)
+        semaphore = asyncio.Semaphore(SAMPLE_CONCURRENCY)
+
+        async def observe(i: int, j: int) -> Optional[float]:
+            (lat1, lon1), (lat2, lon2) = DISTRICT_CENTROIDS[DISTRICT_NAMES[i]], DISTRICT_CENTROIDS[DISTRICT_NAMES[j]]
+            async with semaphore:
+                try:
+                    seconds = await get_tmap_travel_time(lon1, lat1, lon2, lat2)
+                except Exception as e:
+                    logger.debug("Tmap ETA 실패 %s→%s: %s", DISTRICT_NAMES[i], DISTRICT_NAMES[j], e)
+                    return None
+            free = free_flow_minutes(haversine_km(lat1, lon1, lat2, lon2))
+            return float(np.clip(seconds / 60 / free, MIN_FACTOR, MAX_FACTOR)) if free > 0 else None
+
+        observed = await asyncio.gather(*(observe(i, j) for i, j in pairs))
+        results = [(i, j, f) for (i, j), f in zip(pairs, observed) if f is not None]
+        self.samples += len(results)
+        self.sample_errors += len(pairs) - len(results)
+        if results:
+            self.publish(hour, results)
+        return {"hour": hour, "requested": len(pairs), "observed": len(results)}
+
+    def publish(self, hour: int, observations: List[Tuple[int, int, float]]):
+        """EMA 반영한 새 배열을 만들어 참조를 바꿔 끼우고 파일로 저장"""
+        self.refresh()
+        now = time.time()
+        with self._lock:
+            factors, updated = self.factors.copy(), self.updated.copy()
+            for i, j, value in observations:
+                prev = factors[i, j, hour]
+                factors[i, j, hour] = value if np.isnan(prev) else (1 - EMA_ALPHA) * prev + EMA_ALPHA * value
+                updated[i, j, hour] = now
+            factors.setflags(write=False)
+            self.factors, self.updated = factors, updated
+            self.published_at = now
+            self._save_locked()
+
+    # ------------------------------------------
+    # 저장 / 로드
+    # ------------------------------------------
+    def _save_locked(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f, factors=self.factors, updated=self.updated,
+                districts=np.array(DISTRICT_NAMES, dtype=str), free_flow_kmh=FREE_FLOW_KMH,
+            )
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime
+
+    def refresh(self):
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            try:
+                with np.load(self.path, allow_pickle=False) as data:
+                    if list(data["districts"]) != DISTRICT_NAMES or float(data["free_flow_kmh"]) != FREE_FLOW_KMH:
+                        logger.warning("교통 계수 파일 형식이 달라 무시: %s", self.path)
+                        return
+                    factors = data["factors"]
+                    factors.setflags(write=False)
+                    self.factors, self.updated = factors, data["updated"]
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning("교통 계수 로드 실패: %s", e)
+                return
+            self._mtime = mtime
+            self.published_at = mtime
+
+    def stats(self) -> Dict[str, Any]:
+        observed = ~np.isnan(self.factors)
+        hour = datetime.now().hour
+        return {
+            "path": str(self.path),
+            "sampling": SAMPLING,
+            "coverage": round(float(observed.mean()), 4),
+            "coverage_current_hour": round(float(observed[:, :, hour].mean()), 4),
+            "mean_factor_current_hour": (
+                round(float(np.nanmean(self.factors[:, :, hour])), 3) if observed[:, :, hour].any() else None
+            ),
+            "requested_pairs": int((self.requested > 0).sum()),
+            "samples": self.samples,
+            "sample_errors": self.sample_errors,
+            "published_at": (
+                datetime.fromtimestamp(self.published_at).isoformat(timespec="seconds") if self.published_at else None
+            ),
+        }
+
+
+traffic_factors = TrafficFactors()
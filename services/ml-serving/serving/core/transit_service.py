@@ -0,0 +1,310 @@
+"""
+대중교통 비교 서비스
+
+public_api.get_public_transit_alternatives 는 요청마다 Tmap 대중교통 API 를 그대로 호출했다.
+여기서는
+- 출발/도착 좌표를 격자(TRANSIT_SNAP_DEG)로 맞추고 출발 시각을 시간대 구간으로 묶어
+  워커 공유 캐시(core/cache.py, namespace "transit")에 경로 요약을 저장하고,
+  같은 키의 동시 요청은 하나의 호출로 합친다.
+- 여러 출발/도착 쌍은 compare_many 로 한 번에 받아 동시 호출 수(TRANSIT_CONCURRENCY)를 제한한다.
+- 자치구 × 자치구 대중교통 소요시간 행렬을 밤마다 미리 계산해 npz 로 저장하고,
+  도시 전체 접근성 비교는 이 행렬과 집계 큐브(usage_cube)만으로 계산한다.
+
+환경 변수
+---------
+TRANSIT_SNAP_DEG        좌표 격자 크기 (기본 0.005° ≈ 500m)
+TRANSIT_BUCKETS         시간대 구간 경계 (기본 "0,7,10,17,21")
+TRANSIT_CACHE_TTL       경로 캐시 만료 (초, 기본 21600)
+TRANSIT_CONCURRENCY     Tmap 동시 호출 수 (기본 8)
+TRANSIT_MATRIX_PATH     자치구 행렬 파일 (기본: serving/app/cube/transit_matrix.npz)
+TRANSIT_MATRIX_NIGHTLY  1 이면 매일 TRANSIT_MATRIX_HOUR 시에 행렬 재계산 (기본 0, serving/warmup.py)
+TRANSIT_MATRIX_HOUR     재계산 시각 (기본 3)
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import fcntl
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import cache as cache_tier
+from .cache import KEY_SEP
+from .locations import DISTRICT_CENTROIDS, DISTRICT_NAMES, resolve
+from .public_api import get_public_transit_alternatives
+from .spatial import haversine_km
+from .usage_cube import usage_cube
+from .utils import model_dir
+
+logger = logging.getLogger(__name__)
+
+SNAP_DEG = float(os.getenv("TRANSIT_SNAP_DEG", "0.005"))
+BUCKETS: List[int] = [int(h) for h in os.getenv("TRANSIT_BUCKETS", "0,7,10,17,21").split(",")]
+CACHE_TTL = int(os.getenv("TRANSIT_CACHE_TTL", str(6 * 3600)))
+CONCURRENCY = int(os.getenv("TRANSIT_CONCURRENCY", "8"))
+MATRIX_HOUR = int(os.getenv("TRANSIT_MATRIX_HOUR", "3"))
+NIGHTLY = os.getenv("TRANSIT_MATRIX_NIGHTLY", "0") == "1"
+
+NAMESPACE = "equal-taxi:transit"
+# 택시 이동시간 근사 (직선거리 × 우회계수 / 평균 속도)
+ROAD_FACTOR = 1.3
+TAXI_KMH = 25.0
+
+Point = Tuple[float, float]
+
+
+def matrix_path() -> Path:
+    return Path(os.getenv("TRANSIT_MATRIX_PATH", str(model_dir().parent / "cube" / "transit_matrix.npz")))
+
+
+def snap(lat: float, lon: float) -> Point:
+    return (round(round(lat / SNAP_DEG) * SNAP_DEG, 6), round(round(lon / SNAP_DEG) * SNAP_DEG, 6))
+
+
+def time_bucket(when: Optional[datetime] = None) -> int:
+    hour = (when or datetime.now()).hour
+    return bisect.bisect_right(BUCKETS, hour) - 1
+
+
+def cache_key(origin: Point, dest: Point, bucket: int) -> str:
+    raw = json.dumps([snap(*origin), snap(*dest), bucket])
+    digest = hashlib.sha1(raw.encode()).hexdigest()[:20]
+    return KEY_SEP.join([NAMESPACE, "transit", digest])
+
+
+def summarize(response: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Tmap 대중교통 응답 → 가장 빠른 경로 요약 (분 단위)"""
+    if not response:
+        return None
+    itineraries = ((response.get("metaData") or {}).get("plan") or {}).get("itineraries") or []
+    if not itineraries:
+        return None
+    best = min(itineraries, key=lambda it: it.get("totalTime", math.inf))
+    fare = ((best.get("fare") or {}).get("regular") or {}).get("totalFare")
+    return {
+        "예상소요시간": round(best.get("totalTime", 0) / 60, 1),
+        "도보시간": round(best.get("totalWalkTime", 0) / 60, 1),
+        "환승횟수": best.get("transferCount"),
+        "요금": fare,
+        "경로수": len(itineraries),
+    }
+
+
+def taxi_estimate(origin: Point, dest: Point, origin_name: Optional[str] = None) -> Dict[str, Any]:
+    """콜택시 = 출발 자치구 평균 대기(집계 큐브) + 직선거리 기반 이동시간"""
+    drive = haversine_km(*origin, *dest) * ROAD_FACTOR / TAXI_KMH * 60
+    district = resolve(origin_name) if origin_name else None
+    wait = None
+    if district:
+        stats, _ = usage_cube.location_summary(district, usage_cube.dates)
+        wait = stats["평균_대기시간"]
+    return {
+        "대기시간": wait,
+        "이동시간": round(drive, 1),
+        "총소요시간": round(drive + wait, 1) if wait is not None else None,
+    }
+
+
+class TransitService:
+    def __init__(self, concurrency: int = CONCURRENCY):
+        self.concurrency = concurrency
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self._matrix: Optional[Dict[str, np.ndarray]] = None
+        self._matrix_mtime: Optional[float] = None
+
+    # ------------------------------------------
+    # 단일 경로 (캐시 + 동시 요청 합치기)
+    # ------------------------------------------
+    async def route(self, origin: Point, dest: Point, when: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        key = cache_key(origin, dest, time_bucket(when))
+        backend = cache_tier.get_backend()
+        cached = await backend.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            # 캐시 키와 같은 격자점으로 호출해야 같은 키의 결과가 일관된다
+            (olat, olon), (dlat, dlon) = snap(*origin), snap(*dest)
+            self.calls += 1
+            summary = summarize(await get_public_transit_alternatives(olat, olon, dlat, dlon))
+            if summary is not None:
+                await backend.set(key, json.dumps(summary, ensure_ascii=False).encode(), expire=CACHE_TTL)
+            future.set_result(summary)
+            return summary
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            # 기다리는 쪽이 없을 때 "exception was never retrieved" 경고 방지
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    # ------------------------------------------
+    # 여러 쌍 (동시 호출 수 제한)
+    # ------------------------------------------
+    async def compare_many(self, pairs: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        pairs: [{origin: (lat, lon), dest: (lat, lon), origin_name?, dest_name?, depart_at?}]
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(pair: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    transit = await self.route(pair["origin"], pair["dest"], pair.get("depart_at"))
+                except Exception as e:
+                    logger.warning("대중교통 경로 조회 실패: %s", e)
+                    transit = None
+            return {
+                "출발지": pair.get("origin_name") or list(pair["origin"]),
+                "도착지": pair.get("dest_name") or list(pair["dest"]),
+                "콜택시": taxi_estimate(pair["origin"], pair["dest"], pair.get("origin_name")),
+                "대중교통": transit,
+            }
+
+        return await asyncio.gather(*(one(p) for p in pairs))
+
+    # ------------------------------------------
+    # 자치구 × 자치구 행렬 (야간 사전 계산)
+    # ------------------------------------------
+    async def build_matrix(self) -> Dict[str, Any]:
+        n = len(DISTRICT_NAMES)
+        minutes = np.full((n, n), np.nan, dtype=np.float32)
+        transfers = np.full((n, n), np.nan, dtype=np.float32)
+        np.fill_diagonal(minutes, 0.0)
+        np.fill_diagonal(transfers, 0.0)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # 야간 계산이라도 주간 이동 기준 시간대(10~17시)로 캐시 키를 맞춘다
+        when = datetime.now().replace(hour=12, minute=0)
+
+        async def fill(i: int, j: int):
+            async with semaphore:
+                try:
+                    summary = await self.route(
+                        DISTRICT_CENTROIDS[DISTRICT_NAMES[i]], DISTRICT_CENTROIDS[DISTRICT_NAMES[j]], when
+                    )
+                except Exception as e:
+                    logger.warning("행렬 %s→%s 실패: %s", DISTRICT_NAMES[i], DISTRICT_NAMES[j], e)
+                    return
+            if summary:
+                minutes[i, j] = summary["예상소요시간"]
+                if summary["환승횟수"] is not None:
+                    transfers[i, j] = summary["환승횟수"]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fill(i, j) for i in range(n) for j in range(n) if i != j))
+
+        path = matrix_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f, minutes=minutes, transfers=transfers,
+                districts=np.array(DISTRICT_NAMES, dtype=str), built_at=np.array(time.time()),
+            )
+        os.replace(tmp, path)
+        filled = int(np.isfinite(minutes).sum() - n)
+        logger.info("대중교통 행렬 갱신: %d/%d 쌍 (%.1fs)", filled, n * (n - 1), time.perf_counter() - started)
+        return {"pairs": n * (n - 1), "filled": filled, "seconds": round(time.perf_counter() - started, 1)}
+
+    def matrix(self) -> Optional[Dict[str, np.ndarray]]:
+        path = matrix_path()
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if mtime != self._matrix_mtime:
+            with np.load(path, allow_pickle=False) as data:
+                if list(data["districts"]) != DISTRICT_NAMES:
+                    return None
+                self._matrix = {k: data[k] for k in ("minutes", "transfers", "built_at")}
+            self._matrix_mtime = mtime
+        return self._matrix
+
+    def accessibility(self) -> Dict[str, Any]:
+        """
+        자치구별 대중교통 평균 소요시간(다른 24개 구까지) vs 콜택시(평균 대기 + 이동)
+        — 외부 호출 없이 행렬/큐브만 사용
+        """
+        matrix = self.matrix()
+        if matrix is None:
+            return {"built_at": None, "districts": {}}
+        minutes = matrix["minutes"].astype(float)
+        off_diag = ~np.eye(len(DISTRICT_NAMES), dtype=bool)
+        centroids = np.array([DISTRICT_CENTROIDS[d] for d in DISTRICT_NAMES])
+        lat = np.radians(centroids[:, 0])[:, None]
+        dlat = lat - lat.T
+        dlon = np.radians(centroids[:, 1])[:, None] - np.radians(centroids[:, 1])[None, :]
+        h = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlon / 2) ** 2
+        drive = 2 * 6371.0 * np.arcsin(np.sqrt(h)) * ROAD_FACTOR / TAXI_KMH * 60
+
+        has_usage = bool(usage_cube.dates)
+        result = {}
+        for i, district in enumerate(DISTRICT_NAMES):
+            row = minutes[i][off_diag[i]]
+            wait = usage_cube.location_summary(district, usage_cube.dates)[0]["평균_대기시간"] if has_usage else None
+            taxi = float(drive[i][off_diag[i]].mean()) + wait if wait is not None else None
+            transit = float(np.nanmean(row)) if np.isfinite(row).any() else None
+            result[district] = {
+                "대중교통_평균소요": round(transit, 1) if transit is not None else None,
+                "콜택시_평균소요": round(taxi, 1) if taxi is not None else None,
+                "콜택시_평균대기": wait,
+            }
+        return {"built_at": float(matrix["built_at"]), "districts": result}
+
+    def metrics(self) -> Dict[str, Any]:
+        matrix = self.matrix()
+        return {
+            "upstream_calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "matrix_built_at": float(matrix["built_at"]) if matrix is not None else None,
+        }
+
+    # ------------------------------------------
+    # 야간 갱신 (워커 중 하나만)
+    # ------------------------------------------
+    async def refresh_matrix_exclusive(self) -> Optional[Dict[str, Any]]:
+        """
+        파일 잠금을 잡은 워커만 행렬을 계산 (나머지는 파일 갱신을 읽기만)
+        반환: 다른 워커가 계산 중이면 None. 계산 실패는 예외 그대로 (호출한 쪽이 실패로 기록)
+        """
+        lock_path = matrix_path().with_suffix(".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            try:
+                return await self.build_matrix()
+            except Exception as e:
+                logger.error("대중교통 행렬 갱신 실패: %s", e)
+                raise
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+transit_service = TransitService()
@@ -0,0 +1,396 @@
+# serving/core/upstream.py
+"""
+외부 API(서울시 / Tmap / Gemini) 호출용 HTTP 클라이언트 팩토리와
+녹화(record) / 재생(replay) 트랜스포트
+
+환경 변수
+---------
+UPSTREAM_MODE         live(기본) | record | replay
+UPSTREAM_FIXTURE_DIR  녹화 파일 디렉토리 (기본: ml-serving/fixtures/upstream)
+UPSTREAM_LATENCY      재생 지연 분포
+                        none | recorded | fixed:<ms> | uniform:<min_ms>,<max_ms>
+                        | lognormal:<median_ms>,<sigma>
+UPSTREAM_LATENCY_SCALE  지연 배율 (기본 1.0)
+UPSTREAM_ERROR_RATE   재생 시 오류 주입 확률 (0~1, 기본 0)
+UPSTREAM_ERRORS       주입할 오류 종류 (쉼표 구분: 500,502,503,timeout / 기본 503,timeout)
+UPSTREAM_SEED         지연/오류 난수 시드
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 녹화 파일에 남기지 않을 인증 파라미터/헤더
+SECRET_PARAMS = {"key", "appkey", "api_key", "serviceKey"}
+SECRET_HEADERS = {"appkey", "authorization", "x-goog-api-key"}
+# 이미 디코딩한 본문과 맞지 않게 되는 헤더 (다시 감싸는 응답·녹화 파일에서 뺀다)
+BODY_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+def upstream_mode() -> str:
+    return os.getenv("UPSTREAM_MODE", "live").strip().lower()
+
+
+def fixture_dir() -> Path:
+    default = Path(__file__).resolve().parents[2] / "fixtures" / "upstream"
+    return Path(os.getenv("UPSTREAM_FIXTURE_DIR", str(default)))
+
+
+# ────────────────────────────────────────────────────────────────
+# 지연 / 오류 주입 설정
+# ────────────────────────────────────────────────────────────────
+@dataclass
+class ReplayProfile:
+    latency: str = "none"
+    latency_scale: float = 1.0
+    error_rate: float = 0.0
+    errors: List[str] = field(default_factory=lambda: ["503", "timeout"])
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ReplayProfile":
+        seed = os.getenv("UPSTREAM_SEED")
+        return cls(
+            latency=os.getenv("UPSTREAM_LATENCY", "none"),
+            latency_scale=float(os.getenv("UPSTREAM_LATENCY_SCALE", "1.0")),
+            error_rate=float(os.getenv("UPSTREAM_ERROR_RATE", "0")),
+            errors=[e.strip() for e in os.getenv("UPSTREAM_ERRORS", "503,timeout").split(",") if e.strip()],
+            seed=int(seed) if seed else None,
+        )
+
+    def sample_latency(self, recorded_ms: Optional[float]) -> float:
+        """지연 시간(초) 샘플"""
+        kind, _, arg = self.latency.partition(":")
+        params = [float(x) for x in arg.split(",") if x]
+        with self._lock:
+            if kind == "recorded":
+                ms = recorded_ms or 0.0
+            elif kind == "fixed":
+                ms = params[0]
+            elif kind == "uniform":
+                ms = self._rng.uniform(params[0], params[1])
+            elif kind == "lognormal":
+                ms = self._rng.lognormvariate(math.log(params[0]), params[1])
+            else:
+                ms = 0.0
+        return max(ms, 0.0) * self.latency_scale / 1000
+
+    def sample_error(self) -> Optional[str]:
+        if self.error_rate <= 0 or not self.errors:
+            return None
+        with self._lock:
+            if self._rng.random() >= self.error_rate:
+                return None
+            return self._rng.choice(self.errors)
+
+
+# ────────────────────────────────────────────────────────────────
+# 녹화 파일 저장소
+# ────────────────────────────────────────────────────────────────
+def _canonical_params(url: httpx.URL) -> List[Tuple[str, str]]:
+    return sorted(
+        (k, v) for k, v in parse_qsl(url.query.decode(), keep_blank_values=True)
+        if k not in SECRET_PARAMS
+    )
+
+
+def request_key(method: str, url: httpx.URL, body: bytes = b"") -> str:
+    """메서드 + 호스트 + 경로 + (인증 제외) 쿼리 + 본문 해시"""
+    h = hashlib.sha1()
+    h.update(method.upper().encode())
+    h.update(f"{url.host}{url.path}?{urlencode(_canonical_params(url))}".encode())
+    h.update(body or b"")
+    return h.hexdigest()[:20]
+
+
+class FixtureStore:
+    """
+    fixtures/upstream/<host>/<key>.json 형태로 응답을 저장/조회한다.
+    정확히 일치하는 녹화가 없으면 같은 (메서드, 호스트, 경로)의 녹화로 대체한다.
+    녹화는 처음 조회되는 호스트의 디렉토리만 읽는다 (gemini/ 등 다른 호스트 녹화는 읽지 않음).
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._exact: Dict[str, dict] = {}
+        self._by_route: Dict[Tuple[str, str, str], List[dict]] = {}
+        self._loaded: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _load(self, host: str):
+        with self._lock:
+            if host in self._loaded:
+                return
+            for path in sorted((self.root / host).glob("*.json")):
+                try:
+                    self._index(json.loads(path.read_text(encoding="utf-8")))
+                except Exception as e:
+                    logger.warning("녹화 파일 로드 실패 %s: %s", path, e)
+            self._loaded.add(host)
+
+    def _index(self, entry: dict):
+        req = entry["request"]
+        self._exact[entry["key"]] = entry
+        self._by_route.setdefault((req["method"], req["host"], req["path"]), []).append(entry)
+
+    def lookup(self, request: httpx.Request, body: bytes) -> Optional[dict]:
+        self._load(request.url.host)
+        key = request_key(request.method, request.url, body)
+        if key in self._exact:
+            return self._exact[key]
+        candidates = self._by_route.get((request.method, request.url.host, request.url.path))
+        if not candidates:
+            return None
+        # 결정적으로 하나를 고른다 (같은 요청 → 같은 녹화)
+        return candidates[int(key, 16) % len(candidates)]
+
+    def save(self, request: httpx.Request, body: bytes, response: httpx.Response,
+             content: bytes, elapsed_ms: float) -> Path:
+        key = request_key(request.method, request.url, body)
+        entry = {
+            "key": key,
+            "recorded_at": time.time(),
+            "request": {
+                "method": request.method,
+                "host": request.url.host,
+                "path": request.url.path,
+                "params": _canonical_params(request.url),
+                "body_b64": base64.b64encode(body).decode() if body else "",
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": [
+                    (k, v) for k, v in response.headers.items()
+                    if k.lower() not in SECRET_HEADERS and k.lower() not in BODY_HEADERS
+                ],
+                "body_b64": base64.b64encode(content).decode(),
+                "elapsed_ms": round(elapsed_ms, 2),
+            },
+        }
+        path = self.root / request.url.host / f"{key}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(entry, ensure_ascii=False, indent=1), encoding="utf-8")
+        with self._lock:
+            if request.url.host in self._loaded:
+                self._index(entry)
+        return path
+
+
+def _build_response(entry: dict, request: httpx.Request) -> httpx.Response:
+    resp = entry["response"]
+    return httpx.Response(
+        resp["status"],
+        headers=resp["headers"],
+        content=base64.b64decode(resp["body_b64"]),
+        request=request,
+    )
+
+
+def _decoded_response(response: httpx.Response, content: bytes, request: httpx.Request) -> httpx.Response:
+    """디코딩된 본문으로 다시 감싼 응답 (content-encoding 이 남으면 httpx 가 한 번 더 풀려고 한다)"""
+    headers = [(k, v) for k, v in response.headers.items() if k.lower() not in BODY_HEADERS]
+    return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+
+def _injected_error(kind: str, request: httpx.Request) -> httpx.Response:
+    if kind == "timeout":
+        raise httpx.ReadTimeout("주입된 타임아웃 (replay)", request=request)
+    return httpx.Response(int(kind), content=b"injected error", request=request)
+
+
+# ────────────────────────────────────────────────────────────────
+# 트랜스포트
+# ────────────────────────────────────────────────────────────────
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """실제 업스트림을 호출하면서 응답을 녹화 파일로 남긴다."""
+
+    def __init__(self, store: FixtureStore, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.store = store
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        t0 = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        content = await response.aread()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.store.save(request, body, response, content, elapsed_ms)
+        return _decoded_response(response, content, request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class RecordingSyncTransport(httpx.BaseTransport):
+    def __init__(self, store: FixtureStore, inner: Optional[httpx.BaseTransport] = None):
+        self.store = store
+        self.inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        t0 = time.perf_counter()
+        response = self.inner.handle_request(request)
+        content = response.read()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.store.save(request, body, response, content, elapsed_ms)
+        return _decoded_response(response, content, request)
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """녹화된 응답을 지연/오류 분포를 적용해 돌려준다 (네트워크 사용 안 함)."""
+
+    def __init__(self, store: FixtureStore, profile: ReplayProfile):
+        self.store = store
+        self.profile = profile
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        entry = self.store.lookup(request, body)
+        recorded = entry["response"].get("elapsed_ms") if entry else None
+        delay = self.profile.sample_latency(recorded)
+        if delay:
+            await asyncio.sleep(delay)
+        error = self.profile.sample_error()
+        if error:
+            return _injected_error(error, request)
+        if entry is None:
+            raise httpx.ConnectError(f"재생할 녹화 없음: {request.method} {request.url.host}{request.url.path}",
+                                     request=request)
+        return _build_response(entry, request)
+
+
+class ReplaySyncTransport(httpx.BaseTransport):
+    def __init__(self, store: FixtureStore, profile: ReplayProfile):
+        self.store = store
+        self.profile = profile
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        entry = self.store.lookup(request, body)
+        recorded = entry["response"].get("elapsed_ms") if entry else None
+        delay = self.profile.sample_latency(recorded)
+        if delay:
+            time.sleep(delay)
+        error = self.profile.sample_error()
+        if error:
+            return _injected_error(error, request)
+        if entry is None:
+            raise httpx.ConnectError(f"재생할 녹화 없음: {request.method} {request.url.host}{request.url.path}",
+                                     request=request)
+        return _build_response(entry, request)
+
+
+# ────────────────────────────────────────────────────────────────
+# 클라이언트 팩토리
+# ────────────────────────────────────────────────────────────────
+_store: Optional[FixtureStore] = None
+_profile: Optional[ReplayProfile] = None
+
+
+def get_store() -> FixtureStore:
+    global _store
+    if _store is None or _store.root != fixture_dir():
+        _store = FixtureStore(fixture_dir())
+    return _store
+
+
+def get_profile() -> ReplayProfile:
+    global _profile
+    if _profile is None:
+        _profile = ReplayProfile.from_env()
+    return _profile
+
+
+def reset():
+    """환경 변수 변경 후 저장소/프로필을 다시 읽도록 초기화"""
+    global _store, _profile
+    _store, _profile = None, None
+
+
+def async_client(**kwargs) -> httpx.AsyncClient:
+    """UPSTREAM_MODE 에 맞는 트랜스포트를 끼운 AsyncClient"""
+    mode = upstream_mode()
+    if mode == "record":
+        kwargs["transport"] = RecordingTransport(get_store())
+    elif mode == "replay":
+        kwargs["transport"] = ReplayTransport(get_store(), get_profile())
+    return httpx.AsyncClient(**kwargs)
+
+
+def sync_client(**kwargs) -> httpx.Client:
+    mode = upstream_mode()
+    if mode == "record":
+        kwargs["transport"] = RecordingSyncTransport(get_store())
+    elif mode == "replay":
+        kwargs["transport"] = ReplaySyncTransport(get_store(), get_profile())
+    return httpx.Client(**kwargs)
+
+
+# ────────────────────────────────────────────────────────────────
+# Gemini (SDK 호출이라 HTTP 트랜스포트 대신 텍스트 단위로 녹화)
+# ────────────────────────────────────────────────────────────────
+GEMINI_HOST = "gemini"
+
+
+def _gemini_path(key: str) -> Path:
+    return get_store().root / GEMINI_HOST / f"{key}.json"
+
+
+def _gemini_key(prompt: str) -> str:
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:20]
+
+
+def record_gemini(prompt: str, text: str, elapsed_ms: float):
+    path = _gemini_path(_gemini_key(prompt))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "key": _gemini_key(prompt),
+        "recorded_at": time.time(),
+        "prompt": prompt,
+        "text": text,
+        "elapsed_ms": round(elapsed_ms, 2),
+    }, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+async def replay_gemini(prompt: str) -> str:
+    """
+    같은 프롬프트의 녹화 → 없으면 아무 녹화(결정적 선택) → 없으면 빈 문자열
+    """
+    key = _gemini_key(prompt)
+    path = _gemini_path(key)
+    if not path.exists():
+        recorded = sorted(path.parent.glob("*.json")) if path.parent.exists() else []
+        path = recorded[int(key, 16) % len(recorded)] if recorded else None
+
+    entry = json.loads(path.read_text(encoding="utf-8")) if path else {"text": "", "elapsed_ms": 0}
+    profile = get_profile()
+    delay = profile.sample_latency(entry.get("elapsed_ms"))
+    if delay:
+        await asyncio.sleep(delay)
+    error = profile.sample_error()
+    if error:
+        raise RuntimeError(f"주입된 Gemini 오류 ({error})")
+    return entry["text"]
@@ -0,0 +1,277 @@
+"""
+일자 × 자치구 × 시간대 집계 큐브
+
+analysis.analyze_dispatch_times 는 호출마다 사용량 표를 지역으로 거르고 평균/최소/최대와
+시간대별 groupby 를 다시 계산했다 (compare_with_public_transit 도 이를 다시 호출).
+여기서는 적재 시점에 한 번만 집계해 두고 조회는 배열 슬라이스 + 축 합산으로 끝낸다.
+
+    count  [D, Z, H]       행 수
+    sum    [D, Z, H, M]    측정값 합
+    sumsq  [D, Z, H, M]    측정값 제곱합 (분산 계산용)
+    min    [D, Z, H, M]
+    max    [D, Z, H, M]
+
+    D: 적재된 날짜, Z: 서울 25개 자치구, H: 24시간, M: MEASURES
+
+- 새 날짜는 해당 날짜 면(slab)만 계산해 끼워 넣는다 (기존 날짜 재계산 없음)
+- npz 파일로 원자적으로 저장하고, 다른 워커는 파일 수정 시각이 바뀌면 다시 읽는다
+- 저장하는 적재(읽기 → 면 추가 → 저장)는 옆 .lock 파일의 flock 안에서 한다
+  (동시에 적재하는 워커가 서로의 날짜를 덮어쓰지 않도록)
+
+환경 변수
+---------
+USAGE_CUBE_PATH  큐브 파일 경로 (기본: serving/app/cube/usage_cube.npz)
+"""
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .locations import DISTRICT_NAMES, LocationTable, resolve
+from .utils import model_dir
+
+logger = logging.getLogger(__name__)
+
+HOURS = 24
+MEASURES: Tuple[str, ...] = ("평균대기시간", "접수건", "탑승건")
+HOUR_COLUMN = "시간대"
+
+
+def default_cube_path() -> Path:
+    return Path(os.getenv("USAGE_CUBE_PATH", str(model_dir().parent / "cube" / "usage_cube.npz")))
+
+
+def _hours(series: pd.Series) -> np.ndarray:
+    """시간대 열("7", "07", "7시", "07~08" …) → 0~23 정수, 해석 불가면 -1"""
+    if pd.api.types.is_numeric_dtype(series):
+        hours = pd.to_numeric(series, errors="coerce")
+    else:
+        hours = pd.to_numeric(series.astype(str).str.extract(r"(\d+)")[0], errors="coerce")
+    hours = hours.where((hours >= 0) & (hours < HOURS))
+    return hours.fillna(-1).astype(int).to_numpy()
+
+
+class UsageCube:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_cube_path())
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._reset()
+
+    def _reset(self):
+        z, m = len(DISTRICT_NAMES), len(MEASURES)
+        self.dates: List[str] = []
+        self.count = np.zeros((0, z, HOURS), dtype=np.int32)
+        self.sum = np.zeros((0, z, HOURS, m))
+        self.sumsq = np.zeros((0, z, HOURS, m))
+        self.min = np.zeros((0, z, HOURS, m))
+        self.max = np.zeros((0, z, HOURS, m))
+
+    # ------------------------------------------
+    # 적재
+    # ------------------------------------------
+    @staticmethod
+    def slab(table: LocationTable) -> Dict[str, np.ndarray]:
+        """표 하나(하루치) → [Z, H(, M)] 집계 면"""
+        df = table.df
+        z, m = len(DISTRICT_NAMES), len(MEASURES)
+        codes = df[LocationTable.DISTRICT_COLUMN].cat.codes.to_numpy()
+        hours = _hours(df[HOUR_COLUMN])
+        keep = (codes >= 0) & (hours >= 0)
+        flat = (codes[keep] * HOURS + hours[keep]).astype(np.intp)
+        values = (
+            df.loc[keep, list(MEASURES)].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(float)
+        )
+
+        cells = z * HOURS
+        count = np.bincount(flat, minlength=cells)
+        total = np.stack([np.bincount(flat, weights=values[:, j], minlength=cells) for j in range(m)], axis=1)
+        sumsq = np.stack([np.bincount(flat, weights=values[:, j] ** 2, minlength=cells) for j in range(m)], axis=1)
+        mn = np.full((cells, m), np.inf)
+        mx = np.full((cells, m), -np.inf)
+        np.minimum.at(mn, flat, values)
+        np.maximum.at(mx, flat, values)
+        return {
+            "count": count.reshape(z, HOURS).astype(np.int32),
+            "sum": total.reshape(z, HOURS, m),
+            "sumsq": sumsq.reshape(z, HOURS, m),
+            "min": mn.reshape(z, HOURS, m),
+            "max": mx.reshape(z, HOURS, m),
+        }
+
+    def ingest(self, date: str, table: LocationTable, save: bool = True):
+        """date 면을 추가(또는 교체)한다. 배열은 새로 만들어 바꿔 끼우므로 읽는 쪽은 잠금이 필요 없다."""
+        piece = self.slab(table)
+        with self._file_lock() if save else nullcontext():
+            self._ingest_slab(date, piece, save)
+        logger.info("집계 큐브 적재 date=%s (rows=%d)", date, int(piece["count"].sum()))
+
+    def _ingest_slab(self, date: str, piece: Dict[str, np.ndarray], save: bool):
+        # 잠금 안에서 다른 워커가 저장한 최신 파일을 읽은 뒤 그 위에 더한다
+        self.refresh()
+        with self._lock:
+            arrays = {name: getattr(self, name) for name in piece}
+            if date in self.dates:
+                i = self.dates.index(date)
+                for name, arr in arrays.items():
+                    arr = arr.copy()
+                    arr[i] = piece[name]
+                    arrays[name] = arr
+                dates = list(self.dates)
+            else:
+                i = int(np.searchsorted(np.array(self.dates, dtype=str), date)) if self.dates else 0
+                for name, arr in arrays.items():
+                    arrays[name] = np.insert(arr, i, piece[name], axis=0)
+                dates = self.dates[:i] + [date] + self.dates[i:]
+            for name, arr in arrays.items():
+                setattr(self, name, arr)
+            self.dates = dates
+            if save:
+                self._save_locked()
+
+    def __contains__(self, date: str) -> bool:
+        self.refresh()
+        return date in self.dates
+
+    # ------------------------------------------
+    # 저장 / 로드
+    # ------------------------------------------
+    @contextmanager
+    def _file_lock(self):
+        """워커 간 적재 직렬화 (transit_service 행렬 갱신과 같은 옆 .lock 파일 flock)"""
+        lock_path = self.path.with_suffix(".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save_locked(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f, dates=np.array(self.dates, dtype=str), count=self.count,
+                sum=self.sum, sumsq=self.sumsq, min=self.min, max=self.max,
+                districts=np.array(DISTRICT_NAMES, dtype=str), measures=np.array(MEASURES, dtype=str),
+            )
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime
+
+    def refresh(self):
+        """다른 워커가 저장한 파일이 더 새로우면 다시 읽는다"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            try:
+                with np.load(self.path, allow_pickle=False) as data:
+                    if list(data["districts"]) != DISTRICT_NAMES or tuple(data["measures"]) != MEASURES:
+                        logger.warning("집계 큐브 형식이 달라 무시: %s", self.path)
+                        return
+                    self.dates = [str(d) for d in data["dates"]]
+                    self.count, self.sum, self.sumsq = data["count"], data["sum"], data["sumsq"]
+                    self.min, self.max = data["min"], data["max"]
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning("집계 큐브 로드 실패: %s", e)
+                return
+            self._mtime = mtime
+
+    # ------------------------------------------
+    # 조회 (슬라이스 + 축 합산)
+    # ------------------------------------------
+    def _index(self, dates: Optional[Iterable[str]], locations: Optional[Iterable[str]]):
+        if dates is None:
+            di = np.arange(len(self.dates))
+        else:
+            di = np.array([self.dates.index(d) for d in dates if d in self.dates], dtype=np.intp)
+        if locations is None:
+            zi = np.arange(len(DISTRICT_NAMES))
+        else:
+            districts = {resolve(loc) for loc in locations} - {None}
+            zi = np.array([DISTRICT_NAMES.index(d) for d in sorted(districts)], dtype=np.intp)
+        return di, zi
+
+    def reduce(self, dates: Optional[Sequence[str]] = None, locations: Optional[Sequence[str]] = None,
+               by_hour: bool = False) -> Dict[str, np.ndarray]:
+        """
+        선택한 날짜·자치구를 합친 count/sum/sumsq/min/max
+        by_hour=True 면 시간대 축 [H(, M)] 을 남긴다
+        """
+        self.refresh()
+        di, zi = self._index(dates, locations)
+        sel = np.ix_(di, zi)
+        axes = (0, 1) if by_hour else (0, 1, 2)
+        empty = di.size == 0 or zi.size == 0
+        m = len(MEASURES)
+        shape = (HOURS, m) if by_hour else (m,)
+        if empty:
+            return {
+                "count": np.zeros(shape[:-1] or (), dtype=np.int64),
+                "sum": np.zeros(shape), "sumsq": np.zeros(shape),
+                "min": np.full(shape, np.inf), "max": np.full(shape, -np.inf),
+            }
+        return {
+            "count": self.count[sel].sum(axis=axes),
+            "sum": self.sum[sel].sum(axis=axes),
+            "sumsq": self.sumsq[sel].sum(axis=axes),
+            "min": self.min[sel].min(axis=axes),
+            "max": self.max[sel].max(axis=axes),
+        }
+
+    def location_summary(self, location, dates: Sequence[str]) -> Tuple[Dict, Dict]:
+        """
+        analyze_dispatch_times 응답 형식의 (기본통계, 시간대별통계)
+        location 은 지역명 하나 또는 목록
+        """
+        locations = [location] if isinstance(location, str) else list(location)
+        wait, calls, rides = range(len(MEASURES))
+
+        total = self.reduce(dates, locations)
+        n = int(total["count"])
+        stats = {
+            "평균_대기시간": float(total["sum"][wait] / n) if n else None,
+            "최소_대기시간": float(total["min"][wait]) if n else None,
+            "최대_대기시간": float(total["max"][wait]) if n else None,
+            "대기시간_표준편차": (
+                float(np.sqrt(max(total["sumsq"][wait] / n - (total["sum"][wait] / n) ** 2, 0.0))) if n else None
+            ),
+            "총_호출건수": int(total["sum"][calls]),
+            "성공_배차건수": int(total["sum"][rides]),
+        }
+
+        hourly = self.reduce(dates, locations, by_hour=True)
+        present = np.flatnonzero(hourly["count"])
+        counts = hourly["count"][present]
+        hourly_stats = {
+            "평균대기시간": {int(h): float(v) for h, v in zip(present, hourly["sum"][present, wait] / counts)},
+            "접수건": {int(h): int(v) for h, v in zip(present, hourly["sum"][present, calls])},
+            "탑승건": {int(h): int(v) for h, v in zip(present, hourly["sum"][present, rides])},
+        }
+        return stats, hourly_stats
+
+    def stats(self) -> Dict:
+        self.refresh()
+        return {
+            "path": str(self.path),
+            "dates": len(self.dates),
+            "first": self.dates[0] if self.dates else None,
+            "last": self.dates[-1] if self.dates else None,
+            "bytes": int(sum(a.nbytes for a in (self.count, self.sum, self.sumsq, self.min, self.max))),
+        }
+
+
+usage_cube = UsageCube()
@@ -1,20 +1,37 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
-from typing import Optional, List, Dict
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional, List, Dict, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timezone
 import math
 import asyncio
+import heapq
+import os
+import time
 
-from .schemas import DispatchRequest, CallRequest, DriverInfo
-from .utils import (
-    load_model_assets,
-    predict_waiting_time_from_request,
-    estimate_usage_stats,
-)
-from .api import fetch_daily_usage_data  # 오픈 API 함수 임포트
+import numpy as np
+
+from .schemas import DispatchRequest, CallRequest, DriverInfo, DriverPosition, DispatchOutcome
+from .core.ml_model import get_model_assets, predict_waiting_time_from_request, predict_waiting_times
+from .core.public_api import estimate_usage_stats
+from .core.seoul_api import fetch_usage_location_table  # 오픈 API 함수 임포트
 from .routers.mock import realtime_mock  # priority_score 연동 추가
+from .core import execution
+from .core.execution import ExecutorOverloaded
+from .core.aging_queue import AGING_TAU_MINUTES, BASE_WEIGHT
+from .core.spatial import DriverSpatialIndex, haversine_km
+from .core.priority_index import live_calls
+from .core.traffic import traffic_factors, free_flow_minutes
+from .core.demand_forecast import demand_forecaster
+from .core.calibration import wait_calibrator
+from .core.event_log import CANDIDATES as LOGGED_CANDIDATES, dispatch_event_log
+from .core.pooling import Pool, plan_pools
+from .core.shadow import LIVE_POLICY, evaluator_from_env
+from .core.bulk_codec import decode_body, nearest_candidates, parse_bulk_payload
+from .core.responses import FORMAT_QUERY, ResponseFormat, fast_response
+from .dispatch_engine import assign_requests, batcher_from_env
+from .rebalancing import RebalancingPlanner
 
 
 # ---------------------------------------------------------------------------
@@ -34,6 +51,58 @@ LOCATION_DATA = {
     "중구": {"code": 9, "lat": 37.5641, "lon": 126.9979, "density": "high"},
 }
 
+# 지역 간 거리 행렬 (km) — 모듈 로드 시 한 번 계산해 두고 조회만 한다
+LOCATION_NAMES: List[str] = list(LOCATION_DATA)
+LOCATION_INDEX: Dict[str, int] = {name: i for i, name in enumerate(LOCATION_NAMES)}
+
+
+def _haversine_matrix(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    R = 6371
+    lat, lon = np.radians(lats), np.radians(lons)
+    dlat = lat[None, :] - lat[:, None]
+    dlon = lon[None, :] - lon[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+DISTANCE_KM: np.ndarray = _haversine_matrix(
+    np.array([LOCATION_DATA[n]["lat"] for n in LOCATION_NAMES]),
+    np.array([LOCATION_DATA[n]["lon"] for n in LOCATION_NAMES]),
+)
+DISTANCE_KM.setflags(write=False)
+
+_LOCATION_LATS = np.array([LOCATION_DATA[n]["lat"] for n in LOCATION_NAMES])
+_LOCATION_LONS = np.array([LOCATION_DATA[n]["lon"] for n in LOCATION_NAMES])
+
+# 배차 시 점수를 계산할 후보 차량 수 (가까운 순 top-k)
+CANDIDATES_K = int(os.getenv("DISPATCH_CANDIDATES_K", "20"))
+
+# 도착 후 30분 안에 도착지에서 이만큼 호출이 예상되면 다음 호출 가산점 전액 (core/demand_forecast.py)
+DEMAND_BONUS_CALLS = float(os.getenv("DISPATCH_DEMAND_BONUS_CALLS", "3"))
+
+
+def nearest_district(lat: float, lon: float) -> str:
+    """좌표에서 가장 가까운 LOCATION_DATA 지역"""
+    d2 = (_LOCATION_LATS - lat) ** 2 + ((_LOCATION_LONS - lon) * math.cos(math.radians(lat))) ** 2
+    return LOCATION_NAMES[int(np.argmin(d2))]
+
+
+def location_coords(name: str) -> Tuple[float, float]:
+    data = LOCATION_DATA[name]
+    return data["lat"], data["lon"]
+
+
+def pickup_coords(request: Dict) -> Tuple[float, float]:
+    if request.get("pickup_lat") is not None and request.get("pickup_lon") is not None:
+        return request["pickup_lat"], request["pickup_lon"]
+    return location_coords(request["pickup_location"])
+
+
+def driver_coords(driver: Dict) -> Tuple[float, float]:
+    if driver.get("lat") is not None and driver.get("lon") is not None:
+        return driver["lat"], driver["lon"]
+    return location_coords(driver["current_location"])
+
 WEATHER_IMPACT = {
     "맑음": {"difficulty": 1.0, "demand_multiplier": 1.0},
     "흐림": {"difficulty": 1.1, "demand_multiplier": 1.1},
@@ -76,50 +145,224 @@ class SmartDispatchAlgorithm:
         self.active_requests: Dict[str, Dict] = {}
         self.driver_pool: Dict[str, Dict] = {}
         self.historical_patterns: Dict = {}
-        self.real_time_traffic: Dict = {}
-
-        self.wait_model, self.le_loc, self.le_weather = load_model_assets()
+        # 자치구 쌍 × 시간대 혼잡 계수 (core/traffic.py 가 Tmap 표본으로 갱신·발행)
+        self.real_time_traffic = traffic_factors
+        # 위치 스트림으로 갱신되는 전체 차량 공간 인덱스
+        self.driver_index = DriverSpatialIndex()
+        # 점수 가중치·긴급 기준 (섀도 정책과 비교되는 현재 정책, core/shadow.py)
+        self.policy = LIVE_POLICY
+
+    # 모델은 import 시점이 아니라 첫 예측(또는 startup 백그라운드 적재) 때 로드된다
+    @property
+    def wait_model(self):
+        return get_model_assets()[0]
+
+    @property
+    def le_loc(self):
+        return get_model_assets()[1]
+
+    @property
+    def le_weather(self):
+        return get_model_assets()[2]
 
     async def dynamic_dispatch(self, request: Dict, available_drivers: List[Dict]) -> Dict:
         """
         요청 정보를 기반으로 우선순위 점수(priority_score)를 포함한 스마트 배차 수행
         """
-        # ① mock 데이터를 통해 calls_detail 가져오기 (priority_score 사용)
-        priority_boost = 0.0
+        request.setdefault('received_at', time.perf_counter())
+        urgency = await self.prepare_request(request)
+
+        # 가까운 top-k 후보만 점수 계산 (목록이 비어 있으면 공간 인덱스의 전체 차량에서)
+        candidates = self.candidate_drivers(request, available_drivers)
+
+        # ⑤ 긴급 배차 기준 확인
+        request['system_load'] = self.system_load(available_drivers)
+        if urgency > self.policy.threshold(request['system_load']):
+            match = self.emergency_dispatch(request, candidates)
+            self.learn_from_dispatch(request, match, candidates=candidates)
+            return match
+
+        # ⑥ 스코어 기반 일반 배차 (운전자 수에 따라 inline / 스레드 / 프로세스)
+        dispatch_scores = await execution.run(
+            "dispatch.score", _score_drivers, request, urgency, candidates,
+            size=len(candidates),
+        )
+
+        if not dispatch_scores:
+            raise HTTPException(status_code=404, detail="배차 가능한 차량이 없습니다")
+
+        # 이벤트 로그에 남길 차순위 후보 포함 (core/event_log.py),
+        # 섀도 정책은 상위 몇 대가 아니라 점수 계산한 후보 전체에서 고른다 (scored, core/shadow.py)
+        ranked = heapq.nlargest(LOGGED_CANDIDATES, dispatch_scores, key=lambda x: x['score'])
+        best_match = {**ranked[0], 'alternatives': ranked, 'scored': dispatch_scores, 'assignment': 'argmax'}
+        self.learn_from_dispatch(request, best_match)
+        return self.create_dispatch_result(request, best_match)
+
+    async def prepare_request(self, request: Dict) -> float:
+        """
+        ①~④ priority_score 조회, 수요/공급 보정, 대기시간 예측, 긴급도 계산
+        """
+        demand_forecaster.observe(request.get('pickup_location'))
+        priority_boost = await self.load_request_context(request)
+
+        # ③ 긴급도 평가 (XGBoost 예측 포함, 예측값은 request 에 저장해 운전자별 점수에서 재사용)
+        def _urgency() -> float:
+            request["predicted_wait"] = self.predict_waiting_time(request)
+            return self.calculate_urgency_score(request)
+
+        urgency = await execution.run("dispatch.urgency", _urgency)
+
+        # ④ priority_score 가중치 반영 (2배 효과, 섀도 정책 비교용으로 반영 전 값도 남긴다)
+        request['urgency_base'], request['priority_boost'] = urgency, priority_boost
+        return self.policy.urgency(urgency, priority_boost)
+
+    async def prepare_batch(self, requests: List[Dict]) -> List[float]:
+        """
+        prepare_request 의 묶음 버전: mock 우선순위는 한 번, 지역 통계는 지역별 한 번,
+        대기시간 예측은 모델 1회 호출로
+        """
+        mock_scores = None
+        boosts = []
+        await live_calls.refresh()
+        for r in requests:
+            demand_forecaster.observe(r.get('pickup_location'))
+            boost = self.live_priority_score(r)
+            if boost is None:
+                if mock_scores is None:
+                    mock_scores = await self._mock_priority_scores()
+                boost = self._match_priority(mock_scores, r)
+            boosts.append(boost)
+
+        locations = list({r.get("pickup_location") for r in requests})
+        stats = dict(zip(locations, await asyncio.gather(*(self._usage_stats(loc) for loc in locations))))
+        for r in requests:
+            r["num_vehicles"], r["num_users"] = stats[r.get("pickup_location")]
+
+        def _urgencies() -> List[float]:
+            inputs = [self._prediction_input(r) for r in requests]
+            predicted = predict_waiting_times(
+                self.wait_model, self.le_loc, self.le_weather,
+                inputs, default_hour=datetime.now().hour,
+            )
+            urgencies = []
+            for r, inp, wait in zip(requests, inputs, predicted):
+                r["predicted_wait"] = wait
+                # 보정 전 예측 (결과 학습용, core/calibration.py)
+                r["raw_wait"] = inp.get("raw_wait", wait)
+                urgencies.append(self.calculate_urgency_score(r))
+            return urgencies
+
+        urgencies = await execution.run("dispatch.urgency", _urgencies, size=len(requests))
+        for r, u, b in zip(requests, urgencies, boosts):
+            r['urgency_base'], r['priority_boost'] = u, b
+        return [self.policy.urgency(u, b) for u, b in zip(urgencies, boosts)]
+
+    async def load_request_context(self, request: Dict) -> float:
+        """①② priority_boost 를 반환하고 request 에 지역 운행/이용 수를 채운다"""
+        # ① 실시간 호출 인덱스에 있으면 O(log n) 조회, 없으면 mock calls_detail 에서 priority_score 사용
+        #    (다른 워커가 받은 호출도 보이도록 공용 목록 동기화 먼저)
+        await live_calls.refresh()
+        priority_boost = self.live_priority_score(request)
+        if priority_boost is None:
+            priority_boost = self._match_priority(await self._mock_priority_scores(), request)
+
+        # ② 실시간 수요/공급 데이터 보정 (동기 다운로드 → 스레드 풀)
+        request["num_vehicles"], request["num_users"] = await self._usage_stats(request.get("pickup_location"))
+        return priority_boost
+
+    @staticmethod
+    async def _mock_priority_scores() -> Dict[str, float]:
         try:
             mock_data = await realtime_mock()
-            calls_detail = mock_data.get("calls_detail", [])
-            for call in calls_detail:
-                # ID 또는 user_id를 기준으로 매칭
-                if str(call.get("id")) == str(request.get("request_id")) or \
-                   str(call.get("id")) == str(request.get("user_id")):
-                    priority_boost = call.get("priority_score", 0.0)
-                    break
+            scores: Dict[str, float] = {}
+            for call in mock_data.get("calls_detail", []):
+                scores.setdefault(str(call.get("id")), call.get("priority_score", 0.0))
+            return scores
         except Exception as e:
             print(f"priority_score 불러오기 실패: {e}")
-
-        # ② 실시간 수요/공급 데이터 보정
+            return {}
+
+    @staticmethod
+    def _match_priority(scores: Dict[str, float], request: Dict) -> float:
+        # ID 또는 user_id를 기준으로 매칭
+        for key in (request.get("request_id"), request.get("user_id")):
+            if str(key) in scores:
+                return scores[str(key)]
+        return 0.0
+
+    @staticmethod
+    async def _usage_stats(location: Optional[str]) -> Tuple[int, int]:
         try:
-            vehicles, users = estimate_usage_stats(request.get("pickup_location"))
-            request["num_vehicles"] = vehicles
-            request["num_users"] = users
+            return await execution.run("usage.estimate_stats", estimate_usage_stats, location)
+        except ExecutorOverloaded:
+            raise
         except:
-            request["num_vehicles"] = 10
-            request["num_users"] = 20
+            return 10, 20
 
-        # ③ 긴급도 평가
-        urgency = self.calculate_urgency_score(request)
+    @staticmethod
+    def live_priority_score(request: Dict) -> Optional[float]:
+        for key in (request.get("request_id"), request.get("user_id")):
+            if key is not None and key in live_calls:
+                return live_calls.score(key)
+        return None
 
-        # ④ priority_score 가중치 반영 (2배 효과)
-        urgency *= (1 + 2 * priority_boost)
+    def system_load(self, available_drivers: List[Dict]) -> float:
+        fleet_size = len(available_drivers) or len(self.driver_index)
+        return len(self.active_requests) / max(fleet_size, 1)
 
-        # ⑤ 긴급 배차 기준 확인
-        system_load = len(self.active_requests) / max(len(available_drivers), 1)
-        urgency_threshold = 50 if system_load > 3 else 30
-        if urgency > urgency_threshold:
-            return self.emergency_dispatch(request, available_drivers)
+    def urgency_threshold(self, available_drivers: List[Dict]) -> float:
+        return self.policy.threshold(self.system_load(available_drivers))
 
-        # ⑥ 스코어 기반 일반 배차
+    def candidate_drivers(self, request: Dict, drivers: List[Dict], k: int = None,
+                          exclude: Optional[set] = None) -> List[Dict]:
+        """
+        휠체어 조건을 만족하는 차량 중 픽업 지점에서 가까운 k 대
+        - drivers 가 주어지면 그 목록에서 (O(n log k) 좌표 거리 계산만)
+        - 비어 있으면 공간 인덱스에서 k-최근접 질의 (O(k log n))
+        """
+        k = k or CANDIDATES_K
+        exclude = exclude or set()
+        wheelchair = bool(request.get('wheelchair'))
+        lat, lon = pickup_coords(request)
+
+        if not drivers:
+            found = self.driver_index.nearest(
+                lat, lon, k, wheelchair_only=wheelchair,
+                predicate=(lambda d: d.driver_id not in exclude) if exclude else None,
+            )
+            return [dict(entry.data["driver"]) for entry, _ in found]
+
+        suitable = [
+            d for d in drivers
+            if (not wheelchair or d.get('wheelchair_capable')) and d['driver_id'] not in exclude
+        ]
+        if len(suitable) <= k:
+            return suitable
+        cos_lat = math.cos(math.radians(lat))
+
+        def _approx(d: Dict) -> float:
+            dlat, dlon = driver_coords(d)
+            return (dlat - lat) ** 2 + ((dlon - lon) * cos_lat) ** 2
+
+        return heapq.nsmallest(k, suitable, key=_approx)
+
+    def update_driver_position(self, position: DriverPosition):
+        if position.status != "available":
+            self.driver_index.remove(position.driver_id)
+            return
+        self.driver_index.upsert(
+            position.driver_id, position.lat, position.lon, position.wheelchair_capable,
+            driver={
+                'driver_id': position.driver_id,
+                'current_location': nearest_district(position.lat, position.lon),
+                'wheelchair_capable': position.wheelchair_capable,
+                'specialty_areas': position.specialty_areas,
+                'lat': position.lat,
+                'lon': position.lon,
+            },
+        )
+
+    def score_drivers(self, request: Dict, urgency: float, available_drivers: List[Dict]) -> List[Dict]:
         dispatch_scores = []
         for driver in available_drivers:
             if request.get('wheelchair') and not driver.get('wheelchair_capable'):
@@ -127,7 +370,7 @@ class SmartDispatchAlgorithm:
 
             efficiency = self.calculate_efficiency_score(driver, request)
             fairness = self.calculate_fairness_score(driver, request)
-            total_score = urgency * 0.4 + efficiency * 0.4 + fairness * 0.2
+            total_score = self.policy.score(urgency, efficiency, fairness)
 
             dispatch_scores.append({
                 'driver': driver,
@@ -138,56 +381,63 @@ class SmartDispatchAlgorithm:
                     'fairness': fairness
                 }
             })
-
-        if not dispatch_scores:
-            raise HTTPException(status_code=404, detail="배차 가능한 차량이 없습니다")
-
-        best_match = max(dispatch_scores, key=lambda x: x['score'])
-        self.learn_from_dispatch(request, best_match)
-        return self.create_dispatch_result(request, best_match)
+        return dispatch_scores
 
     def calculate_urgency_score(self, request: Dict) -> float:
-        urgency = 0.0
         now = datetime.now(timezone.utc)
         wait_minutes = (now - request['request_time']).total_seconds() / 60
-        urgency += math.exp(wait_minutes / 15) * 10
+        additive, multiplier = self.urgency_components(request, now)
+        return (math.exp(wait_minutes / AGING_TAU_MINUTES) * BASE_WEIGHT + additive) * multiplier
 
+    def urgency_components(self, request: Dict, now: Optional[datetime] = None,
+                           include_prediction: bool = True) -> Tuple[float, float]:
+        """
+        긴급도 = 배수 · (10 · e^{대기분/15} + 가산점) 의 (가산점, 배수)
+        시간에 따라 변하지 않는 부분이므로 AgingPriorityQueue 의 키로 쓴다.
+        include_prediction=False 이면 모델 예측(×1.1)을 생략한 추정치
+        """
+        now = now or datetime.now(timezone.utc)
+        additive = 0.0
         if request.get('wheelchair'):
-            urgency += 30
+            additive += 30
             if request.get('medical_appointment'):
-                urgency += 50
+                additive += 50
 
-        urgency *= {
+        multiplier = {
             'hospital': 2.0, 'pharmacy': 1.8, 'government': 1.5,
             'education': 1.3, 'general': 1.0
         }.get(request.get('destination_type', 'general'), 1.0)
 
         if request.get('weather') in ['비', '눈'] and request.get('wheelchair'):
-            urgency *= 1.5
+            multiplier *= 1.5
 
         if request.get('destination_type') == 'hospital' and now.hour >= 16:
-            urgency *= 1.5
+            multiplier *= 1.5
 
         user_profile = self.get_user_profile(request.get('user_id'))
         if user_profile and user_profile.reliability_score < 0.8:
-            urgency *= 0.8
+            multiplier *= 0.8
 
-        if self.predict_waiting_time(request) >= 25:
-            urgency *= 1.1
+        if include_prediction and self.predict_waiting_time(request) >= 25:
+            multiplier *= 1.1
 
-        return urgency
+        return additive, multiplier
 
     def calculate_efficiency_score(self, driver: Dict, request: Dict) -> float:
         efficiency = 100.0
-        travel_time = self.estimate_real_travel_time(
-            driver['current_location'],
-            request['pickup_location'],
-            request.get('weather', '맑음')
-        )
+        travel_time = self.driver_travel_time(driver, request)
         efficiency -= travel_time * 2
 
-        if self.find_nearby_future_requests(request['destination'], travel_time + 20):
+        # 도착지 근처 다음 호출: 이미 들어온 요청이 있으면 전액, 없으면 예측 수요 비율만큼
+        # (이벤트 재생(replay_at)은 그때의 대기 요청이 기록에 없으므로 그 시각의 예측 수요만)
+        replay_at = request.get('replay_at')
+        if replay_at is None and self.find_nearby_future_requests(request['destination'], travel_time + 20):
             efficiency += 10
+        else:
+            expected = demand_forecaster.expected(
+                request['destination'], travel_time, travel_time + 30, at=replay_at,
+            )
+            efficiency += 10 * min(1.0, expected / DEMAND_BONUS_CALLS)
 
         match_score = self.calculate_driver_user_match(driver, request)
         efficiency += match_score * 20
@@ -225,39 +475,75 @@ class SmartDispatchAlgorithm:
             raise HTTPException(status_code=404, detail="긴급 배차 가능 차량 없음")
 
         for driver in suitable:
-            driver['eta'] = self.estimate_real_travel_time(
-                driver['current_location'], request['pickup_location'], request.get('weather', '맑음')
-            )
+            driver['eta'] = self.driver_travel_time(driver, request)
 
         fastest_driver = min(suitable, key=lambda x: x['eta'])
         return {
             'driver': fastest_driver,
             'score': 999,
-            'components': {'urgency': 999, 'efficiency': 0, 'fairness': 0}
+            'components': {'urgency': 999, 'efficiency': 0, 'fairness': 0},
+            'assignment': 'emergency',
         }
 
-    def estimate_real_travel_time(self, from_loc: str, to_loc: str, weather: str) -> float:
-        from_data, to_data = LOCATION_DATA[from_loc], LOCATION_DATA[to_loc]
-        R = 6371
-        dlat = math.radians(to_data['lat'] - from_data['lat'])
-        dlon = math.radians(to_data['lon'] - from_data['lon'])
-        a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(from_data['lat'])) * math.cos(math.radians(to_data['lat'])) * math.sin(dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        distance = R * c
+    def estimate_real_travel_time(self, from_loc: str, to_loc: str, weather: str,
+                                  at: Optional[datetime] = None) -> float:
+        distance = float(DISTANCE_KM[LOCATION_INDEX[from_loc], LOCATION_INDEX[to_loc]])
+        return self.travel_time_from_distance(distance, from_loc, to_loc, weather, at)
+
+    def driver_travel_time(self, driver: Dict, request: Dict) -> float:
+        """
+        차량·요청에 실좌표가 있으면 좌표 거리, 없으면 지역 간 거리 행렬 사용
+        (이벤트 재생 요청은 replay_at 시각의 시간대로 계산, core/event_log.py)
+        """
+        weather = request.get('weather', '맑음')
+        at = request.get('replay_at')
+        has_coords = driver.get('lat') is not None or request.get('pickup_lat') is not None
+        if not has_coords:
+            return self.estimate_real_travel_time(driver['current_location'], request['pickup_location'], weather, at)
+        distance = haversine_km(*driver_coords(driver), *pickup_coords(request))
+        return self.travel_time_from_distance(
+            distance, driver['current_location'], request['pickup_location'], weather, at
+        )
+
+    def travel_time_from_distance(self, distance: float, from_loc: str, to_loc: str, weather: str,
+                                  at: Optional[datetime] = None) -> float:
+        """at: 지금 대신 이 시각의 시간대 (재생용, 혼잡 계수 표본 우선순위에 조회를 세지 않음)"""
+        difficulty = WEATHER_IMPACT.get(weather, {}).get('difficulty', 1.0)
+        hour = (at or datetime.now()).hour
+
+        # 관측된 혼잡 계수가 있으면 자유 주행 시간 × 계수
+        congestion = self.real_time_traffic.factor(from_loc, to_loc, hour, count=at is None)
+        if congestion is not None:
+            return free_flow_minutes(distance) * congestion * difficulty
 
+        # 관측 전: 시간대 휴리스틱
+        return (distance / self._base_speed(hour, difficulty)) * 60
+
+    @staticmethod
+    def _base_speed(hour: int, difficulty: float) -> float:
         base_speed = 25
-        hour = datetime.now().hour
         if hour in [8, 9, 18, 19]:
             base_speed *= 0.6
         elif hour in [12, 13]:
             base_speed *= 0.8
         elif hour < 6:
             base_speed *= 1.3
+        return base_speed / difficulty
 
-        base_speed /= WEATHER_IMPACT.get(weather, {}).get('difficulty', 1.0)
-        travel_time = (distance / base_speed) * 60
-        travel_time *= self.real_time_traffic.get((from_loc, to_loc), 1.0)
-        return travel_time
+    def travel_time_matrix(self, names: List[str], weather: str) -> np.ndarray:
+        """지역 쌍 전체의 estimate_real_travel_time (거리 행렬 × 혼잡 계수 브로드캐스트, 대각선 0)"""
+        difficulty = WEATHER_IMPACT.get(weather, {}).get('difficulty', 1.0)
+        hour = datetime.now().hour
+        idx = np.array([LOCATION_INDEX[n] for n in names])
+        distance = DISTANCE_KM[idx[:, None], idx[None, :]]
+        congestion = self.real_time_traffic.factor_matrix(names, hour)
+        travel = np.where(
+            np.isnan(congestion),
+            distance / self._base_speed(hour, difficulty) * 60,
+            free_flow_minutes(distance) * congestion * difficulty,
+        )
+        np.fill_diagonal(travel, 0.0)
+        return travel
 
     def calculate_driver_user_match(self, driver: Dict, request: Dict) -> float:
         score = 0.0
@@ -267,7 +553,7 @@ class SmartDispatchAlgorithm:
             if profile and profile.specialty_areas and 'wheelchair_expert' in profile.specialty_areas:
                 score += 2.0
 
-        if request['pickup_location'] in driver.get('specialty_areas', []):
+        if request['pickup_location'] in (driver.get('specialty_areas') or []):
             score += 1.5
         if profile:
             score += profile.service_score
@@ -281,8 +567,15 @@ class SmartDispatchAlgorithm:
             (datetime.now() - r['request_time']).total_seconds() / 60 < eta + 30
         ]
 
-    def learn_from_dispatch(self, request: Dict, dispatch_result: Dict):
-        print(f"📦 기록: {request['request_id']} → {dispatch_result['driver']['driver_id']}")
+    def learn_from_dispatch(self, request: Dict, dispatch_result: Dict, pool: Optional[Pool] = None,
+                            candidates: Optional[List[Dict]] = None):
+        """candidates: 점수 없이 본 차량 목록 (긴급 배차)"""
+        # 요청·후보·점수·지연을 고정 길이 레코드로 기록 (core/event_log.py, 재생·분석용)
+        dispatch_event_log.append(request, dispatch_result, len(pool.members) if pool else 1, candidates)
+        # 표본 요청은 섀도 정책으로도 평가 (core/shadow.py, 배차 경로 밖)
+        shadow_evaluator.offer(request, dispatch_result, candidates)
+        # 실제 픽업 결과(/dispatch_outcome/)가 오면 예측 잔차 보정에 쓴다 (core/calibration.py)
+        wait_calibrator.remember(request)
 
     def calculate_driver_fatigue(self, driver_id: str) -> float:
         return 0.3  # 예시: 평소보다 덜 피로한 상태
@@ -303,30 +596,61 @@ class SmartDispatchAlgorithm:
         return 12.0
 
     def predict_waiting_time(self, request: Dict) -> float:
-        return predict_waiting_time_from_request(
+        # prepare_request 에서 한 번 예측한 값이 있으면 재사용 (운전자마다 모델 호출 방지)
+        if request.get("predicted_wait") is not None:
+            return request["predicted_wait"]
+        inp = self._prediction_input(request)
+        wait = predict_waiting_time_from_request(
             self.wait_model, self.le_loc, self.le_weather,
-            {
-                "pickup_location": request.get("pickup_location"),
-                "weather": request.get("weather", "맑음"),
-                "wheelchair": request.get("wheelchair", False),
-                "num_vehicles": request.get("num_vehicles", 10),
-                "num_users": request.get("num_users", 20),
-            },
-            default_hour=datetime.now().hour,
+            inp, default_hour=datetime.now().hour,
         )
+        # 보정 전 예측 (결과 학습용, core/calibration.py)
+        request["raw_wait"] = inp.get("raw_wait", wait)
+        return wait
 
-    def create_dispatch_result(self, request: Dict, match: Dict) -> Dict:
-        driver = match['driver']
-        eta = self.estimate_real_travel_time(
-            driver['current_location'], request['pickup_location'], request.get('weather', '맑음')
-        )
+    @staticmethod
+    def _prediction_input(request: Dict) -> Dict:
         return {
+            # 없으면(None) 예측 함수가 현재 시각의 시간대를 쓴다 (이벤트 재생은 기록 시각)
+            "hour": request.get("hour"),
+            "pickup_location": request.get("pickup_location"),
+            "weather": request.get("weather", "맑음"),
+            "wheelchair": request.get("wheelchair", False),
+            "num_vehicles": request.get("num_vehicles", 10),
+            "num_users": request.get("num_users", 20),
+        }
+
+    def plan_pools(self, requests: List[Dict]) -> List[Pool]:
+        """합승 묶음 탐색 (지역 간 거리 행렬 + 배차 ETA 모델)"""
+        def travel(from_loc: str, to_loc: str, weather: str) -> Optional[float]:
+            if from_loc not in LOCATION_INDEX or to_loc not in LOCATION_INDEX:
+                return None
+            return self.estimate_real_travel_time(from_loc, to_loc, weather)
+
+        def distance(a: str, b: str) -> Optional[float]:
+            if a not in LOCATION_INDEX or b not in LOCATION_INDEX:
+                return None
+            return float(DISTANCE_KM[LOCATION_INDEX[a], LOCATION_INDEX[b]])
+
+        return plan_pools(requests, travel, distance)
+
+    def create_dispatch_result(self, request: Dict, match: Dict, pool: Optional[Pool] = None) -> Dict:
+        driver = match['driver']
+        if pool is None:
+            eta = self.driver_travel_time(driver, request)
+        else:
+            # 합승: 차량은 묶음의 첫 픽업 지점부터 정차 순서대로 돈다
+            eta = self.driver_travel_time(driver, pool.lead) + pool.pickup_offset(request['request_id'])
+        result = {
             "driver_id": driver['driver_id'],
             "estimated_pickup_time": round(eta, 1),
             "dispatch_score": round(match['score'], 2),
             "dispatch_reason": self.generate_dispatch_reason(match['components']),
-            "user_message": self.generate_user_message(eta, request)
+            "user_message": self.generate_user_message(eta, request, pool)
         }
+        if pool is not None:
+            result["pool"] = pool.summary(request['request_id'])
+        return result
 
     def generate_dispatch_reason(self, components: Dict) -> str:
         reasons = []
@@ -335,7 +659,9 @@ class SmartDispatchAlgorithm:
         if components['fairness'] > 60: reasons.append("서비스 균형")
         return ", ".join(reasons) if reasons else "종합 최적화"
 
-    def generate_user_message(self, eta: float, request: Dict) -> str:
+    def generate_user_message(self, eta: float, request: Dict, pool: Optional[Pool] = None) -> str:
+        if pool is not None:
+            return f"합승 차량이 약 {int(eta)}분 내 도착 예정입니다. (동승 {len(pool.members) - 1}팀)"
         if request.get('wheelchair'):
             return f"휠체어 전용 차량이 약 {int(eta)}분 내 도착 예정입니다."
         return f"차량이 약 {int(eta)}분 내 도착 예정입니다."
@@ -351,6 +677,26 @@ class SmartDispatchAlgorithm:
 router = APIRouter()
 dispatch_algorithm = SmartDispatchAlgorithm()
 
+# DISPATCH_BATCH_WINDOW > 0 이면 /smart_dispatch/ 를 마이크로 배치 엔진으로 처리
+dispatch_batcher = batcher_from_env(dispatch_algorithm)
+shadow_evaluator = evaluator_from_env(dispatch_algorithm)
+rebalancing_planner = RebalancingPlanner(dispatch_algorithm, LOCATION_DATA)
+
+
+@router.on_event("startup")
+async def start_dispatch_batcher():
+    if dispatch_batcher is not None:
+        dispatch_batcher.start()
+    shadow_evaluator.start()
+
+
+@router.on_event("shutdown")
+async def stop_dispatch_batcher():
+    if dispatch_batcher is not None:
+        await dispatch_batcher.stop()
+    await shadow_evaluator.stop()
+    dispatch_event_log.close()
+
 
 @router.post("/smart_dispatch/")
 async def smart_dispatch(dispatch_request: DispatchRequest):
@@ -363,21 +709,33 @@ async def smart_dispatch(dispatch_request: DispatchRequest):
         'wheelchair': dispatch_request.call_request.wheelchair,
         'destination_type': dispatch_request.call_request.destination_type,
         'medical_appointment': dispatch_request.call_request.medical_appointment,
-        'weather': dispatch_request.weather
+        'special_requirements': dispatch_request.call_request.special_requirements,
+        'pickup_lat': dispatch_request.call_request.pickup_lat,
+        'pickup_lon': dispatch_request.call_request.pickup_lon,
+        'weather': dispatch_request.weather,
+        'received_at': time.perf_counter(),
     }
 
     drivers = [
         {
             'driver_id': d.driver_id,
-            'current_location': d.current_location,
+            'current_location': (
+                nearest_district(d.lat, d.lon)
+                if d.current_location not in LOCATION_DATA and d.lat is not None and d.lon is not None
+                else d.current_location
+            ),
             'wheelchair_capable': d.wheelchair_capable,
-            'specialty_areas': d.specialty_areas
+            'specialty_areas': d.specialty_areas,
+            'lat': d.lat,
+            'lon': d.lon,
         }
         for d in dispatch_request.available_drivers
         if d.status == "available"
     ]
 
     try:
+        if dispatch_batcher is not None:
+            return await dispatch_batcher.submit(request_info, drivers)
         return await dispatch_algorithm.dynamic_dispatch(request_info, drivers)
     except HTTPException:
         raise
@@ -386,6 +744,17 @@ async def smart_dispatch(dispatch_request: DispatchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 실행 정책 계층(core/execution.py)에서 프로세스 풀로 보낼 수 있도록 모듈 최상위 함수로 둔다.
+# 프로세스 풀 작업자는 forkserver 로 만들어져 이 모듈의 dispatch_algorithm 을 새로 가진다
+# (요청 상태는 인자로만 전달된다).
+def _score_drivers(request: Dict, urgency: float, drivers: List[Dict]) -> List[Dict]:
+    return dispatch_algorithm.score_drivers(request, urgency, drivers)
+
+
+def _global_optimization(all_requests: List[Dict], all_drivers: List[str]):
+    return dispatch_algorithm.global_optimization(all_requests, all_drivers)
+
+
 @router.post("/batch_optimize/")
 async def batch_optimize(requests: List[DispatchRequest]):
     all_requests = []
@@ -405,7 +774,145 @@ async def batch_optimize(requests: List[DispatchRequest]):
         for driver in req.available_drivers:
             all_drivers.add(driver.driver_id)
 
-    return {"assignments": dispatch_algorithm.global_optimization(all_requests, list(all_drivers))}
+    assignments = await execution.run(
+        "dispatch.global_optimization", _global_optimization, all_requests, list(all_drivers),
+        size=len(all_requests),
+    )
+    return {"assignments": assignments}
+
+
+def _bulk_coords(names: np.ndarray, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """좌표 열이 비어 있는 행은 지역 대표 좌표로 채운다"""
+    missing = np.isnan(lats) | np.isnan(lons)
+    if missing.any():
+        idx = np.array([LOCATION_INDEX[n] for n in names[missing]], dtype=np.intp)
+        lats, lons = lats.copy(), lons.copy()
+        lats[missing], lons[missing] = _LOCATION_LATS[idx], _LOCATION_LONS[idx]
+    return lats, lons
+
+
+@router.post("/batch_optimize/bulk")
+async def batch_optimize_bulk(request: Request, fmt: ResponseFormat = FORMAT_QUERY, pooling: bool = False):
+    """
+    공유 차량 표 + 요청 표(열 단위 JSON 또는 msgpack)를 받아 한 번에 배정 (core/bulk_codec.py)
+    검증·후보 선정은 열 단위로 하고, 배정은 /smart_dispatch/ 배치 엔진과 같은 로직을 쓴다
+    pooling=true 면 호환되는 요청을 합승 묶음으로 배정 (core/pooling.py)
+    """
+    received_at = time.perf_counter()
+    payload = decode_body(await request.body(), request.headers.get("content-type"))
+    drivers_df, requests_df, weather = parse_bulk_payload(payload, LOCATION_NAMES)
+
+    drivers_df = drivers_df[drivers_df["status"] == "available"].reset_index(drop=True)
+    drv_lat, drv_lon = _bulk_coords(
+        drivers_df["current_location"].to_numpy(object),
+        drivers_df["lat"].to_numpy(float), drivers_df["lon"].to_numpy(float),
+    )
+    req_lat, req_lon = _bulk_coords(
+        requests_df["pickup_location"].to_numpy(object),
+        requests_df["pickup_lat"].to_numpy(float), requests_df["pickup_lon"].to_numpy(float),
+    )
+    has_coords = ~np.isnan(drivers_df["lat"].to_numpy(float))
+    drivers = [
+        {
+            'driver_id': driver_id,
+            'current_location': location if location in LOCATION_INDEX else nearest_district(lat, lon),
+            'wheelchair_capable': bool(wheelchair),
+            'lat': float(lat) if coords else None,
+            'lon': float(lon) if coords else None,
+        }
+        for driver_id, location, wheelchair, lat, lon, coords in zip(
+            drivers_df["driver_id"], drivers_df["current_location"], drivers_df["wheelchair_capable"],
+            drv_lat, drv_lon, has_coords,
+        )
+    ]
+    requests = [
+        {**{k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()},
+         'request_time': row['request_time'].to_pydatetime(), 'weather': weather, 'received_at': received_at}
+        for row in requests_df.to_dict(orient="records")
+    ]
+
+    wheelchair = requests_df["wheelchair"].to_numpy(bool)
+    nearest = await execution.run(
+        "dispatch.candidates", nearest_candidates,
+        req_lat, req_lon, wheelchair,
+        drv_lat, drv_lon, drivers_df["wheelchair_capable"].to_numpy(bool), CANDIDATES_K,
+        size=len(requests) * len(drivers),
+    )
+
+    def _candidates(i: int, taken: set) -> List[Dict]:
+        return [dict(drivers[j]) for j in nearest[i] if drivers[j]['driver_id'] not in taken]
+
+    urgencies = await dispatch_algorithm.prepare_batch(requests)
+    outcomes = await assign_requests(
+        dispatch_algorithm, requests, urgencies, [drivers] * len(requests), _candidates, pooling=pooling,
+    )
+
+    assignments, unassigned = [], []
+    for req, outcome in zip(requests, outcomes):
+        if outcome.error is not None:
+            unassigned.append({"request_id": req['request_id'], "reason": outcome.error.detail})
+            continue
+        dispatch_algorithm.learn_from_dispatch(req, outcome.match, outcome.pool, outcome.candidates)
+        assignments.append({
+            "request_id": req['request_id'],
+            **dispatch_algorithm.create_dispatch_result(req, outcome.match, outcome.pool),
+            "emergency": outcome.emergency,
+        })
+    return fast_response(
+        {"assignments": assignments, "unassigned": unassigned},
+        fmt, columnar_fields=("assignments", "unassigned"),
+    )
+
+
+@router.post("/dispatch_outcome/")
+async def report_dispatch_outcome(outcome: DispatchOutcome):
+    """
+    배차된 요청의 실제 픽업 결과 → 대기시간 예측 잔차 보정 (core/calibration.py)
+    대기 중인 배차는 워커 공용 저장소에서 찾으므로 배차한 워커가 아니어도 반영된다.
+    기간·크기 제한으로 이미 지워졌거나 모르는 요청이면 unmatched 로 응답한다 (재전송해도 결과는 같다).
+    """
+    try:
+        result = await asyncio.to_thread(
+            wait_calibrator.record_outcome,
+            outcome.request_id, outcome.actual_wait_minutes, outcome.picked_up_at,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if result is None:
+        return {"status": "unmatched", "request_id": outcome.request_id}
+    return {"status": "recorded", **result}
+
+
+@router.post("/drivers/positions")
+async def update_driver_positions(positions: List[DriverPosition]):
+    """
+    차량 위치 스트림 수신 → 공간 인덱스 증분 갱신 (available 이 아니면 인덱스에서 제외)
+    """
+    for position in positions:
+        dispatch_algorithm.update_driver_position(position)
+    return {"updated": len(positions), "fleet": dispatch_algorithm.driver_index.stats()}
+
+
+@router.get("/drivers/nearby")
+async def get_nearby_drivers(lat: float, lon: float, k: int = 10, wheelchair: bool = False):
+    found = dispatch_algorithm.driver_index.nearest(lat, lon, k, wheelchair_only=wheelchair)
+    return {
+        "drivers": [
+            {**entry.data["driver"], "distance_km": round(dist, 3)}
+            for entry, dist in found
+        ]
+    }
+
+
+@router.get("/rebalance/plan")
+async def get_rebalance_plan(refresh: bool = False):
+    """
+    유휴 차량 재배치 제안 (rebalancing.py) — 기본은 스케줄러가 마지막으로 만든 계획,
+    refresh=true 면 지금 위치로 다시 계산
+    """
+    if refresh or rebalancing_planner.last_plan is None:
+        return await execution.run("dispatch.rebalance", rebalancing_planner.plan)
+    return rebalancing_planner.last_plan
 
 
 @router.get("/system_status/")
@@ -424,6 +931,7 @@ async def get_system_status():
             for loc in LOCATION_DATA
         },
         "system_load": "high" if active_count > 100 else "normal",
+        "batching": dispatch_batcher.metrics() if dispatch_batcher is not None else None,
         "timestamp": datetime.now()
     }
 
@@ -436,9 +944,8 @@ async def update_user_profile(user_id: str, profile_data: Dict):
 @router.get("/real_time_demand/")
 async def get_real_time_demand(location: str, date: str = "20250131"):
     try:
-        df = fetch_daily_usage_data(date)
-        filtered = df[df["출발지"].str.contains(location)]
-        total_rides = int(filtered["운행건수"].sum())
+        table = await fetch_usage_location_table(date)
+        total_rides = int(table.total(location, "운행건수"))
         return {"location": location, "date": date, "rides": total_rides}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,378 @@
+# serving/dispatch_engine.py
+"""
+연속 마이크로 배치 배차 엔진
+
+/smart_dispatch/ 요청을 aging 우선순위 큐(core/aging_queue.py)에 넣고,
+일정 시간(window) 또는 일정 건수(max_batch) 만큼 모은 뒤 한꺼번에 배정한다.
+긴급도가 EMERGENCY_FLOOR 를 넘은 요청은 큐 스캔 없이 즉시 꺼내 바로 배정한다.
+대기 요청이 max_batch 보다 많으면 긴급도 높은 순으로 배치에 넣는다.
+
+  1) 묶음 전처리: 외부 조회 동시 실행 + 대기시간 예측을 모델 1회 호출로
+  2) 긴급 요청(urgency > threshold)은 긴급도 순으로 가장 빠른 차량을 먼저 배정
+  3) 합승 모드(DISPATCH_POOLING=1)면 호환되는 일반 요청을 묶음(core/pooling.py)으로 만들고
+     묶음마다 첫 픽업 요청만 배정에 넣는다
+  4) 나머지는 SmartDispatchAlgorithm 점수 행렬 위에서 헝가리안 알고리즘으로
+     전체 점수 합이 최대가 되도록 동시 배정 (같은 차량 중복 배정 없음, 묶음 전원이 같은 차량)
+  5) 결과는 대기 중인 HTTP 호출자의 Future 로 전달
+
+환경 변수
+---------
+DISPATCH_BATCH_WINDOW  배치 수집 시간(초). 0 이면 엔진 비활성 (기본 0)
+DISPATCH_BATCH_MAX     배치 최대 건수 (기본 64)
+DISPATCH_QUEUE_MAX     대기열 한도, 초과 시 503 (기본 1000)
+DISPATCH_BATCH_TICK    긴급 요청 확인 주기(초) (기본 0.1)
+DISPATCH_POOLING       1 이면 합승 묶음 배정 (core/pooling.py, 기본 0)
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+from fastapi import HTTPException
+
+from .core import execution
+from .core.aging_queue import AgingPriorityQueue
+from .core.event_log import CANDIDATES as LOGGED_CANDIDATES
+from .core.execution import ExecutorOverloaded
+from .core.pooling import POOLING, Pool
+from .core.startup import lazy_import
+
+# scipy.optimize import 는 수백 ms — 배치 엔진을 쓰지 않는 프로세스는 불러오지 않는다
+optimize = lazy_import("scipy.optimize")
+
+logger = logging.getLogger(__name__)
+
+INFEASIBLE = -1e9
+
+# 긴급 배차 기준(urgency_threshold)의 최솟값. 이를 넘으면 window 를 기다리지 않는다.
+EMERGENCY_FLOOR = 30.0
+
+
+@dataclass
+class PendingDispatch:
+    request: Dict[str, Any]
+    drivers: List[Dict[str, Any]]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def joint_assignment(
+    algorithm,
+    requests: List[Dict[str, Any]],
+    urgencies: List[float],
+    drivers_per_request: List[List[Dict[str, Any]]],
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    요청 × 운전자 점수 행렬을 만들고 점수 합 최대 배정을 구한다.
+    반환: 요청별 match(dict: driver/score/components) 또는 None(배정 불가)
+    """
+    driver_ids: Dict[str, int] = {}
+    drivers: List[Dict[str, Any]] = []
+    for ds in drivers_per_request:
+        for d in ds:
+            if d["driver_id"] not in driver_ids:
+                driver_ids[d["driver_id"]] = len(drivers)
+                drivers.append(d)
+
+    if not drivers:
+        return [None] * len(requests)
+
+    scores = np.full((len(requests), len(drivers)), INFEASIBLE)
+    matches: Dict[tuple, Dict[str, Any]] = {}
+    rows_scored: List[List[Dict[str, Any]]] = []
+    for i, (req, urgency, ds) in enumerate(zip(requests, urgencies, drivers_per_request)):
+        scored = algorithm.score_drivers(req, urgency, ds)
+        rows_scored.append(scored)
+        for m in scored:
+            j = driver_ids[m["driver"]["driver_id"]]
+            scores[i, j] = m["score"]
+            matches[(i, j)] = m
+
+    rows, cols = optimize.linear_sum_assignment(scores, maximize=True)
+    # 요청이 하나면 요청별 최고 점수 선택과 같다 (배정 방식은 이벤트 로그 재생·섀도 비교용)
+    mode = "joint" if len(requests) > 1 else "argmax"
+    result: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    for i, j in zip(rows, cols):
+        if scores[i, j] > INFEASIBLE:
+            # 차순위 후보는 배차 이벤트 로그용 (core/event_log.py)
+            alternatives = sorted(rows_scored[i], key=lambda m: -m["score"])[:LOGGED_CANDIDATES]
+            result[i] = {**matches[(i, j)], "alternatives": alternatives, "scored": rows_scored[i],
+                         "assignment": mode}
+    return result
+
+
+@dataclass
+class Assignment:
+    match: Optional[Dict[str, Any]] = None
+    emergency: bool = False
+    error: Optional[HTTPException] = None
+    pool: Optional[Pool] = None
+    # 긴급 배차 때 본 후보 차량 (이벤트 로그·섀도 평가용)
+    candidates: Optional[List[Dict[str, Any]]] = None
+
+
+async def assign_requests(
+    algorithm,
+    requests: List[Dict[str, Any]],
+    urgencies: List[float],
+    fleets: List[List[Dict[str, Any]]],
+    candidates: Callable[[int, Set[str]], List[Dict[str, Any]]],
+    pooling: bool = False,
+) -> List[Assignment]:
+    """
+    prepare_batch 를 마친 요청 묶음 배정 (DispatchBatcher, /batch_optimize/bulk 공용)
+
+    fleets[i]     요청 i 가 본 차량 목록 (긴급 기준 urgency_threshold 계산용)
+    candidates    (i, 이미 배정된 차량 ID) → 요청 i 의 후보 차량
+    pooling       일반 요청을 합승 묶음으로 배정 (묶음 lead 의 배정 결과를 전원이 공유)
+    """
+    outcomes = [Assignment() for _ in requests]
+
+    # ① 긴급 요청: 긴급도 높은 순으로 가장 빠른 차량 선점
+    taken: Set[str] = set()
+    normal: List[int] = []
+    for i in sorted(range(len(requests)), key=lambda k: -urgencies[k]):
+        requests[i]["system_load"] = algorithm.system_load(fleets[i])
+        if urgencies[i] <= algorithm.policy.threshold(requests[i]["system_load"]):
+            normal.append(i)
+            continue
+        seen = candidates(i, taken)
+        try:
+            match = algorithm.emergency_dispatch(requests[i], seen)
+        except HTTPException as e:
+            outcomes[i] = Assignment(emergency=True, error=e)
+            continue
+        taken.add(match["driver"]["driver_id"])
+        outcomes[i] = Assignment(match=match, emergency=True, candidates=seen)
+
+    if not normal:
+        return outcomes
+
+    # ② 합승 묶음: lead(첫 픽업)만 배정에 남긴다 (normal 은 긴급도 순이라 같은 칸에서는 급한 요청부터 묶임)
+    pools: Dict[int, tuple] = {}
+    if pooling:
+        planned = await execution.run(
+            "dispatch.pooling", algorithm.plan_pools, [requests[i] for i in normal], size=len(normal),
+        )
+        for pool in planned:
+            members = [normal[k] for k in pool.members]
+            pools[members[0]] = (pool, members)
+        followers = {i for _, members in pools.values() for i in members[1:]}
+        normal = [i for i in normal if i not in followers]
+
+    # ③ 일반 요청: 남은 차량으로 동시 배정
+    drivers = [candidates(i, taken) for i in normal]
+    matches = await execution.run(
+        "dispatch.score", joint_assignment, algorithm, [requests[i] for i in normal],
+        [urgencies[i] for i in normal], drivers,
+        size=sum(len(ds) for ds in drivers),
+    )
+    for i, match in zip(normal, matches):
+        if match is None:
+            outcomes[i] = Assignment(error=HTTPException(status_code=404, detail="배차 가능한 차량이 없습니다"))
+        else:
+            outcomes[i] = Assignment(match=match)
+    for lead, (pool, members) in pools.items():
+        shared = outcomes[lead]
+        outcomes[lead] = replace(shared, pool=pool)
+        # 나머지 구성원은 자기 점수가 아니라 lead 의 배정을 따른다
+        follower = {**shared.match, "assignment": "pooled"} if shared.match is not None else None
+        for i in members[1:]:
+            outcomes[i] = replace(shared, pool=pool, match=follower)
+    return outcomes
+
+
+class DispatchBatcher:
+    def __init__(self, algorithm, window: float = 2.0, max_batch: int = 64, max_queue: int = 1000,
+                 tick: float = 0.1, pooling: bool = False):
+        self.algorithm = algorithm
+        self.pooling = pooling
+        self.window = window
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.tick = tick
+        self.pending = AgingPriorityQueue()
+        self._ids = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._first_arrival: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.received = 0
+        self.dispatched = 0
+        self.emergencies = 0
+        self.fast_tracked = 0
+        self.unassigned = 0
+        self.pooled = 0
+        self.saved_vehicle_minutes = 0.0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+        self.total_queue_wait = 0.0
+
+    # ── 수명 주기 ────────────────────────────────────────────
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="dispatch-batcher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while len(self.pending):
+            _, _, p = self.pending.pop_most_urgent()
+            if not p.future.done():
+                p.future.set_exception(HTTPException(503, "배차 엔진 종료 중"))
+
+    # ── 제출 ─────────────────────────────────────────────────
+    async def submit(self, request: Dict[str, Any], drivers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if len(self.pending) >= self.max_queue:
+            raise ExecutorOverloaded("dispatch-queue")
+
+        request.setdefault("received_at", time.perf_counter())
+        loop = asyncio.get_running_loop()
+        p = PendingDispatch(request, drivers, loop.create_future())
+        key = next(self._ids)
+        # 모델 예측 없이 계산 가능한 (가산점, 배수)로 큐에 넣는다
+        additive, multiplier = self.algorithm.urgency_components(request, include_prediction=False)
+        self.pending.push(key, request["request_time"], multiplier, additive, payload=p)
+        # 호출자가 연결을 끊으면 큐에서 제거
+        p.future.add_done_callback(lambda f, k=key: f.cancelled() and self.pending.cancel(k))
+
+        if self._first_arrival is None:
+            self._first_arrival = loop.time()
+        self._wakeup.set()
+        return await p.future
+
+    # ── 배치 루프 ────────────────────────────────────────────
+    async def _wait(self, timeout: float):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not len(self.pending):
+                self._first_arrival = None
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # ① 긴급 요청은 window 를 기다리지 않고 바로 처리
+            urgent = self.pending.pop_above(EMERGENCY_FLOOR)
+            if urgent:
+                self.fast_tracked += len(urgent)
+                await self._process([p for _, _, p in urgent])
+                continue
+
+            # ② window 가 끝났거나 배치가 찼으면 긴급도 순으로 max_batch 건 처리
+            deadline = (self._first_arrival or loop.time()) + self.window
+            if len(self.pending) >= self.max_batch or loop.time() >= deadline:
+                batch = []
+                while len(self.pending) and len(batch) < self.max_batch:
+                    batch.append(self.pending.pop_most_urgent()[2])
+                self._first_arrival = loop.time() if len(self.pending) else None
+                await self._process(batch)
+                continue
+
+            await self._wait(min(self.tick, max(deadline - loop.time(), 0.0)))
+
+    async def _process(self, batch: List[PendingDispatch]):
+        # 그 사이 연결이 끊겨 취소된 호출자는 제외
+        batch = [p for p in batch if not p.future.done()]
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            await self.dispatch_batch(batch)
+        except Exception as e:
+            logger.exception("배치 배차 실패")
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+        self.batches += 1
+        self.received += len(batch)
+        self.last_batch_size = len(batch)
+        self.last_batch_ms = (time.monotonic() - started) * 1000
+        self.total_queue_wait += sum(started - p.enqueued_at for p in batch)
+
+    async def dispatch_batch(self, batch: List[PendingDispatch]):
+        algorithm = self.algorithm
+        requests = [p.request for p in batch]
+        urgencies = await algorithm.prepare_batch(requests)
+        outcomes = await assign_requests(
+            algorithm, requests, urgencies, [p.drivers for p in batch],
+            lambda i, taken: algorithm.candidate_drivers(batch[i].request, batch[i].drivers, exclude=taken),
+            pooling=self.pooling,
+        )
+        for pool in {id(o.pool): o.pool for o in outcomes if o.pool is not None and o.match is not None}.values():
+            self.pooled += len(pool.members)
+            self.saved_vehicle_minutes += pool.saved_minutes
+
+        for p, outcome in zip(batch, outcomes):
+            if outcome.error is not None:
+                if not outcome.emergency:
+                    self.unassigned += 1
+                self._resolve(p, exc=outcome.error)
+            elif outcome.emergency:
+                self.emergencies += 1
+                algorithm.learn_from_dispatch(p.request, outcome.match, candidates=outcome.candidates)
+                self._resolve(p, result=outcome.match)
+            else:
+                algorithm.learn_from_dispatch(p.request, outcome.match, outcome.pool)
+                self._resolve(p, result=algorithm.create_dispatch_result(p.request, outcome.match, outcome.pool))
+
+    def _resolve(self, p: PendingDispatch, result: Any = None, exc: Optional[BaseException] = None):
+        if p.future.done():
+            return
+        if exc is not None:
+            p.future.set_exception(exc)
+        else:
+            self.dispatched += 1
+            p.future.set_result(result)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self.window,
+            "max_batch": self.max_batch,
+            "queue_size": len(self.pending),
+            "urgency_groups": self.pending.group_count,
+            "batches": self.batches,
+            "dispatched": self.dispatched,
+            "emergencies": self.emergencies,
+            "fast_tracked": self.fast_tracked,
+            "unassigned": self.unassigned,
+            "pooling": self.pooling,
+            "pooled": self.pooled,
+            "saved_vehicle_minutes": round(self.saved_vehicle_minutes, 1),
+            "avg_batch_size": round(self.received / self.batches, 2) if self.batches else 0,
+            "avg_queue_wait_ms": round(self.total_queue_wait / max(self.received, 1) * 1000, 1),
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 1),
+        }
+
+
+def batcher_from_env(algorithm) -> Optional[DispatchBatcher]:
+    window = float(os.getenv("DISPATCH_BATCH_WINDOW", "0"))
+    if window <= 0:
+        return None
+    return DispatchBatcher(
+        algorithm,
+        window=window,
+        max_batch=int(os.getenv("DISPATCH_BATCH_MAX", "64")),
+        max_queue=int(os.getenv("DISPATCH_QUEUE_MAX", "1000")),
+        tick=float(os.getenv("DISPATCH_BATCH_TICK", "0.1")),
+        pooling=POOLING,
+    )
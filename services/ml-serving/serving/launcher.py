@@ -0,0 +1,251 @@
+# serving/launcher.py
+"""
+운영용 멀티 워커 런처
+
+    python -m serving.launcher --host 0.0.0.0 --port 8000 --workers 4
+
+1) 마스터가 앱·모델·LOCATION_DATA 행렬을 미리 로드하고 gc.freeze() 로 고정
+2) 소켓을 한 번 bind 한 뒤 워커 N개를 fork (copy-on-write 로 메모리 공유)
+3) 각 워커는 워밍업 + /healthz 확인을 통과한 뒤에만 accept 를 시작하고
+   준비 완료를 파이프로 마스터에 알린다
+4) SIGHUP  → 새 워커가 준비되면 기존 워커를 하나씩 종료 (무중단 재시작)
+   SIGTERM / SIGINT → 모든 워커 graceful 종료
+   워커가 비정상 종료하면 자동으로 다시 띄운다
+
+주의: XGBoost(OpenMP) 예측은 fork 이후 워커에서만 실행한다.
+      마스터에서 스레드 풀이 만들어진 뒤 fork 하면 자식이 멈출 수 있다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+logger = logging.getLogger("serving.launcher")
+
+
+# ────────────────────────────────────────────────
+# 1. 사전 로드 (마스터)
+# ────────────────────────────────────────────────
+def preload():
+    t0 = time.perf_counter()
+    from serving.api import app
+    from serving import dispatch
+    from serving.core.ml_model import get_model_assets
+
+    # 모델은 import 시 로드되지 않으므로 여기서 적재 (워커는 fork 로 물려받고 startup 적재는 건너뛴다)
+    # 예측 격자(PREDICTION_GRID)는 모델 예측으로 만들므로 마스터에서는 만들지 않는다 → warmup()
+    get_model_assets(with_grid=False)
+
+    # 정적 테이블 접근 (행렬은 import 시 계산되어 읽기 전용으로 고정됨)
+    _ = dispatch.DISTANCE_KM.shape, dispatch.WEATHER_IMPACT
+
+    # 이후 GC 가 공유 페이지를 건드리지 않도록 현재 객체를 영구 세대로 이동
+    gc.collect()
+    gc.freeze()
+    logger.info("사전 로드 완료 (%.2fs, frozen=%d)", time.perf_counter() - t0, gc.get_freeze_count())
+    return app
+
+
+# ────────────────────────────────────────────────
+# 2. 워커
+# ────────────────────────────────────────────────
+def warmup(app) -> None:
+    """
+    accept 전에 실행: 모델 첫 예측(JIT/OpenMP 초기화), 점수 계산 경로, /healthz 확인
+    """
+    import httpx
+    from serving.core.ml_model import ensure_prediction_grid
+    from serving.dispatch import dispatch_algorithm
+    from serving.routers.mock import compute_priority_scores, generate_personas
+
+    ensure_prediction_grid()
+
+    dispatch_algorithm.predict_waiting_time({
+        "pickup_location": "강남", "weather": "맑음", "wheelchair": True,
+        "num_vehicles": 10, "num_users": 20,
+    })
+    dispatch_algorithm.estimate_real_travel_time("강남", "종로", "맑음")
+    compute_priority_scores(generate_personas(20))
+
+    async def _check():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+            resp = await client.get("/healthz")
+            resp.raise_for_status()
+
+    asyncio.run(_check())
+
+
+def run_worker(app, sock: socket.socket, ready_fd: int, args) -> None:
+    import uvicorn
+
+    # 마스터의 시그널 핸들러 해제 (uvicorn 이 자체 핸들러를 설치)
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+
+    try:
+        warmup(app)
+    except Exception:
+        logger.exception("워밍업 실패 (pid=%d)", os.getpid())
+        os._exit(3)
+
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_graceful_shutdown=args.graceful_timeout)
+    server = uvicorn.Server(config)
+
+    async def _serve():
+        task = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started and not task.done():
+            await asyncio.sleep(0.05)
+        if server.started:
+            os.write(ready_fd, b"1")
+        os.close(ready_fd)
+        await task
+
+    asyncio.run(_serve())
+    os._exit(0 if server.started else 4)
+
+
+# ────────────────────────────────────────────────
+# 3. 마스터
+# ────────────────────────────────────────────────
+class Arbiter:
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, float] = {}  # pid → 시작 시각
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self) -> Optional[int]:
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            try:
+                run_worker(self.app, self.sock, w, self.args)
+            finally:
+                os._exit(1)
+        os.close(w)
+        self.workers[pid] = time.time()
+        ready = self._wait_ready(r, pid)
+        os.close(r)
+        if not ready:
+            logger.error("워커 준비 실패 pid=%d", pid)
+            self.kill(pid, signal.SIGKILL)
+            return None
+        logger.info("워커 준비 완료 pid=%d", pid)
+        return pid
+
+    def _wait_ready(self, fd: int, pid: int) -> bool:
+        deadline = time.time() + self.args.warmup_timeout
+        while time.time() < deadline:
+            readable, _, _ = select.select([fd], [], [], 0.5)
+            if readable:
+                return os.read(fd, 1) == b"1"
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                self.workers.pop(pid, None)
+                return False
+        return False
+
+    def kill(self, pid: int, sig=signal.SIGTERM):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.workers.pop(pid, None) is not None and not self.stopping:
+                logger.warning("워커 종료 감지 pid=%d status=%d", pid, status)
+
+    def rolling_restart(self):
+        """새 워커가 준비된 뒤에 기존 워커를 하나씩 graceful 종료"""
+        for old_pid in list(self.workers):
+            if self.spawn() is None:
+                logger.error("재시작 중단: 새 워커가 준비되지 않음")
+                return
+            self.kill(old_pid)
+
+    def stop(self):
+        self.stopping = True
+        for pid in list(self.workers):
+            self.kill(pid)
+        deadline = time.time() + self.args.graceful_timeout + 5
+        while self.workers and time.time() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            self.kill(pid, signal.SIGKILL)
+        self.reap()
+
+    def run(self):
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "reload_requested", True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "stopping", True))
+
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        backoff = 1.0
+        while not self.stopping:
+            self.reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                logger.info("SIGHUP: 워커 무중단 재시작")
+                self.rolling_restart()
+            if len(self.workers) < self.args.workers:
+                if self.spawn() is None:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
+                    continue
+                backoff = 1.0
+            time.sleep(0.5)
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스마트 장애인 콜택시 API 멀티 워커 런처")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument("--warmup-timeout", type=float, default=120)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [%(process)d] %(name)s %(message)s")
+
+    app = preload()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    logger.info("listening on %s:%d (workers=%d)", args.host, args.port, args.workers)
+
+    Arbiter(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# serving/rebalancing.py
+"""
+유휴 차량 재배치 계획
+
+운행을 마친 차량은 하차 지점에 그대로 머물고, 수요가 높은 지역으로 공급을 옮기는 로직이 없었다.
+주기적으로(워밍업 스케줄러 "rebalance.plan") 다음을 계산한다.
+
+  1) 지역별 유휴 차량 수(공급) — 공간 인덱스(위치 스트림)의 available 차량
+  2) 지역별 목표 대수 — 다음 REBALANCE_HORIZON_MINUTES 분 예측 수요(core/demand_forecast.py) 비율
+     (예측이 비어 있으면 LOCATION_DATA 의 density 가중치)
+  3) 과잉 지역 차량 → 부족 지역 빈자리 운송 문제를 지역 간 이동시간 행렬 위에서
+     헝가리안 알고리즘으로 풀어 (각 과잉 지역에는 목표 대수만큼 "머무름" 자리를 비용 0 으로 둠)
+     이동시간 합이 최소인 차량별 재배치 제안을 만든다
+
+휠체어 차량은 따로 계획한다 — 휠체어 이용자 대기시간은 휠체어 차량 분포에만 좌우되므로
+일반 차량이 휠체어 차량의 자리를 채우는 것으로 계산되지 않게 한다.
+
+환경 변수
+---------
+REBALANCE_INTERVAL           계획 주기(초, 0 이면 끔, 기본 120)
+REBALANCE_HORIZON_MINUTES    목표 계산에 쓰는 예측 구간 (기본 60)
+REBALANCE_MAX_MINUTES        이보다 먼 재배치는 제안하지 않음 (기본 20)
+REBALANCE_MAX_MOVES          한 번에 제안하는 최대 이동 수 (기본 200)
+"""
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .core.demand_forecast import SLOT_MINUTES, demand_forecaster
+from .core.locations import DISTRICT_NAMES, resolve
+from .core.spatial import IndexedDriver
+from .core.startup import lazy_import
+
+optimize = lazy_import("scipy.optimize")
+
+INTERVAL = float(os.getenv("REBALANCE_INTERVAL", "120"))
+HORIZON_MINUTES = float(os.getenv("REBALANCE_HORIZON_MINUTES", "60"))
+MAX_MINUTES = float(os.getenv("REBALANCE_MAX_MINUTES", "20"))
+MAX_MOVES = int(os.getenv("REBALANCE_MAX_MOVES", "200"))
+
+DENSITY_WEIGHT = {"high": 3.0, "medium": 2.0, "low": 1.0}
+INFEASIBLE = 1e9
+
+
+def allocate(total: int, weights: np.ndarray) -> np.ndarray:
+    """total 대를 weights 비율로 정수 배분 (최대 잉여 방식)"""
+    if total <= 0 or weights.sum() <= 0:
+        return np.zeros(len(weights), dtype=int)
+    exact = total * weights / weights.sum()
+    counts = np.floor(exact).astype(int)
+    remainder = total - counts.sum()
+    counts[np.argsort(-(exact - counts))[:remainder]] += 1
+    return counts
+
+
+def solve_moves(origins: np.ndarray, targets: np.ndarray, travel: np.ndarray) -> List[tuple]:
+    """
+    origins[k]   차량 k 의 현재 지역 인덱스
+    targets[z]   지역 z 목표 대수
+    travel[a, b] 지역 a → b 이동시간(분)
+    반환: [(차량 k, 목적 지역 b, 분)] — 현재 지역에 머무는 차량은 제외
+    """
+    n = len(targets)
+    supply = np.bincount(origins, minlength=n)
+    surplus = supply - targets
+    deficit = np.clip(-surplus, 0, None)
+    if deficit.sum() == 0 or (surplus > 0).sum() == 0:
+        return []
+
+    # 행: 과잉 지역 차량 / 열: 부족 지역 빈자리 + 과잉 지역 머무름 자리
+    rows = np.flatnonzero(surplus[origins] > 0)
+    move_cols = np.repeat(np.arange(n), deficit)
+    stay_cols = np.repeat(np.arange(n), np.where(surplus > 0, targets, 0))
+    cost = np.full((len(rows), len(move_cols) + len(stay_cols)), INFEASIBLE)
+    from_zone = origins[rows]
+    move_cost = travel[from_zone[:, None], move_cols[None, :]]
+    cost[:, :len(move_cols)] = np.where(move_cost <= MAX_MINUTES, move_cost, INFEASIBLE)
+    cost[:, len(move_cols):] = np.where(from_zone[:, None] == stay_cols[None, :], 0.0, INFEASIBLE)
+
+    r, c = optimize.linear_sum_assignment(cost)
+    moves = [
+        (int(rows[i]), int(move_cols[j]), float(cost[i, j]))
+        for i, j in zip(r, c) if j < len(move_cols) and cost[i, j] < INFEASIBLE
+    ]
+    moves.sort(key=lambda m: m[2])
+    return moves[:MAX_MOVES]
+
+
+class RebalancingPlanner:
+    def __init__(self, algorithm, locations: Dict[str, Dict[str, Any]]):
+        self.algorithm = algorithm
+        self.names = list(locations)
+        self.density = np.array([DENSITY_WEIGHT.get(locations[n]["density"], 1.0) for n in self.names])
+        self.forecast_rows = np.array([DISTRICT_NAMES.index(resolve(n)) for n in self.names])
+        self.last_plan: Optional[Dict[str, Any]] = None
+        self.plans = 0
+
+    def travel_matrix(self) -> np.ndarray:
+        """지역 간 이동시간(분) — 배차 ETA 와 같은 모델 (교통 혼잡 계수 포함)"""
+        return self.algorithm.travel_time_matrix(self.names, "맑음")
+
+    def demand_weights(self) -> tuple:
+        slots = max(int(np.ceil(HORIZON_MINUTES / SLOT_MINUTES)), 1)
+        forecast = demand_forecaster.district_forecast(slots).sum(axis=1)[self.forecast_rows]
+        if forecast.sum() > 0:
+            return forecast, "forecast"
+        return self.density, "density"
+
+    def plan(self, drivers: Optional[List[IndexedDriver]] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        drivers = self.algorithm.driver_index.snapshot() if drivers is None else drivers
+        index = {name: i for i, name in enumerate(self.names)}
+        origins = np.array([index.get(d.data["driver"]["current_location"], -1) for d in drivers], dtype=int)
+        wheelchair = np.array([d.wheelchair_capable for d in drivers], dtype=bool)
+        known = origins >= 0
+
+        weights, source = self.demand_weights()
+        travel = self.travel_matrix()
+        moves, districts = [], {}
+        for fleet, mask in (("wheelchair", known & wheelchair), ("general", known & ~wheelchair)):
+            members = np.flatnonzero(mask)
+            targets = allocate(len(members), weights)
+            supply = np.bincount(origins[members], minlength=len(self.names))
+            for k, b, minutes in solve_moves(origins[members], targets, travel):
+                d = drivers[members[k]]
+                moves.append({
+                    "driver_id": d.driver_id,
+                    "fleet": fleet,
+                    "from": self.names[origins[members[k]]],
+                    "to": self.names[b],
+                    "eta_minutes": round(minutes, 1),
+                })
+            districts[fleet] = {
+                name: {"supply": int(supply[i]), "target": int(targets[i]), "imbalance": int(supply[i] - targets[i])}
+                for i, name in enumerate(self.names)
+            }
+
+        self.plans += 1
+        self.last_plan = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "demand_source": source,
+            "horizon_minutes": HORIZON_MINUTES,
+            "idle_drivers": int(known.sum()),
+            "moves": moves,
+            "districts": districts,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        return self.last_plan
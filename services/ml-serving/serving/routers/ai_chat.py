@@ -8,16 +8,15 @@ from fastapi import APIRouter, Body, HTTPException
 
 # ── 내부 서비스 ──────────────────────────────────────
 from ..core.gemini_service import ask_gemini_model
-from ..core.seoul_api   import fetch_daily_usage_data
+from ..core.seoul_api   import fetch_usage_location_table
 from ..core.tmap_api    import get_tmap_travel_time
-from ..core.ml_model    import load_model_assets, predict_waiting_time_from_request
+from ..core.ml_model    import get_model_assets, predict_waiting_time_from_request
 from ..routers.mock     import realtime_mock
 
 import uuid
 
 router = APIRouter()
 
-model, le_loc, le_weather = load_model_assets()
 chat_histories: Dict[str, List[Dict[str, str]]] = {}
 
 
@@ -44,7 +43,8 @@ async def ai_chat(
         # ── 서울시 일 통계 ───────────────────────
         try:
             today = datetime.now().strftime("%Y%m%d")
-            df = await fetch_daily_usage_data(today)
+            # 워밍업 스케줄러가 채워 두는 날짜별 표 캐시 사용
+            df = (await fetch_usage_location_table(today)).df
             total_requests  = int(df["접수건"].sum())
             avg_waiting_api = round(df["평균대기시간"].mean(), 1)
         except Exception:
@@ -60,7 +60,7 @@ async def ai_chat(
 
         # ── ML ETA ──────────────────────────────
         req_dict = {"pickup_location": "강남", "weather": "맑음", "wheelchair": False}
-        ml_eta   = predict_waiting_time_from_request(model, le_loc, le_weather, req_dict)
+        ml_eta   = predict_waiting_time_from_request(*get_model_assets(), req_dict)
 
         fused_eta = round((mock_eta*0.5 + ml_eta*0.3 + tmap_eta*0.2), 1)
 
@@ -111,5 +111,7 @@ async def ai_chat(
             "history_length" : len(chat_histories[session_id]),
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI chat error: {e}")
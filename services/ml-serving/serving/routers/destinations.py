@@ -3,17 +3,20 @@ from fastapi_cache.decorator import cache
 from ..core.seoul_api import fetch_best_100_destinations          # ✅ 수정
 from ..core.tmap_api   import get_tmap_travel_time    
 from ..constants import DEFAULT_DATE
+from ..core.cache import route_cache
+from ..core.responses import FORMAT_QUERY, ResponseFormat, fast_response
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/best_destinations")
-@cache(expire=300)
+@cache(**route_cache("best_destinations"))
 async def get_best_destinations(
     sDate: str = DEFAULT_DATE[:-2] + "01",
     start_lng: float = Query(126.9784),
     start_lat: float = Query(37.5667),
+    fmt: ResponseFormat = FORMAT_QUERY,
 ):
     """
     인기 목적지와 ETA 반환
@@ -38,7 +41,9 @@ async def get_best_destinations(
                 row["estimated_minutes"] = None
             results.append(row)
 
-        return {"start_date": sDate, "top_destinations": results}
+        return fast_response(
+            {"start_date": sDate, "top_destinations": results}, fmt, columnar_fields=("top_destinations",)
+        )
     except Exception as e:
         logger.exception("베스트 목적지 API 처리 중 오류")
         raise HTTPException(status_code=500, detail=str(e))
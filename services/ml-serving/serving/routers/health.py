@@ -0,0 +1,32 @@
+# serving/routers/health.py
+from __future__ import annotations
+
+import os
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..core.startup import readiness
+
+router = APIRouter()
+
+STARTED_AT = time.time()
+
+
+@router.get("/healthz")
+async def liveness():
+    """
+    프로세스가 살아 있고 이벤트 루프가 응답하는지 확인 (런처 워밍업/오케스트레이터용)
+    """
+    return {"status": "ok", "pid": os.getpid(), "uptime_seconds": round(time.time() - STARTED_AT, 1)}
+
+
+@router.get("/readyz")
+async def readiness_probe():
+    """
+    요청을 받을 준비가 됐는지 확인 (모델 적재 등). 준비 전이면 503 — 오케스트레이터는
+    liveness 와 달리 재시작하지 않고 트래픽만 보내지 않는다
+    """
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
@@ -1,8 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi_cache.decorator import cache
 from datetime import datetime, timedelta
+import asyncio
 import random
 from typing import List, Dict, Any
 
+from ..core import execution
+from ..core.cache import route_cache
+from ..core.demand_forecast import demand_forecaster
+from ..core.priority_index import live_calls
+from ..core.responses import FORMAT_QUERY, ResponseFormat, fast_response
+from ..schemas import LiveCall
+
 router = APIRouter()
 
 # ==========================================
@@ -11,7 +20,12 @@ router = APIRouter()
 def get_time_multiplier(hour: int, weekday: int) -> float:
     """
     시간대/요일에 따라 multiplier 반환
+    (수요 예측 기준 곡선이 학습돼 있으면 그 곡선, 아니면 아래 계단 함수)
     """
+    learned = demand_forecaster.time_multiplier(hour, weekday)
+    if learned is not None:
+        return learned
+
     multiplier = 1.0
 
     # 심야 시간 (0~5시): 수요 적음
@@ -132,6 +146,16 @@ def compute_priority_scores(calls_detail: List[Dict[str, Any]]) -> List[Dict[str
 # 실시간 mock 데이터 API
 # ==========================================
 @router.get("/realtime")
+@cache(**route_cache("mock_realtime"))
+async def get_realtime_mock(fmt: ResponseFormat = FORMAT_QUERY):
+    """
+    /mock/realtime (워커 공유 캐시 적용, 직렬화된 본문을 그대로 캐시)
+    내부 호출(배차·usage·ai_chat)은 캐시를 거치지 않는 realtime_mock()을 사용
+    ?format=columnar 이면 calls_detail 을 열 단위로 반환
+    """
+    return fast_response(await realtime_mock(), fmt, columnar_fields=("calls_detail",))
+
+
 async def realtime_mock():
     """
     시간대/요일 패턴 기반의 mock 실시간 데이터 생성
@@ -171,7 +195,9 @@ async def realtime_mock():
 
     # --- 페르소나 기반 우선순위 계산 ---
     calls_detail = generate_personas(200)
-    ranked_calls = compute_priority_scores(calls_detail)
+    ranked_calls = await execution.run(
+        "mock.priority_scores", compute_priority_scores, calls_detail, size=len(calls_detail)
+    )
 
     return {
         "timestamp": now.isoformat(),
@@ -183,3 +209,34 @@ async def realtime_mock():
         "mock_eta_minutes": eta_minutes,
         "calls_detail": ranked_calls
     }
+
+
+# ==========================================
+# 실시간 호출 목록 (증분 우선순위 인덱스)
+# ==========================================
+@router.post("/calls")
+async def upsert_live_calls(calls: List[LiveCall]):
+    """
+    호출 추가/갱신 — 전체 재계산 없이 인덱스만 증분 갱신 (워커 공용 목록, core/priority_index.py)
+    """
+    def _upsert():
+        for call in calls:
+            live_calls.add(call.model_dump())
+        return live_calls.stats()
+
+    return await asyncio.to_thread(_upsert)
+
+
+@router.delete("/calls/{call_id}")
+async def remove_live_call(call_id: str):
+    if not await asyncio.to_thread(live_calls.remove, call_id):
+        raise HTTPException(status_code=404, detail=f"호출 {call_id} 없음")
+    return await asyncio.to_thread(live_calls.stats)
+
+
+@router.get("/calls/top")
+async def get_top_live_calls(n: int = 20, fmt: ResponseFormat = FORMAT_QUERY):
+    def _top():
+        return {"calls": live_calls.top(n), "stats": live_calls.stats()}
+
+    return fast_response(await asyncio.to_thread(_top), fmt, columnar_fields=("calls",))
@@ -0,0 +1,198 @@
+# serving/routers/system.py
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..core import cache as cache_tier
+from ..core import execution
+from ..core import prediction_grid
+from ..core.locations import usage_tables
+from ..core.scheduler import scheduler
+from ..core.traffic import traffic_factors
+from ..core.demand_forecast import demand_forecaster
+from ..core.calibration import wait_calibrator
+from ..core import event_log
+from ..core.ml_model import model_mtime, model_profile
+from ..core.usage_cube import usage_cube
+from ..analysis import ingest_usage_date
+
+router = APIRouter()
+
+
+# ── 캐시 ────────────────────────────────────────────
+@router.get("/cache")
+async def cache_stats():
+    """
+    워커 공유 캐시 항목 수와 네임스페이스별 hit ratio
+    """
+    return await asyncio.to_thread(cache_tier.get_backend().stats)
+
+
+@router.post("/cache/invalidate")
+async def cache_invalidate(tag: List[str] = Query(..., description="무효화할 태그 (예: date:20250131)")):
+    removed = await asyncio.to_thread(cache_tier.get_backend().invalidate_tags, tag)
+    return {"status": "ok", "tags": tag, "removed": removed}
+
+
+@router.post("/cache/ingest/{date}")
+async def cache_ingested(date: str):
+    """
+    데이터 파이프라인이 date(YYYYMMDD) 적재를 마친 뒤 호출 → 관련 캐시 무효화
+    """
+    if len(date) != 8 or not date.isdigit():
+        raise HTTPException(status_code=422, detail="date 는 YYYYMMDD 형식이어야 합니다")
+    usage_tables.invalidate(date)
+    removed = await asyncio.to_thread(cache_tier.invalidate_date, date)
+    # 집계 큐브에 새 날짜 면 반영 (실패해도 캐시 무효화는 유지)
+    try:
+        cube = await ingest_usage_date(date)
+        # 새 날짜를 반영해 수요 예측 기준 곡선 재학습
+        await execution.run("analysis.aggregate", demand_forecaster.fit)
+    except HTTPException as e:
+        cube = {"error": e.detail}
+    except KeyError as e:
+        cube = {"error": str(e)}
+    return {"status": "ok", "date": date, "removed": removed, "cube": cube}
+
+
+@router.get("/cube")
+async def cube_stats():
+    """
+    일자 × 자치구 × 시간대 집계 큐브 적재 현황
+    """
+    return usage_cube.stats()
+
+
+@router.delete("/cache")
+async def cache_clear(namespace: Optional[str] = None):
+    removed = await cache_tier.get_backend().clear(namespace=namespace)
+    return {"status": "ok", "namespace": namespace, "removed": removed}
+
+
+# ── 실행기 ──────────────────────────────────────────
+@router.get("/executors")
+async def executor_metrics():
+    """
+    스레드/프로세스 풀 대기열 깊이·거절 수와 연산별 실행 정책
+    """
+    return execution.metrics()
+
+
+# ── 예측 격자 ───────────────────────────────────────
+@router.get("/prediction_grid")
+async def prediction_grid_metrics():
+    """
+    PREDICTION_GRID 모드 여부와 격자 크기·빌드 시간·실제 모델 대비 측정 오차
+    """
+    return prediction_grid.metrics()
+
+
+# ── 워밍업 / 주기 갱신 ──────────────────────────────
+@router.get("/refresh")
+async def refresh_status():
+    """
+    워밍업·갱신 작업별 마지막 실행/성공 시각, 경과 시간(age_seconds), 다음 실행 예정, 오류
+    """
+    return scheduler.status()
+
+
+@router.post("/refresh/{job}")
+async def refresh_now(job: str):
+    if job not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 작업: {job} (가능: {list(scheduler.jobs)})")
+    await scheduler.run(job, force=True)
+    return scheduler.status()["jobs"][job]
+
+
+# ── 교통 혼잡 계수 ──────────────────────────────────
+@router.get("/traffic")
+async def traffic_stats():
+    """
+    자치구 쌍 × 시간대 혼잡 계수 관측 범위, 현재 시간대 평균 계수, 마지막 발행 시각
+    """
+    return traffic_factors.stats()
+
+
+# ── 수요 예측 ───────────────────────────────────────
+@router.get("/demand")
+async def demand_forecast(location: Optional[str] = None):
+    """
+    15분 단위 수요 예측 상태 (location 을 주면 해당 자치구의 다음 칸별 예상 호출 수)
+    """
+    return demand_forecaster.stats(location)
+
+
+# ── 대기시간 예측 보정 ──────────────────────────────
+@router.get("/calibration")
+async def calibration_stats():
+    """
+    배차 결과 기반 잔차 보정 현황 (보정 전/후 MAE, 보정된 칸 수, 마지막 재학습)
+    """
+    return await asyncio.to_thread(wait_calibrator.stats)
+
+
+@router.get("/model")
+async def model_info():
+    """
+    적재된 대기시간 모델 파일 시각과 training/tune.py 프로파일 (파라미터, 검증 MAE, predict 지연)
+    """
+    mtime = model_mtime()
+    return {
+        "model_mtime": datetime.fromtimestamp(mtime).isoformat(timespec="seconds") if mtime else None,
+        "profile": model_profile(),
+    }
+
+
+# ── 배차 이벤트 로그 ──────────────────────────────
+@router.get("/events")
+async def event_log_stats():
+    """
+    배차 이벤트 로그 현황 (이 워커의 기록 수, 평균 기록 시간, 세그먼트 수·용량)
+    """
+    return event_log.dispatch_event_log.stats()
+
+
+@router.get("/events/replay")
+async def replay_events(
+    since: datetime = Query(..., description="재생 구간 시작 (ISO 8601)"),
+    until: Optional[datetime] = Query(None, description="재생 구간 끝 (기본: 지금)"),
+    recompute: bool = Query(False, description="대기시간을 현재 모델로 재예측"),
+    limit: int = Query(min(5000, event_log.REPLAY_MAX_EVENTS), ge=1, le=event_log.REPLAY_MAX_EVENTS,
+                       description="재생할 최대 이벤트 수 (구간의 가장 최근 것부터)"),
+    examples: int = Query(20, ge=0, le=500, description="반환할 변경 사례 수"),
+):
+    """
+    기록된 배차를 현재 SmartDispatchAlgorithm 으로 다시 계산해 선택 일치율과 달라진 사례를 반환
+    (묶음 동시 배정·합승 구성원은 다시 계산하지 않고 방식별 건수만)
+    """
+    from ..dispatch import dispatch_algorithm
+
+    def _replay():
+        events = event_log.read_events(since, until, limit=limit)
+        return event_log.replay_summary(event_log.replay(dispatch_algorithm, events, recompute), examples)
+
+    return await asyncio.to_thread(_replay)
+
+
+# ── 섀도 배차 정책 ──────────────────────────────
+@router.get("/shadow")
+async def shadow_report():
+    """
+    섀도 정책별 실제 배차와의 불일치율, 긴급 판정 차이, 선택 차량 ETA·공정성 차이 (core/shadow.py)
+    """
+    from ..dispatch import shadow_evaluator
+
+    return shadow_evaluator.report()
+
+
+@router.post("/shadow/reset")
+async def shadow_reset():
+    """정책 변경 후 비교를 새로 시작할 때 집계 초기화"""
+    from ..dispatch import shadow_evaluator
+
+    shadow_evaluator.reset()
+    return {"status": "reset"}
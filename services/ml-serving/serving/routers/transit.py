@@ -0,0 +1,54 @@
+# serving/routers/transit.py
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+
+from ..core.transit_service import transit_service
+from ..schemas import TransitPair
+
+router = APIRouter()
+
+# 한 번에 받을 수 있는 출발/도착 쌍 수
+MAX_PAIRS = 500
+
+
+@router.post("/compare")
+async def compare_transit(pairs: List[TransitPair]):
+    """
+    여러 출발/도착 쌍의 콜택시 vs 대중교통 비교
+    (경로는 격자·시간대 단위로 캐시, Tmap 동시 호출 수 제한)
+    """
+    if len(pairs) > MAX_PAIRS:
+        raise HTTPException(status_code=422, detail=f"한 번에 최대 {MAX_PAIRS}쌍까지 비교할 수 있습니다")
+    results = await transit_service.compare_many([
+        {
+            "origin": (p.origin_lat, p.origin_lon),
+            "dest": (p.dest_lat, p.dest_lon),
+            "origin_name": p.origin_name,
+            "dest_name": p.dest_name,
+            "depart_at": p.depart_at,
+        }
+        for p in pairs
+    ])
+    return {"results": results, "metrics": transit_service.metrics()}
+
+
+@router.get("/accessibility")
+async def city_accessibility():
+    """
+    자치구별 대중교통 vs 콜택시 평균 소요시간 (사전 계산 행렬 + 집계 큐브, 외부 호출 없음)
+    """
+    return transit_service.accessibility()
+
+
+@router.post("/matrix/refresh")
+async def refresh_matrix():
+    """
+    자치구 × 자치구 대중교통 행렬 즉시 재계산 (다른 워커가 계산 중이면 409, 계산 실패는 500)
+    """
+    result = await transit_service.refresh_matrix_exclusive()
+    if result is None:
+        raise HTTPException(status_code=409, detail="다른 워커에서 행렬을 계산 중입니다")
+    return result
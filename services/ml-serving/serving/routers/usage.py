@@ -3,19 +3,21 @@ import logging
 import asyncio
 import re
 from fastapi import APIRouter
+from fastapi_cache.decorator import cache
 from ..routers.mock import realtime_mock
 from ..schemas import UsageV2Response, MockRealtimeResponse
+from ..constants import DEFAULT_DATE
 from ..core.gemini_service import ask_gemini_model 
 from ..core.seoul_api   import fetch_daily_usage_data      # ✅ 수정
 from ..core.tmap_api    import get_tmap_travel_time   
-from ..core.ml_model import load_model_assets
+from ..core.cache import route_cache
+from ..core.responses import fast_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-model, le_loc, le_weather = load_model_assets()
-
 @router.get("/usage", response_model=UsageV2Response)
+@cache(**route_cache("usage"))
 async def get_usage():
     """
     /v2/usage
@@ -26,7 +28,7 @@ async def get_usage():
     """
     try:
         # 1. 서울시 API 데이터
-        date = "20250131"
+        date = DEFAULT_DATE
         df = await fetch_daily_usage_data(date)
 
         # Tmap ETA 계산
@@ -121,8 +123,8 @@ async def get_usage():
         normalized = raw_score / 100.0
         priority_score = round(0.3 + 0.7 * normalized, 3)
 
-        # 5. 최종 응답
-        return UsageV2Response(
+        # 5. 최종 응답 (모델 생성 시 한 번만 검증, response_model 재검증은 생략)
+        return fast_response(UsageV2Response(
             endpoint="/v2/usage",
             total_requests=int(df["접수건"].sum()),
             status="ok",
@@ -135,7 +137,7 @@ async def get_usage():
                 waiting_users=waiting_users,
                 priority_score=priority_score
             )
-        )
+        ))
 
     except Exception as e:
         logger.exception("Usage stats error")
@@ -23,6 +23,8 @@ class CallRequest(BaseModel):
     destination_type: str = "general"  # general / hospital 등
     medical_appointment: bool = False
     special_requirements: Optional[List[str]] = None
+    pickup_lat: Optional[float] = None
+    pickup_lon: Optional[float] = None
 
 
 class DriverInfo(BaseModel):
@@ -30,16 +32,47 @@ class DriverInfo(BaseModel):
     current_location: str
     wheelchair_capable: bool = False
     status: str = "available"  # available / busy 등
+    specialty_areas: Optional[List[str]] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
 
 
 class DispatchRequest(BaseModel):
     request_id: str
     request_time: datetime
     call_request: CallRequest
-    available_drivers: List[DriverInfo]
+    # 비어 있으면 위치 스트림(/drivers/positions)으로 관리되는 전체 차량에서 후보를 찾는다
+    available_drivers: List[DriverInfo] = Field(default_factory=list)
     weather: str = "맑음"
 
 
+class DispatchOutcome(BaseModel):
+    request_id: str
+    # 둘 중 하나 (actual_wait_minutes 가 있으면 그 값을 쓴다)
+    picked_up_at: Optional[datetime] = None
+    actual_wait_minutes: Optional[float] = Field(None, ge=0)
+
+
+class DriverPosition(BaseModel):
+    driver_id: str
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+    wheelchair_capable: bool = False
+    status: str = "available"
+    specialty_areas: Optional[List[str]] = None
+
+
+# ===== 대중교통 비교 =====
+class TransitPair(BaseModel):
+    origin_lat: float = Field(..., ge=-90, le=90)
+    origin_lon: float = Field(..., ge=-180, le=180)
+    dest_lat: float = Field(..., ge=-90, le=90)
+    dest_lon: float = Field(..., ge=-180, le=180)
+    origin_name: Optional[str] = None
+    dest_name: Optional[str] = None
+    depart_at: Optional[datetime] = None
+
+
 # ===== 통계/사용량 관련 모델 =====
 class LocationStats(BaseModel):
     rides: int
@@ -100,6 +133,15 @@ class MockRealtimeResponse(BaseModel):
         }
 
 
+class LiveCall(BaseModel):
+    id: str
+    wait_time: float = Field(..., ge=0, description="대기 시간 (분)")
+    distance_km: float = Field(..., ge=0)
+    wheelchair: bool = False
+    request_time: datetime
+    persona_type: Optional[str] = None
+
+
 # ===== V2 Usage 응답 =====
 class UsageV2Response(BaseModel):
     endpoint: str
@@ -0,0 +1,160 @@
+# serving/warmup.py
+"""
+워밍업 / 주기 갱신 작업 정의 (스케줄러는 core/scheduler.py)
+
+  model                모델 적재 + 첫 예측 (XGBoost OpenMP 초기화)           워커별, 시작 시 1회
+  usage.tables         오늘~최근 WARMUP_RECENT_DAYS 일 + DEFAULT_DATE 사용량 표  워커별, USAGE_TABLE_TTL 주기
+  usage.route          GET /v2/usage 응답 캐시                                 호스트당 1회, 캐시 만료 주기
+  destinations.route   GET /v2/best_destinations (기본값 + 이번 달) 응답 캐시   호스트당 1회, 캐시 만료 주기
+  transit.matrix       자치구 × 자치구 대중교통 소요시간 행렬                   TRANSIT_MATRIX_NIGHTLY=1 일 때 매일
+  demand.fit           집계 큐브로 수요 예측 기준 곡선 재학습 (core/demand_forecast.py) 워커별, DEMAND_REFIT_INTERVAL 주기
+  traffic.sample       Tmap ETA 표본 → 혼잡 계수 EMA (core/traffic.py)          TRAFFIC_SAMPLING=1 일 때, 호스트당 1회
+  rebalance.plan       유휴 차량 재배치 계획 (rebalancing.py)                  워커별, REBALANCE_INTERVAL 주기
+  calibration.flush    배차 결과 링 버퍼 저장 + 새 모델 재적재 (core/calibration.py) 워커별, CALIBRATION_FLUSH_INTERVAL 주기
+  model.retrain        배차 결과를 더한 대기시간 모델 전체 재학습 (하위 프로세스)  호스트당 1회, CALIBRATION_RETRAIN_INTERVAL 주기
+
+라우트 캐시는 해당 네임스페이스의 공유 캐시 항목을 지운 뒤 앱을 ASGI 로 직접 호출해 다시 채운다.
+(Cache-Control: no-cache 를 보내면 fastapi-cache 는 캐시를 읽지도 저장하지도 않으므로 쓰지 않는다.
+ 지운 뒤 채우기 전까지 들어온 요청은 만료 직후처럼 직접 계산한다)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+from .constants import DEFAULT_DATE
+from .core import execution
+from .core.cache import CACHE_POLICIES, get_backend
+from .core.calibration import FLUSH_INTERVAL, RETRAIN_INTERVAL, RETRAIN_TIMEOUT, wait_calibrator
+from .core.locations import usage_tables
+from .core.ml_model import get_model_assets
+from .core.public_api import usage_table
+from .core.scheduler import RefreshJob, RefreshScheduler
+from .core.seoul_api import fetch_usage_location_table
+from .core.traffic import SAMPLE_INTERVAL, SAMPLING, traffic_factors
+from .core.demand_forecast import REFIT_INTERVAL, demand_forecaster
+from .core.transit_service import MATRIX_HOUR, NIGHTLY, transit_service
+from .rebalancing import INTERVAL as REBALANCE_INTERVAL
+
+RECENT_DAYS = int(os.getenv("WARMUP_RECENT_DAYS", "3"))
+
+# 캐시가 만료되기 조금 전에 갱신
+REFRESH_MARGIN = 0.9
+
+
+def recent_dates(days: int = RECENT_DAYS) -> List[str]:
+    today = datetime.now()
+    dates = [(today - timedelta(days=i)).strftime("%Y%m%d") for i in range(days)]
+    return dates + ([DEFAULT_DATE] if DEFAULT_DATE not in dates else [])
+
+
+async def warm_model() -> Dict[str, Any]:
+    from .dispatch import dispatch_algorithm
+
+    def _predict() -> float:
+        get_model_assets()
+        return dispatch_algorithm.predict_waiting_time({
+            "pickup_location": "강남", "weather": "맑음", "wheelchair": True,
+            "num_vehicles": 10, "num_users": 20,
+        })
+
+    return {"sample_prediction": round(await execution.run("dispatch.urgency", _predict), 2)}
+
+
+async def warm_usage_tables() -> Dict[str, Any]:
+    dates = recent_dates()
+    # 오늘 날짜 동기 경로 표 (estimate_usage_stats 가 사용) + 비동기 경로 표, TTL 만료 전에 교체
+    results = await asyncio.gather(
+        execution.run("usage.estimate_stats", usage_table, dates[0], refresh=True),
+        *(fetch_usage_location_table(d, refresh=True) for d in dates),
+        return_exceptions=True,
+    )
+    detail = {}
+    for key, result in zip([f"public:{dates[0]}"] + [f"seoul:{d}" for d in dates], results):
+        detail[key] = f"error: {result}" if isinstance(result, BaseException) else result.stats()["rows"]
+    if all(isinstance(r, BaseException) for r in results):
+        raise RuntimeError(f"사용량 표를 하나도 받지 못했습니다: {detail}")
+    return detail
+
+
+def route_warmer(app, namespace: str, make_paths: Callable[[], List[str]]):
+    async def _warm() -> Dict[str, Any]:
+        paths = make_paths()
+        cleared = await get_backend().clear(namespace=CACHE_POLICIES[namespace].namespace)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+            responses = await asyncio.gather(*(client.get(path) for path in paths))
+        failed = {path: r.status_code for path, r in zip(paths, responses) if r.status_code >= 400}
+        if failed:
+            raise RuntimeError(f"워밍업 요청 실패: {failed}")
+        return {"cleared": cleared, **{path: r.status_code for path, r in zip(paths, responses)}}
+
+    return _warm
+
+
+async def refresh_transit_matrix() -> Dict[str, Any]:
+    result = await transit_service.refresh_matrix_exclusive()
+    if result is None:
+        return {"status": "skipped"}  # 다른 워커가 계산 중 (실패는 예외로 올라가 작업 실패로 기록)
+    return result
+
+
+async def refit_demand() -> Dict[str, Any]:
+    return await execution.run("analysis.aggregate", demand_forecaster.fit)
+
+
+async def plan_rebalance() -> Dict[str, Any]:
+    from .dispatch import rebalancing_planner
+
+    plan = await execution.run("dispatch.rebalance", rebalancing_planner.plan)
+    return {
+        "demand_source": plan["demand_source"], "idle_drivers": plan["idle_drivers"],
+        "moves": len(plan["moves"]), "elapsed_ms": plan["elapsed_ms"],
+    }
+
+
+def register_jobs(scheduler: RefreshScheduler, app) -> RefreshScheduler:
+    scheduler.register(RefreshJob("model", warm_model, timeout=600))
+    scheduler.register(RefreshJob(
+        "usage.tables", warm_usage_tables, every=usage_tables.ttl * REFRESH_MARGIN,
+    ))
+    scheduler.register(RefreshJob(
+        "usage.route", route_warmer(app, "usage", lambda: ["/v2/usage"]),
+        every=CACHE_POLICIES["usage"].expire * REFRESH_MARGIN, exclusive=True,
+    ))
+    scheduler.register(RefreshJob(
+        "destinations.route",
+        route_warmer(app, "best_destinations", lambda: [
+            "/v2/best_destinations",
+            f"/v2/best_destinations?sDate={datetime.now().strftime('%Y%m')}01",
+        ]),
+        every=CACHE_POLICIES["best_destinations"].expire * REFRESH_MARGIN, exclusive=True,
+    ))
+    if NIGHTLY:
+        scheduler.register(RefreshJob(
+            "transit.matrix", refresh_transit_matrix, at_hour=MATRIX_HOUR,
+            on_startup=transit_service.matrix() is None, timeout=3600,
+        ))
+    scheduler.register(RefreshJob("demand.fit", refit_demand, every=REFIT_INTERVAL))
+    if SAMPLING:
+        scheduler.register(RefreshJob(
+            "traffic.sample", traffic_factors.sample, every=SAMPLE_INTERVAL, exclusive=True,
+        ))
+    if REBALANCE_INTERVAL > 0:
+        scheduler.register(RefreshJob(
+            "rebalance.plan", plan_rebalance, every=REBALANCE_INTERVAL, on_startup=False,
+        ))
+    scheduler.register(RefreshJob(
+        "calibration.flush", lambda: execution.run("analysis.aggregate", wait_calibrator.flush),
+        every=FLUSH_INTERVAL, on_startup=False,
+    ))
+    if RETRAIN_INTERVAL > 0:
+        scheduler.register(RefreshJob(
+            "model.retrain", wait_calibrator.retrain, every=RETRAIN_INTERVAL, on_startup=False,
+            exclusive=True, timeout=RETRAIN_TIMEOUT + 60,
+        ))
+    return scheduler
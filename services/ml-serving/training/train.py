@@ -1,12 +1,51 @@
+import argparse
+import json
+import os
+from datetime import datetime
 from pathlib import Path
+
+import pandas as pd
+
 from training.data_generator import generate_dummy_data
 
 # ✅ 모델 저장 경로 설정 (절대 경로)
 MODEL_DIR = Path(__file__).resolve().parents[1] / "app" / "model"
-MODEL_DIR.mkdir(parents=True, exist_ok=True)
 
-def train_model():
+# 실제 배차 결과(--extra-data)는 더미 데이터보다 이 배수만큼 무겁게 학습
+EXTRA_WEIGHT = 3.0
+
+FEATURES = ['시간대', '위치_encoded', '날씨_encoded', '휠체어YN', '해당지역운행차량수', '해당지역이용자수']
+DEFAULT_PARAMS = {"n_estimators": 300, "max_depth": 6, "learning_rate": 0.1}
+# training/tune.py 가 고른 파라미터와 지연 프로파일 (모델 파일 옆)
+PROFILE_NAME = "model_profile.json"
+
+
+def load_profile(out_dir: Path):
+    path = Path(out_dir) / PROFILE_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def profile_params(out_dir: Path):
+    """저장된 프로파일의 파라미터 (없으면 None → DEFAULT_PARAMS)"""
+    profile = load_profile(out_dir)
+    return profile["params"] if profile else None
+
+
+def load_training_data(extra_data: Path = None, extra_weight: float = EXTRA_WEIGHT):
+    """
+    extra_data: 서빙에서 모은 배차 결과 CSV (data_generator 와 같은 컬럼, serving/core/calibration.py)
+    반환: (X, y, 가중치, le_loc, le_weather)
+    """
     df = generate_dummy_data()
+    df['가중치'] = 1.0
+    if extra_data is not None:
+        extra = pd.read_csv(extra_data)
+        extra['가중치'] = extra_weight
+        print(f"추가 학습 데이터: {len(extra)}행 ({extra_data})")
+        df = pd.concat([df, extra], ignore_index=True)
+
     df['시간대'] = pd.to_datetime(df['탑승시각']).dt.hour
     df['휠체어YN'] = df['휠체어탑승여부'].map({'Y': 1, 'N': 0})
 
@@ -15,27 +54,84 @@ def train_model():
     le_weather = LabelEncoder()
     df['위치_encoded'] = le_loc.fit_transform(df['위치'])
     df['날씨_encoded'] = le_weather.fit_transform(df['날씨'])
+    return df[FEATURES], df['대기시간(분)'], df['가중치'], le_loc, le_weather
+
+
+def train_model(extra_data: Path = None, out_dir: Path = MODEL_DIR, extra_weight: float = EXTRA_WEIGHT,
+                params: dict = None):
+    """
+    params: XGBRegressor 하이퍼파라미터 (없으면 out_dir 의 model_profile.json → DEFAULT_PARAMS 순)
+    model_profile.json 은 이 모델 기준으로 다시 쓴다 (검증 MAE 는 새 값, 지연은 측정하지 않았음을 표시,
+    tune.py 가 측정한 값은 tuned 아래에 참고로 남긴다)
+    """
+    X, y, weights, le_loc, le_weather = load_training_data(extra_data, extra_weight)
 
     from sklearn.model_selection import train_test_split
-    X = df[['시간대', '위치_encoded', '날씨_encoded', '휠체어YN',
-            '해당지역운행차량수', '해당지역이용자수']]
-    y = df['대기시간(분)']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test, w_train, w_test = train_test_split(
+        X, y, weights, test_size=0.2, random_state=42
+    )
 
     from xgboost import XGBRegressor
-    model = XGBRegressor(n_estimators=300, max_depth=6, learning_rate=0.1)
-    model.fit(X_train, y_train)
+    params = params or profile_params(out_dir) or DEFAULT_PARAMS
+    print("파라미터:", params)
+    model = XGBRegressor(**params)
+    model.fit(X_train, y_train, sample_weight=w_train)
 
     from sklearn.metrics import mean_absolute_error
-    print("MAE:", mean_absolute_error(y_test, model.predict(X_test)))
+    mae = float(mean_absolute_error(y_test, model.predict(X_test)))
+    print("MAE:", mae)
+    real = (w_test > 1).to_numpy()
+    if real.any():
+        print("MAE(배차 결과):", mean_absolute_error(y_test[real], model.predict(X_test[real])))
+
+    # 파라미터를 고른 tune.py 결과 (그 모델이 아니라 같은 파라미터로 측정한 값, 재학습을 거듭해도 유지)
+    previous = load_profile(out_dir)
+    tuned = None
+    if previous is not None:
+        tuned = previous.get("tuned") if previous.get("source") == "train" else {
+            k: previous.get(k) for k in ("study", "trial", "holdout_mae", "latency")
+        }
+    profile = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": "train",
+        "params": params,
+        "holdout_mae": round(mae, 4),
+        "latency": None,
+        "latency_measured": False,
+        "extra_data": str(extra_data) if extra_data is not None else None,
+        "tuned": tuned,
+    }
+    save_model_assets(out_dir, model, le_loc, le_weather, profile=profile)
+    print("✅ 모델과 인코더 저장 완료:", out_dir)
+    return model
+
 
-    # ✅ 경로 안정적으로 저장
+def save_model_assets(out_dir: Path, model, le_loc, le_weather, profile: dict = None):
+    """
+    ✅ 경로 안정적으로 저장 (서빙 중인 워커가 반쯤 쓴 파일을 읽지 않도록 임시 파일 → 교체,
+       워커는 model.pkl 의 mtime 으로 새 모델을 알아채므로 프로파일까지 쓴 뒤 model.pkl 을 마지막에)
+    profile: model_profile.json 내용 (training/tune.py, 이 모델 객체를 측정한 값)
+    """
     import joblib
-    joblib.dump(model, MODEL_DIR / "model.pkl")
-    joblib.dump(le_loc, MODEL_DIR / "le_loc.pkl")
-    joblib.dump(le_weather, MODEL_DIR / "le_weather.pkl")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, obj in (("le_loc.pkl", le_loc), ("le_weather.pkl", le_weather)):
+        tmp = out_dir / f".{name}.{os.getpid()}.tmp"
+        joblib.dump(obj, tmp)
+        os.replace(tmp, out_dir / name)
+    if profile is not None:
+        tmp = out_dir / f".{PROFILE_NAME}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(profile, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, out_dir / PROFILE_NAME)
+    tmp = out_dir / f".model.pkl.{os.getpid()}.tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, out_dir / "model.pkl")
 
-    print("✅ 모델과 인코더 저장 완료:", MODEL_DIR)
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="대기시간 예측 모델 학습")
+    parser.add_argument("--extra-data", type=Path, default=None, help="배차 결과 CSV (더미 데이터에 추가)")
+    parser.add_argument("--extra-weight", type=float, default=EXTRA_WEIGHT)
+    parser.add_argument("--out", type=Path, default=MODEL_DIR, help="모델 저장 디렉터리")
+    args = parser.parse_args()
+    train_model(args.extra_data, args.out, args.extra_weight)
@@ -0,0 +1,255 @@
+# training/tune.py
+"""
+대기시간 모델 하이퍼파라미터 탐색 (Optuna) + 정확도·추론 지연 비교 후 내보내기
+
+    python -m training.tune --trials 200 --timeout 900 --jobs 4
+    python -m training.tune --study wait-model --trials 300     # 같은 study 이어서 탐색
+
+1) 탐색: --jobs 개 프로세스가 같은 SQLite study(training/studies/optuna.db)를 공유하며 병렬 탐색
+   - 목적값은 K-fold 교차검증 MAE, fold 마다 중간값을 보고해 MedianPruner 로 가망 없는 시도 중단
+   - 전체 시도 수(--trials, 재개한 study 의 이전 시도 포함)와 시간 예산(--timeout) 중 먼저 닿는 쪽에서 멈춤
+2) 비교: MAE 상위 --top 개 시도 + 현재 기본값(DEFAULT_PARAMS)을 같은 학습/검증 분할로 다시 학습하고,
+   다른 작업이 없는 상태에서 서빙과 같은 형태(1행 DataFrame, 64행 배치)로 predict 지연을 측정
+3) 선택: 1행 지연 p50 이 기본 모델의 --max-latency-ratio 배 이하인 후보 중 검증 MAE 최소
+   (MAE 차이가 --mae-tolerance 이내면 더 빠른 쪽). 조건을 만족하는 후보가 없으면 기본값 유지
+4) 내보내기: 비교 단계에서 측정한 바로 그 모델 객체와 같은 데이터의 인코더를 저장하고,
+   model_profile.json(파라미터·MAE·지연)을 model.pkl 보다 먼저 교체해 둘이 항상 같은 모델을 가리키게 한다
+   (더미 데이터는 매번 달라지므로 다시 학습하면 측정값과 다른 모델이 된다.
+    이후 train.py / 서빙 재학습은 이 파일의 파라미터를 그대로 쓴다)
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from training.train import DEFAULT_PARAMS, EXTRA_WEIGHT, MODEL_DIR, PROFILE_NAME, load_training_data, save_model_assets
+
+STUDY_DIR = Path(__file__).resolve().parent / "studies"
+DEFAULT_STORAGE = f"sqlite:///{STUDY_DIR / 'optuna.db'}"
+FOLDS = 4
+LATENCY_REPEAT = 300
+BATCH_ROWS = 64
+
+
+# ------------------------------------------
+# 탐색
+# ------------------------------------------
+def suggest_params(trial, threads: int) -> dict:
+    return {
+        "n_estimators": trial.suggest_int("n_estimators", 50, 600, step=25),
+        "max_depth": trial.suggest_int("max_depth", 2, 10),
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "subsample": trial.suggest_float("subsample", 0.5, 1.0),
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.5, 1.0),
+        "min_child_weight": trial.suggest_float("min_child_weight", 1.0, 20.0, log=True),
+        "reg_lambda": trial.suggest_float("reg_lambda", 1e-3, 10.0, log=True),
+        "tree_method": "hist",
+        "n_jobs": threads,
+    }
+
+
+def make_objective(data_path: Path, threads: int):
+    import joblib
+    import optuna
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import KFold
+    from xgboost import XGBRegressor
+
+    X, y, w = joblib.load(data_path)
+    folds = list(KFold(FOLDS, shuffle=True, random_state=42).split(X))
+
+    def objective(trial) -> float:
+        params = suggest_params(trial, threads)
+        scores = []
+        for step, (train_idx, valid_idx) in enumerate(folds):
+            model = XGBRegressor(**params)
+            model.fit(X.iloc[train_idx], y.iloc[train_idx], sample_weight=w.iloc[train_idx])
+            scores.append(mean_absolute_error(y.iloc[valid_idx], model.predict(X.iloc[valid_idx])))
+            trial.report(float(np.mean(scores)), step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        # 병렬 탐색 중 측정이라 참고값 (최종 선택은 compare 단계에서 다시 측정)
+        trial.set_user_attr("search_latency_us", measure_latency(model, X)["single_p50_us"])
+        return float(np.mean(scores))
+
+    return objective
+
+
+def _search_worker(study_name: str, storage: str, data_path: Path, trials: int, deadline: float, threads: int):
+    import optuna
+    from optuna.study import MaxTrialsCallback
+    from optuna.trial import TrialState
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(study_name=study_name, storage=storage)
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        return
+    study.optimize(
+        make_objective(data_path, threads),
+        timeout=remaining,
+        callbacks=[MaxTrialsCallback(trials, states=(TrialState.COMPLETE, TrialState.PRUNED))],
+        gc_after_trial=True,
+    )
+
+
+def run_search(study_name: str, storage: str, data_path: Path, trials: int, timeout: float, jobs: int):
+    import optuna
+
+    STUDY_DIR.mkdir(parents=True, exist_ok=True)
+    study = optuna.create_study(
+        study_name=study_name, storage=storage, direction="minimize", load_if_exists=True,
+        sampler=optuna.samplers.TPESampler(multivariate=True),
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1),
+    )
+    done = len(study.get_trials(deepcopy=False))
+    print(f"study '{study_name}': 기존 시도 {done}건, 목표 {trials}건, 프로세스 {jobs}개, 예산 {timeout:g}초")
+
+    # 코어를 프로세스끼리 나눠 쓴다 (XGBoost 스레드 × 프로세스 수 ≤ 코어 수)
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    deadline = time.time() + timeout
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=_search_worker, args=(study_name, storage, data_path, trials, deadline, threads))
+        for _ in range(jobs)
+    ]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    return optuna.load_study(study_name=study_name, storage=storage)
+
+
+# ------------------------------------------
+# 비교 (지연 측정은 순차, 조용한 상태에서)
+# ------------------------------------------
+def measure_latency(model, X: pd.DataFrame, repeat: int = LATENCY_REPEAT) -> dict:
+    """서빙 경로와 같은 형태: 1행 DataFrame predict (배차 단건), 64행 predict (배치 배차)"""
+    rows = X.sample(min(repeat, len(X)), replace=len(X) < repeat, random_state=0)
+    single = []
+    for i in range(len(rows)):
+        row = rows.iloc[[i]]
+        t0 = time.perf_counter_ns()
+        model.predict(row)
+        single.append((time.perf_counter_ns() - t0) / 1000)
+    batch = X.iloc[:BATCH_ROWS]
+    batched = []
+    for _ in range(max(repeat // 10, 10)):
+        t0 = time.perf_counter_ns()
+        model.predict(batch)
+        batched.append((time.perf_counter_ns() - t0) / 1000)
+    single.sort()
+    return {
+        "single_p50_us": round(statistics.median(single), 1),
+        "single_p95_us": round(single[min(len(single) - 1, int(len(single) * 0.95))], 1),
+        f"batch{BATCH_ROWS}_p50_us": round(statistics.median(batched), 1),
+    }
+
+
+def compare_candidates(study, X, y, w, top: int) -> list:
+    from optuna.trial import TrialState
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import train_test_split
+    from xgboost import XGBRegressor
+
+    X_train, X_valid, y_train, y_valid, w_train, _ = train_test_split(X, y, w, test_size=0.2, random_state=42)
+    completed = sorted(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,)), key=lambda t: t.value)
+
+    candidates = [{"name": "baseline", "params": dict(DEFAULT_PARAMS), "cv_mae": None, "trial": None}]
+    for t in completed[:top]:
+        params = {**t.params, "tree_method": "hist"}
+        candidates.append({"name": f"trial-{t.number}", "params": params, "cv_mae": round(t.value, 4),
+                           "trial": t.number})
+
+    for c in candidates:
+        model = XGBRegressor(**c["params"])
+        model.fit(X_train, y_train, sample_weight=w_train)
+        c["holdout_mae"] = round(float(mean_absolute_error(y_valid, model.predict(X_valid))), 4)
+        c["latency"] = measure_latency(model, X_valid)
+        # 측정한 객체를 그대로 내보낸다 (main)
+        c["model"] = model
+    return candidates
+
+
+def select(candidates: list, max_latency_ratio: float, mae_tolerance: float) -> dict:
+    baseline = candidates[0]
+    limit = baseline["latency"]["single_p50_us"] * max_latency_ratio
+    feasible = [c for c in candidates if c["latency"]["single_p50_us"] <= limit]
+    best_mae = min(c["holdout_mae"] for c in feasible)
+    # 정확도가 사실상 같으면 더 빠른 모델
+    close = [c for c in feasible if c["holdout_mae"] <= best_mae * (1 + mae_tolerance)]
+    return min(close, key=lambda c: c["latency"]["single_p50_us"])
+
+
+def format_candidates(candidates: list, chosen: dict) -> str:
+    lines = [f"{'':2}{'candidate':<14} {'cv MAE':>8} {'holdout MAE':>12} {'1행 p50(us)':>12} {'64행 p50(us)':>13}"]
+    for c in candidates:
+        mark = "✅" if c is chosen else "  "
+        cv = "-" if c["cv_mae"] is None else f"{c['cv_mae']:.3f}"
+        lines.append(
+            f"{mark}{c['name']:<14} {cv:>8} {c['holdout_mae']:>12.3f} "
+            f"{c['latency']['single_p50_us']:>12.1f} {c['latency'][f'batch{BATCH_ROWS}_p50_us']:>13.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="대기시간 모델 하이퍼파라미터 탐색 + 지연 고려 선택")
+    parser.add_argument("--study", default="wait-model", help="study 이름 (같은 이름이면 이어서 탐색)")
+    parser.add_argument("--storage", default=DEFAULT_STORAGE)
+    parser.add_argument("--trials", type=int, default=100, help="study 전체 목표 시도 수")
+    parser.add_argument("--timeout", type=float, default=600, help="탐색 시간 예산(초)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="병렬 탐색 프로세스 수")
+    parser.add_argument("--top", type=int, default=5, help="지연 비교에 올릴 상위 시도 수")
+    parser.add_argument("--max-latency-ratio", type=float, default=1.25, help="기본 모델 대비 허용 1행 지연 배수")
+    parser.add_argument("--mae-tolerance", type=float, default=0.01, help="같은 정확도로 볼 MAE 상대 차이")
+    parser.add_argument("--extra-data", type=Path, default=None, help="배차 결과 CSV (train.py 와 같음)")
+    parser.add_argument("--extra-weight", type=float, default=EXTRA_WEIGHT)
+    parser.add_argument("--out", type=Path, default=MODEL_DIR, help="모델 저장 디렉터리")
+    parser.add_argument("--dry-run", action="store_true", help="비교 결과만 출력하고 모델은 저장하지 않음")
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    # 탐색 프로세스가 모두 같은 데이터를 보도록 한 번 만들어 파일로 넘긴다 (더미 데이터는 매번 달라짐)
+    X, y, w, le_loc, le_weather = load_training_data(args.extra_data, args.extra_weight)
+    STUDY_DIR.mkdir(parents=True, exist_ok=True)
+    data_path = STUDY_DIR / f"{args.study}.data.joblib"
+    joblib.dump((X, y, w), data_path)
+
+    study = run_search(args.study, args.storage, data_path, args.trials, args.timeout, max(args.jobs, 1))
+    candidates = compare_candidates(study, X, y, w, args.top)
+    chosen = select(candidates, args.max_latency_ratio, args.mae_tolerance)
+    print(format_candidates(candidates, chosen))
+
+    if args.dry_run:
+        return
+    params = {k: v for k, v in chosen["params"].items() if k != "n_jobs"}
+    profile = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": "tune",
+        "study": args.study,
+        "trial": chosen["trial"],
+        "params": params,
+        "cv_mae": chosen["cv_mae"],
+        "holdout_mae": chosen["holdout_mae"],
+        "latency": chosen["latency"],
+        "latency_measured": True,
+        "baseline": {k: candidates[0][k] for k in ("params", "holdout_mae", "latency")},
+        "max_latency_ratio": args.max_latency_ratio,
+        "candidates": [{k: c[k] for k in ("name", "cv_mae", "holdout_mae", "latency")} for c in candidates],
+    }
+    save_model_assets(args.out, chosen["model"], le_loc, le_weather, profile=profile)
+    print(f"✅ 선택: {chosen['name']} → {Path(args.out) / PROFILE_NAME}")
+
+
+if __name__ == "__main__":
+    main()